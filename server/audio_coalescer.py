@@ -0,0 +1,129 @@
+"""
+Coalescing of the candidate's audio chunks before they go to Gemini.
+
+Every chunk the browser records becomes its own realtime_input message and
+WebSocket frame upstream. With small chunks most of the cost is per message
+(JSON, base64 framing, queueing, a send() call), so a per-session
+AudioCoalescer joins consecutive PCM chunks and sends them as one message.
+
+A buffer is flushed:
+
+- when adding the next chunk of the same size would take it past
+  COALESCE_MAX_MS of audio (or COALESCE_MAX_BYTES), so frames stay under the
+  cap without waiting for a chunk that would not fit; chunks as long as the
+  cap or longer go out at once
+- COALESCE_MAX_MS after its first chunk arrived, when no more audio comes
+  (end of speech, silence suppressed by the vad stage)
+- before any non-audio message of the session, so control messages never
+  overtake audio recorded before them
+- when the sample rate changes
+
+COALESCE=0 turns it off.
+"""
+
+import asyncio
+import logging
+import os
+
+import audio_frames
+
+logger = logging.getLogger(__name__)
+
+ENABLED = os.environ.get("COALESCE", "1") != "0"
+
+# Counters over every session of the process
+totals = {
+    "chunks": 0,
+    "messages": 0,
+    "flush_size": 0,
+    "flush_timer": 0,
+    "flush_control": 0,
+}
+
+
+class AudioCoalescer:
+    """
+    Buffer of PCM chunks for one session; `send` is awaited with each
+    realtime_input message.
+    """
+
+    def __init__(self, send, max_ms: int = None, max_bytes: int = None):
+        self.send = send
+        self.max_seconds = (
+            max_ms
+            if max_ms is not None
+            else int(os.environ.get("COALESCE_MAX_MS", 100))
+        ) / 1000
+        self.max_bytes = max_bytes or int(os.environ.get("COALESCE_MAX_BYTES", 65536))
+
+        self.parts = []
+        self.size = 0
+        self.rate = None
+        self.timer = None
+        self.timer_task = None
+        self.lock = asyncio.Lock()
+
+    @property
+    def pending(self) -> bool:
+        """Audio buffered or still being sent by a timed flush."""
+        return bool(self.parts) or self.lock.locked()
+
+    def limit(self, rate: int) -> float:
+        return min(self.max_bytes, self.max_seconds * 2 * rate)
+
+    def takes(self, rate: int, size: int) -> bool:
+        """
+        Whether a chunk of `size` PCM bytes goes through the buffer. One
+        that would be flushed on its own is sent as it came, without being
+        decoded, unless audio is already waiting.
+        """
+        return bool(self.parts) or 2 * size <= self.limit(rate)
+
+    async def add(self, rate: int, pcm: bytes) -> None:
+        totals["chunks"] += 1
+        if self.parts and rate != self.rate:
+            await self.flush("flush_size")
+        if not self.parts:
+            self.rate = rate
+            self.timer = asyncio.get_running_loop().call_later(
+                self.max_seconds, self._expire
+            )
+        self.parts.append(pcm)
+        self.size += len(pcm)
+
+        # Flushed now if one more chunk like this one would not fit
+        if self.size + len(pcm) > self.limit(rate):
+            await self.flush("flush_size")
+
+    async def flush(self, reason: str = "flush_control") -> None:
+        # Taken even with nothing buffered, so that a control message waits
+        # for a timer flush still being sent
+        async with self.lock:
+            if not self.parts:
+                return
+            parts, rate = self.parts, self.rate
+            self.parts, self.size = [], 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            totals[reason] += 1
+            totals["messages"] += 1
+            await self.send(audio_frames.pcm_to_json(rate, b"".join(parts)))
+
+    def _expire(self) -> None:
+        self.timer = None
+        self.timer_task = asyncio.ensure_future(self._flush_expired())
+
+    async def _flush_expired(self) -> None:
+        try:
+            await self.flush("flush_timer")
+        except Exception as e:
+            # The session is going away; its reader sees the error as well
+            logger.debug(f"Timed audio flush failed: {e}")
+
+    def close(self) -> None:
+        """Drops what is buffered; the session is over."""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        self.parts, self.size = [], 0
@@ -0,0 +1,220 @@
+"""
+Binary audio frames between the browser and the proxy.
+
+A browser that opens /ws with the "pcm16.v1" subprotocol sends and receives
+audio as binary WebSocket frames instead of base64 inside JSON: a 4 byte
+header followed by raw little-endian 16-bit PCM.
+
+    byte 0     version (1)
+    byte 1     kind (1 = PCM16 mono, 2 = G.711 mu-law, 3 = Opus packets)
+    bytes 2-3  sample rate in Hz, little-endian uint16
+
+The browser always sends PCM16; Gemini's audio may come back in the other
+kinds when the session negotiated a compact format (see downstream_audio).
+
+Everything else (setup, tool calls, turn signals, client_content) stays JSON
+text. Gemini only speaks JSON, so the proxy converts at the upstream edge:
+client frames become realtime_input media chunks and Gemini's audio-only
+serverContent messages become binary frames. Clients that do not ask for
+the subprotocol keep the plain JSON mode.
+"""
+
+import base64
+import binascii
+import re
+import struct
+
+import codec
+
+SUBPROTOCOL = "pcm16.v1"
+VERSION = 1
+KIND_PCM16 = 1
+KIND_MULAW = 2
+KIND_OPUS = 3
+
+HEADER = struct.Struct("<BBH")
+HEADER_SIZE = HEADER.size
+
+CLIENT_RATE = 16000
+SERVER_RATE = 24000
+
+RATE_PATTERN = re.compile(r"rate=(\d+)")
+MIME_PATTERN = re.compile(r'"mimeType"\s*:\s*"([^"\\]*)"')
+
+
+class FrameError(ValueError):
+    """A binary frame that does not follow the pcm16.v1 layout."""
+
+
+def encode_frame(pcm: bytes, rate: int, kind: int = KIND_PCM16) -> bytes:
+    return HEADER.pack(VERSION, kind, rate) + pcm
+
+
+def decode_frame(frame: bytes):
+    """Returns (sample_rate, pcm) of a binary frame."""
+    if len(frame) < HEADER_SIZE:
+        raise FrameError("Frame shorter than its header")
+    version, kind, rate = HEADER.unpack_from(frame)
+    if version != VERSION or kind != KIND_PCM16:
+        raise FrameError(f"Unsupported frame version={version} kind={kind}")
+    if (len(frame) - HEADER_SIZE) % 2:
+        raise FrameError("PCM16 payload with an odd number of bytes")
+    return rate, frame[HEADER_SIZE:]
+
+
+def client_frame_to_json(frame: bytes) -> str:
+    """Client binary frame -> realtime_input message for Gemini."""
+    return pcm_to_json(*decode_frame(frame))
+
+
+def pcm_to_json(rate: int, pcm: bytes) -> str:
+    """realtime_input message for Gemini carrying one PCM chunk."""
+    mime_type = "audio/pcm" if rate == CLIENT_RATE else f"audio/pcm;rate={rate}"
+    # Built as text: the base64 payload never needs JSON escaping
+    return (
+        '{"realtime_input":{"media_chunks":[{"mime_type":"'
+        + mime_type
+        + '","data":"'
+        + base64.b64encode(pcm).decode("ascii")
+        + '"}]}}'
+    )
+
+
+def client_json_pcm(message: str):
+    """
+    (sample_rate, pcm) of a client realtime_input message with a single
+    PCM chunk; None for any other shape.
+    """
+    try:
+        chunks = codec.loads(message)["realtime_input"]["media_chunks"]
+        if len(chunks) != 1:
+            return None
+        mime_type = chunks[0].get("mime_type", "")
+        if not mime_type.startswith("audio/pcm"):
+            return None
+        match = RATE_PATTERN.search(mime_type)
+        rate = int(match.group(1)) if match else CLIENT_RATE
+        return rate, base64.b64decode(chunks[0]["data"])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def json_pcm_size(message: str) -> int:
+    """
+    Rough PCM size of a realtime_input message from its length, enough to
+    decide on coalescing without decoding it.
+    """
+    return max(0, len(message) - 80) * 3 // 4
+
+
+def inline_audio_spans(message: str):
+    """
+    Positions of the mimeType and data values of the only inlineData part
+    of a message, found on the raw text like proxy.is_passthrough does;
+    None when the message has another shape.
+    """
+    start = message.find('"inlineData"')
+    if start < 0 or message.find('"inlineData"', start + 1) >= 0:
+        return None
+    mime_type = MIME_PATTERN.search(message, start)
+    key = message.find('"data"', start)
+    if mime_type is None or key < 0:
+        return None
+    # The value is the next string; base64 never needs escaping, so an
+    # escaped payload is left to the strict base64 decode to reject
+    opening = message.find('"', key + 6)
+    closing = message.find('"', opening + 1)
+    if opening < 0 or closing < 0 or message[key + 6 : opening].strip() != ":":
+        return None
+    return mime_type.span(1), (opening + 1, closing)
+
+
+def replace_inline_audio(message: str, spans, mime_type: str, data: str) -> str:
+    """The message with new mimeType and data values, everything else kept."""
+    pieces, position = [], 0
+    for (start, end), value in sorted(zip(spans, (mime_type, data))):
+        pieces += [message[position:start], value]
+        position = end
+    pieces.append(message[position:])
+    return "".join(pieces)
+
+
+# A Gemini message that carries nothing but one audio part, without
+# whitespace and with the mimeType and data values cut out, in either order
+AUDIO_ONLY_ENVELOPES = {
+    (
+        '{"serverContent":{"modelTurn":{"parts":[{"inlineData":{"mimeType":"","data":"',
+        '"}}]}}}',
+    ),
+    (
+        '{"serverContent":{"modelTurn":{"parts":[{"inlineData":{"data":"',
+        '","mimeType":""}}]}}}',
+    ),
+}
+
+
+def audio_only(message: str, spans) -> bool:
+    """
+    Tells whether a Gemini message with the given inline_audio_spans has
+    nothing but its audio part (no text, turnComplete, transcriptions...),
+    so that a binary frame can stand for all of it. Only the short text
+    around the two values is looked at.
+    """
+    (mime_start, mime_end), (data_start, data_end) = spans
+    if mime_start < data_start:
+        before = message[:mime_start] + message[mime_end:data_start]
+        after = message[data_end:]
+    else:
+        before = message[:data_start]
+        after = message[data_end:mime_start] + message[mime_end:]
+    return ("".join(before.split()), "".join(after.split())) in AUDIO_ONLY_ENVELOPES
+
+
+def server_json_pcm(message: str, spans=None):
+    """
+    (sample_rate, pcm) of the single PCM part of a Gemini serverContent
+    message; None when it has no such part. spans, when the caller already
+    has them, saves scanning the message again.
+    """
+    if spans is None:
+        spans = inline_audio_spans(message)
+        if spans is None:
+            return None
+    (mime_start, mime_end), (data_start, data_end) = spans
+    mime_type = message[mime_start:mime_end]
+    if not mime_type.startswith("audio/pcm"):
+        return None
+    match = RATE_PATTERN.search(mime_type)
+    rate = int(match.group(1)) if match else SERVER_RATE
+    try:
+        return rate, binascii.a2b_base64(message[data_start:data_end], strict_mode=True)
+    except ValueError:
+        return None
+
+
+def server_json_to_frame(message: str):
+    """
+    Gemini audio-only serverContent message -> binary frame for the browser.
+    Returns None when the message is not a single PCM part or carries
+    anything else, so that it is forwarded as JSON.
+    """
+    spans = inline_audio_spans(message)
+    if spans is None or not audio_only(message, spans):
+        return None
+    audio = server_json_pcm(message, spans)
+    if audio is None:
+        return None
+    rate, pcm = audio
+    return encode_frame(pcm, rate)
+
+
+def merge_frames(first: bytes, second: bytes):
+    """Joins two binary frames of the same rate; None if they differ."""
+    if first[:HEADER_SIZE] != second[:HEADER_SIZE]:
+        return None
+    return first + second[HEADER_SIZE:]
+
+
+def negotiate(requested) -> str:
+    """The subprotocol to accept out of the ones the client asked for."""
+    return SUBPROTOCOL if SUBPROTOCOL in (requested or []) else None
@@ -0,0 +1,133 @@
+"""
+Bytes on the wire and proxy CPU per session, JSON vs binary audio transport.
+
+A session is replayed through proxy.proxy_task in both directions: the
+browser's 16 kHz chunks (Client->Server) and Gemini's 24 kHz audio messages
+(Server->Client). In JSON mode the browser leg carries base64 inside JSON,
+in binary mode (pcm16.v1, see audio_frames) it carries the raw PCM and the
+proxy converts at the Gemini edge. The Gemini leg is JSON in both modes.
+
+Wire bytes include the WebSocket frame header (client frames are masked).
+Turn signals and tool calls are JSON in both modes and are left out.
+
+Usage (from the server directory):
+    python -m benchmarks.binary_transport --seconds 300
+"""
+
+import argparse
+import asyncio
+import time
+
+import audio_frames
+from benchmarks.metrics_overhead import FrameSource
+from benchmarks.proxy_forwarding import client_audio_frame, server_audio_frame
+from proxy import proxy_task
+
+
+def websocket_overhead(size: int, masked: bool) -> int:
+    """RFC 6455 frame header bytes for a payload of `size` bytes."""
+    header = 2 if size < 126 else 4 if size < 65536 else 10
+    return header + (4 if masked else 0)
+
+
+class CountingTarget:
+    """Stands in for the receiving websocket and counts what it is sent."""
+
+    def __init__(self, masked: bool):
+        self.masked = masked
+        self.frames = 0
+        self.bytes = 0
+
+    async def send(self, message) -> None:
+        size = len(message)
+        self.frames += 1
+        self.bytes += size + websocket_overhead(size, self.masked)
+
+
+async def run_direction(message, frames: int, name: str, binary: bool, masked: bool):
+    """Returns (cpu seconds, target) for `frames` copies of message."""
+    target = CountingTarget(masked)
+    source = FrameSource(message, frames)
+    start = time.process_time()
+    await proxy_task(source, target, name, binary=binary)
+    return time.process_time() - start, target
+
+
+async def session(args, binary: bool) -> dict:
+    client_json = client_audio_frame(args.client_samples)
+    server_json = server_audio_frame(args.server_samples)
+    client_frames = round(args.seconds * 16000 / args.client_samples)
+    server_frames = round(args.seconds * 24000 / args.server_samples)
+
+    if binary:
+        client_message = audio_frames.encode_frame(
+            bytes(args.client_samples * 2), audio_frames.CLIENT_RATE
+        )
+    else:
+        client_message = client_json
+
+    # Browser leg: what the browser sent upstream and received downstream
+    browser_in = sum(
+        size + websocket_overhead(size, True)
+        for size in [len(client_message)] * client_frames
+    )
+    up_cpu, to_gemini = await run_direction(
+        client_message, client_frames, "Client->Server", binary, masked=True
+    )
+    down_cpu, to_browser = await run_direction(
+        server_json, server_frames, "Server->Client", binary, masked=False
+    )
+    return {
+        "browser_bytes": browser_in + to_browser.bytes,
+        "gemini_bytes": to_gemini.bytes
+        + server_frames
+        * (len(server_json) + websocket_overhead(len(server_json), False)),
+        "cpu_ms": (up_cpu + down_cpu) * 1000,
+        "up_cpu_ms": up_cpu * 1000,
+        "down_cpu_ms": down_cpu * 1000,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--seconds", type=int, default=300, help="seconds of audio each way"
+    )
+    parser.add_argument("--client-samples", type=int, default=2048)
+    parser.add_argument("--server-samples", type=int, default=960)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    results = {}
+    for _ in range(args.repeat):
+        for binary in [False, True]:
+            run = await session(args, binary)
+            best = results.get(binary)
+            if best is None or run["cpu_ms"] < best["cpu_ms"]:
+                results[binary] = run
+
+    print(
+        f"{args.seconds}s of audio each way, client chunks {args.client_samples} "
+        f"samples @16kHz, Gemini chunks {args.server_samples} samples @24kHz"
+    )
+    print(
+        f"{'mode':<8}{'browser MB':>12}{'gemini MB':>11}"
+        f"{'proxy CPU ms':>14}{'up ms':>9}{'down ms':>9}"
+    )
+    for binary, label in [(False, "json"), (True, "binary")]:
+        run = results[binary]
+        print(
+            f"{label:<8}{run['browser_bytes'] / 1e6:>12.2f}"
+            f"{run['gemini_bytes'] / 1e6:>11.2f}{run['cpu_ms']:>14.1f}"
+            f"{run['up_cpu_ms']:>9.1f}{run['down_cpu_ms']:>9.1f}"
+        )
+    json_run, binary_run = results[False], results[True]
+    print(
+        f"browser leg: {binary_run['browser_bytes'] / json_run['browser_bytes']:.1%} "
+        f"of the JSON bytes; proxy CPU {binary_run['cpu_ms'] - json_run['cpu_ms']:+.1f} ms "
+        f"per session"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Import throughput: one request per document vs the bulk endpoints.
+
+Imports --documents candidates and interview questions into a scratch job
+vacancy through a running API, first with one POST per document (at most
+--concurrency in flight) and then with the bulk endpoints as a JSON array
+and as NDJSON, ordered and unordered. The imported documents are removed
+after each run.
+
+Needs the API (and its MongoDB) running. Usage (from the server directory):
+    python -m benchmarks.bulk_import --documents 10000
+"""
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+
+import codec
+from database import close_client, get_db
+
+
+def candidates(count: int) -> list:
+    return [
+        {"name": f"Candidato {i}", "email": f"candidato{i}@example.com"}
+        for i in range(count)
+    ]
+
+
+def questions(count: int, job_vacancy_id: str) -> list:
+    return [
+        {
+            "question": f"Pergunta {i + 1}?",
+            "tag": f"pergunta_{i + 1}",
+            "job_vacancy_id": job_vacancy_id,
+        }
+        for i in range(count)
+    ]
+
+
+async def one_by_one(session, url: str, documents: list, concurrency: int) -> None:
+    slots = asyncio.Semaphore(concurrency)
+
+    async def post(document):
+        async with slots:
+            async with session.post(url, json=document) as response:
+                response.raise_for_status()
+
+    await asyncio.gather(*(post(document) for document in documents))
+
+
+async def bulk(session, url: str, documents: list, ndjson: bool, ordered: bool):
+    if ndjson:
+        body = b"\n".join(codec.dumps_bytes(document) for document in documents)
+        content_type = "application/x-ndjson"
+    else:
+        body = codec.dumps_bytes(documents)
+        content_type = "application/json"
+    async with session.post(
+        f"{url}/bulk",
+        data=body,
+        params={"ordered": "true" if ordered else "false"},
+        headers={"Content-Type": content_type},
+    ) as response:
+        response.raise_for_status()
+        result = await response.json()
+    if result["inserted_count"] != len(documents):
+        raise RuntimeError(
+            f"{len(result['errors'])} items failed: {result['errors'][:3]}"
+        )
+
+
+async def cleanup(job_vacancy_id: ObjectId) -> None:
+    db = get_db()
+    await db.candidates.delete_many({"job_vacancy_id": job_vacancy_id})
+    await db.interview_questions.delete_many({"job_vacancy_id": job_vacancy_id})
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://127.0.0.1:3001")
+    parser.add_argument("--documents", type=int, default=10000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    job_vacancy_id = ObjectId()
+    targets = {
+        "candidates": (
+            f"{args.api_url}/job_vacancies/{job_vacancy_id}/candidates",
+            candidates(args.documents),
+        ),
+        "questions": (
+            f"{args.api_url}/interview_questions",
+            questions(args.documents, str(job_vacancy_id)),
+        ),
+    }
+    modes = {
+        "one by one": lambda session, url, documents: one_by_one(
+            session, url, documents, args.concurrency
+        ),
+        "bulk json unordered": lambda session, url, documents: bulk(
+            session, url, documents, ndjson=False, ordered=False
+        ),
+        "bulk json ordered": lambda session, url, documents: bulk(
+            session, url, documents, ndjson=False, ordered=True
+        ),
+        "bulk ndjson unordered": lambda session, url, documents: bulk(
+            session, url, documents, ndjson=True, ordered=False
+        ),
+    }
+
+    print(f"{'collection':<12} {'mode':<22} {'seconds':>8} {'docs/s':>10}")
+    try:
+        async with aiohttp.ClientSession() as session:
+            for collection, (url, documents) in targets.items():
+                for mode, run in modes.items():
+                    start = time.perf_counter()
+                    await run(session, url, documents)
+                    elapsed = time.perf_counter() - start
+                    print(
+                        f"{collection:<12} {mode:<22} {elapsed:>8.2f} "
+                        f"{len(documents) / elapsed:>10.0f}"
+                    )
+                    await cleanup(job_vacancy_id)
+    finally:
+        await cleanup(job_vacancy_id)
+        await close_client()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main())
@@ -0,0 +1,198 @@
+"""
+Throughput/latency trade-off of coalescing client audio (audio_coalescer).
+
+For several recorder chunk sizes and COALESCE_MAX_MS caps, client audio is
+replayed through proxy.proxy_task (Client->Server, no VAD), from JSON
+messages or pcm16.v1 binary frames:
+
+- unpaced, into a real websocket connection to a sink in another process,
+  for the upstream message rate and the proxy process CPU per second of
+  audio (conversion, framing, masking and the send syscalls included)
+- paced in real time, for the delay coalescing adds to each chunk (from the
+  chunk's arrival to the send of the message that carries it)
+
+Usage (from the server directory):
+    python -m benchmarks.client_coalescing
+    python -m benchmarks.client_coalescing --chunks 160,320,2048 --caps 0,50,100
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import time
+
+import websockets
+
+import audio_coalescer
+import audio_frames
+from benchmarks.common import percentile
+from benchmarks.proxy_forwarding import client_audio_frame
+from proxy import proxy_task
+
+RATE = 16000
+SINK_PORT = 9021
+
+
+class PacedSource:
+    """Yields the same chunk `count` times, every `interval` seconds if paced."""
+
+    def __init__(self, message: str, count: int, interval: float = 0):
+        self.message = message
+        self.count = count
+        self.interval = interval
+        self.arrivals = []
+        self.start = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if len(self.arrivals) == self.count:
+            # Leave time for a timed flush of the last chunks
+            if self.interval:
+                await asyncio.sleep(0.5)
+            raise StopAsyncIteration
+        if self.interval:
+            if self.start is None:
+                self.start = time.perf_counter()
+            due = self.start + len(self.arrivals) * self.interval
+            await asyncio.sleep(max(0, due - time.perf_counter()))
+        self.arrivals.append(time.perf_counter())
+        return self.message
+
+
+class Upstream:
+    """Stands in for Gemini; records when and how much PCM each message had."""
+
+    def __init__(self, decode: bool):
+        self.decode = decode
+        self.messages = 0
+        self.bytes = 0
+        self.sends = []
+
+    async def send(self, message) -> None:
+        self.messages += 1
+        self.bytes += len(message)
+        if self.decode:
+            _, pcm = audio_frames.client_json_pcm(message)
+            self.sends.append((time.perf_counter(), len(pcm)))
+
+
+def run_sink(port: int) -> None:
+    async def discard(websocket):
+        async for _ in websocket:
+            pass
+
+    async def serve():
+        async with websockets.serve(discard, "127.0.0.1", port, max_size=None):
+            await asyncio.Future()
+
+    asyncio.run(serve())
+
+
+def chunk_message(samples: int, transport: str):
+    if transport == "binary":
+        return audio_frames.encode_frame(bytes(samples * 2), RATE)
+    return client_audio_frame(samples)
+
+
+def configure(cap_ms: int) -> None:
+    audio_coalescer.ENABLED = cap_ms > 0
+    os.environ["COALESCE_MAX_MS"] = str(cap_ms)
+
+
+class CountingSocket:
+    """Real websocket connection that counts what goes through it."""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.messages = 0
+        self.bytes = 0
+
+    async def send(self, message) -> None:
+        self.messages += 1
+        self.bytes += len(message)
+        await self.websocket.send(message)
+
+
+async def throughput(samples: int, cap_ms: int, seconds: float, transport: str) -> dict:
+    configure(cap_ms)
+    count = round(seconds * RATE / samples)
+    source = PacedSource(chunk_message(samples, transport), count)
+    async with websockets.connect(
+        f"ws://127.0.0.1:{SINK_PORT}", max_size=None, compression=None
+    ) as websocket:
+        upstream = CountingSocket(websocket)
+        start = time.process_time()
+        await proxy_task(
+            source, upstream, "Client->Server", binary=transport == "binary"
+        )
+        cpu = time.process_time() - start
+    return {
+        "messages_per_s": upstream.messages / seconds,
+        "cpu_ms_per_s": cpu * 1000 / seconds,
+        "bytes_per_s": upstream.bytes / seconds,
+    }
+
+
+async def latency(samples: int, cap_ms: int, seconds: float, transport: str) -> list:
+    """Added delay of every chunk, in milliseconds."""
+    configure(cap_ms)
+    count = round(seconds * RATE / samples)
+    source = PacedSource(chunk_message(samples, transport), count, samples / RATE)
+    upstream = Upstream(decode=True)
+    await proxy_task(source, upstream, "Client->Server", binary=transport == "binary")
+    delays, chunk = [], 0
+    for sent_at, size in upstream.sends:
+        for _ in range(size // (samples * 2)):
+            delays.append((sent_at - source.arrivals[chunk]) * 1000)
+            chunk += 1
+    return delays
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunks", default="160,320,640,2048", help="samples")
+    parser.add_argument("--caps", default="0,40,100,200", help="ms, 0 = off")
+    parser.add_argument("--transports", default="json,binary")
+    parser.add_argument("--seconds", type=float, default=600, help="unpaced audio")
+    parser.add_argument("--paced-seconds", type=float, default=3)
+    args = parser.parse_args()
+
+    sink = multiprocessing.Process(target=run_sink, args=(SINK_PORT,), daemon=True)
+    sink.start()
+    await asyncio.sleep(1)
+
+    print(
+        f"{'transport':<10}{'chunk':>7}{'cap':>6}{'msgs/s':>9}{'KB/s':>8}"
+        f"{'CPU ms/s':>10}{'delay p50':>11}{'p95':>8}{'max':>8}"
+    )
+    try:
+        for transport in args.transports.split(","):
+            for samples in [int(value) for value in args.chunks.split(",")]:
+                for cap_ms in [int(value) for value in args.caps.split(",")]:
+                    runs = [
+                        await throughput(samples, cap_ms, args.seconds, transport)
+                        for _ in range(3)
+                    ]
+                    best = min(runs, key=lambda run: run["cpu_ms_per_s"])
+                    delays = await latency(
+                        samples, cap_ms, args.paced_seconds, transport
+                    )
+                    print(
+                        f"{transport:<10}{samples * 1000 // RATE:>5}ms"
+                        f"{cap_ms or 'off':>6}{best['messages_per_s']:>9.1f}"
+                        f"{best['bytes_per_s'] / 1000:>8.1f}"
+                        f"{best['cpu_ms_per_s']:>10.3f}"
+                        f"{percentile(delays, 50):>9.1f}ms"
+                        f"{percentile(delays, 95):>6.1f}ms"
+                        f"{max(delays, default=0):>6.1f}ms"
+                    )
+    finally:
+        configure(0)
+        sink.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
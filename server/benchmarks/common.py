@@ -0,0 +1,21 @@
+"""Helpers shared by the benchmark scripts."""
+
+
+def percentile(values, pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def latency_summary(values_ms) -> str:
+    """Formats p50/p95/p99/max of a list of latencies in milliseconds."""
+    return (
+        f"p50={percentile(values_ms, 50):.2f}ms "
+        f"p95={percentile(values_ms, 95):.2f}ms "
+        f"p99={percentile(values_ms, 99):.2f}ms "
+        f"max={max(values_ms, default=0):.2f}ms "
+        f"n={len(values_ms)}"
+    )
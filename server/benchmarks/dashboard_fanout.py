@@ -0,0 +1,172 @@
+"""
+Job vacancy dashboard vs the per-candidate request fan-out.
+
+Seeds a job vacancy with --candidates candidates (each with an interview and
+a few responses) straight into the application database, then loads the
+same data through a running API in two ways:
+
+- fan-out: /job_vacancies/{id}, every page of /job_vacancies/{id}/candidates
+  and, for each candidate, /interviews/candidate/{id} and
+  /interview_responses/candidate/{id}, at most --concurrency requests at a
+  time (browsers open about 6 connections per host)
+- dashboard: every page of /job_vacancies/{id}/dashboard
+
+The seeded documents are removed at the end.
+
+Needs the API (and its MongoDB) running. Usage (from the server directory):
+    python -m benchmarks.dashboard_fanout --candidates 500
+"""
+
+import argparse
+import asyncio
+import random
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+
+from benchmarks.common import latency_summary
+from database import close_client, get_db
+
+
+async def seed(candidates: int, responses: int):
+    db = get_db()
+    job_vacancy_id = ObjectId()
+    candidate_ids = [ObjectId() for _ in range(candidates)]
+    start = datetime.utcnow() - timedelta(days=1)
+
+    await db.job_vacancies.insert_one(
+        {"_id": job_vacancy_id, "title": "Benchmark", "description": "dashboard"}
+    )
+    await db.candidates.insert_many(
+        [
+            {
+                "_id": candidate_id,
+                "job_vacancy_id": job_vacancy_id,
+                "name": f"Candidato {i}",
+                "email": f"candidato{i}@example.com",
+                "status": "initial",
+            }
+            for i, candidate_id in enumerate(candidate_ids)
+        ]
+    )
+    interviews = [
+        {
+            "_id": ObjectId(),
+            "candidate_id": candidate_id,
+            "job_vacancy_id": job_vacancy_id,
+            "status": random.choice(["in_progress", "completed"]),
+            "started_at": start,
+        }
+        for candidate_id in candidate_ids
+    ]
+    await db.interviews.insert_many(interviews)
+    await db.interview_responses.insert_many(
+        [
+            {
+                "interview_id": interview["_id"],
+                "candidate_id": interview["candidate_id"],
+                "job_vacancy_id": job_vacancy_id,
+                "tag": f"pergunta_{i + 1}",
+                "response": "Resposta do candidato",
+                "answered_at": start + timedelta(minutes=i),
+            }
+            for interview in interviews
+            for i in range(responses)
+        ]
+    )
+    return job_vacancy_id, candidate_ids
+
+
+async def cleanup(job_vacancy_id) -> None:
+    db = get_db()
+    await db.job_vacancies.delete_one({"_id": job_vacancy_id})
+    for collection in ["candidates", "interviews", "interview_responses"]:
+        await db[collection].delete_many({"job_vacancy_id": job_vacancy_id})
+
+
+async def fan_out(session, api_url: str, job_vacancy_id, concurrency: int) -> int:
+    slots = asyncio.Semaphore(concurrency)
+    requests = 0
+
+    async def get(path: str, **params) -> dict:
+        nonlocal requests
+        async with slots:
+            requests += 1
+            async with session.get(f"{api_url}{path}", params=params) as response:
+                response.raise_for_status()
+                return await response.json()
+
+    candidates, cursor = [], None
+    vacancy = asyncio.create_task(get(f"/job_vacancies/{job_vacancy_id}"))
+    while True:
+        params = {"cursor": cursor} if cursor else {}
+        page = await get(f"/job_vacancies/{job_vacancy_id}/candidates", **params)
+        candidates += page["candidates"]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    await vacancy
+
+    await asyncio.gather(
+        *(
+            get(f"{path}/{candidate['_id']}")
+            for candidate in candidates
+            for path in ["/interviews/candidate", "/interview_responses/candidate"]
+        )
+    )
+    return requests
+
+
+async def dashboard(session, api_url: str, job_vacancy_id) -> int:
+    requests, cursor = 0, None
+    while True:
+        params = {"cursor": cursor} if cursor else {}
+        async with session.get(
+            f"{api_url}/job_vacancies/{job_vacancy_id}/dashboard", params=params
+        ) as response:
+            response.raise_for_status()
+            page = await response.json()
+        requests += 1
+        cursor = page["next_cursor"]
+        if not cursor:
+            return requests
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--api-url", default="http://127.0.0.1:3001")
+    parser.add_argument("--candidates", type=int, default=500)
+    parser.add_argument("--responses", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    job_vacancy_id, _ = await seed(args.candidates, args.responses)
+    try:
+        async with aiohttp.ClientSession() as session:
+            for name, load in [
+                (
+                    "fan-out",
+                    lambda: fan_out(
+                        session, args.api_url, job_vacancy_id, args.concurrency
+                    ),
+                ),
+                ("dashboard", lambda: dashboard(session, args.api_url, job_vacancy_id)),
+            ]:
+                latencies = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    requests = await load()
+                    latencies.append((time.perf_counter() - start) * 1000)
+                print(f"{name:<10} requests={requests:<6} {latency_summary(latencies)}")
+    finally:
+        await cleanup(job_vacancy_id)
+        await close_client()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main())
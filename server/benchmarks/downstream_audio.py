@@ -0,0 +1,191 @@
+"""
+Egress bytes and proxy CPU of transcoding Gemini's audio (downstream_audio).
+
+For every output format (encoding and sample rate) an interview's worth of
+Gemini audio messages is replayed through proxy.proxy_task (Server->Client)
+with the session's DownstreamAudio, in JSON and pcm16.v1 binary mode:
+
+- egress: bytes sent to the browser per interview, WebSocket framing
+  included, and against Gemini's own 24 kHz PCM16 in the same transport
+- CPU: proxy CPU per second of Gemini audio, and the number of concurrent
+  sessions one core could keep transcoding in real time; measured with
+  --concurrency sessions replayed at once in the event loop
+
+Audio quality is sanity checked on a 1 kHz tone: the output is fitted to a
+sine at the output rate and the residual reported as SNR.
+
+Usage (from the server directory):
+    python -m benchmarks.downstream_audio
+    python -m benchmarks.downstream_audio --seconds 300 --concurrency 1,20
+"""
+
+import argparse
+import asyncio
+import base64
+import time
+
+import numpy as np
+
+import codec
+import downstream_audio
+from benchmarks.binary_transport import CountingTarget
+from benchmarks.metrics_overhead import FrameSource
+from downstream_audio import DownstreamAudio
+from proxy import proxy_task
+
+RATE = 24000
+FORMATS = [
+    ("pcm16", 24000),
+    ("pcm16", 16000),
+    ("pcm16", 8000),
+    ("mulaw", 24000),
+    ("mulaw", 16000),
+    ("mulaw", 8000),
+    ("opus", 16000),
+    ("opus", 8000),
+]
+
+
+def speech_like(samples: int, seed: int = 0) -> np.ndarray:
+    """Voiced sound at 24 kHz: a few harmonics and a little noise."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(samples) / RATE
+    sound = sum(np.sin(2 * np.pi * 140 * h * t) / h for h in range(1, 12))
+    sound = sound / np.abs(sound).max() * 8000 + rng.normal(0, 300, samples)
+    return np.clip(sound, -32768, 32767).astype("<i2")
+
+
+def gemini_message(pcm: np.ndarray) -> str:
+    return codec.dumps(
+        {
+            "serverContent": {
+                "modelTurn": {
+                    "parts": [
+                        {
+                            "inlineData": {
+                                "mimeType": f"audio/pcm;rate={RATE}",
+                                "data": base64.b64encode(pcm.tobytes()).decode("ascii"),
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+    )
+
+
+async def replay(message: str, frames: int, output, binary: bool):
+    """One session; returns the counting target."""
+    interview_state = {"downstream": output}
+    target = CountingTarget(masked=False)
+    await proxy_task(
+        FrameSource(message, frames),
+        target,
+        "Server->Client",
+        interview_state=interview_state,
+        binary=binary,
+    )
+    return target
+
+
+async def measure(args, encoding: str, sample_rate: int, binary: bool, sessions: int):
+    message = gemini_message(speech_like(args.chunk))
+    frames = round(args.seconds * RATE / args.chunk)
+    outputs = [
+        DownstreamAudio.negotiate({"encoding": encoding, "sample_rate": sample_rate})
+        for _ in range(sessions)
+    ]
+    start = time.process_time()
+    targets = await asyncio.gather(
+        *[replay(message, frames, output, binary) for output in outputs]
+    )
+    cpu = time.process_time() - start
+    return {
+        "bytes": targets[0].bytes,
+        "cpu_ms_per_s": cpu * 1000 / (args.seconds * sessions),
+    }
+
+
+def tone_snr(encoding: str, sample_rate: int) -> float:
+    """SNR in dB of a 1 kHz tone through the transcoder (None for Opus)."""
+    if encoding == "opus":
+        return None
+    output = DownstreamAudio(encoding, sample_rate)
+    tone = (np.sin(2 * np.pi * 1000 * np.arange(RATE * 2) / RATE) * 10000).astype("<i2")
+    payload = b"".join(
+        output.transcode(tone[start : start + 960].tobytes(), RATE)
+        for start in range(0, len(tone), 960)
+    )
+    if encoding == "mulaw":
+        # Decoded value of a code: the mean of the int16 values it stands for
+        values = np.arange(-32768, 32768)
+        sums = np.bincount(downstream_audio.MULAW, weights=values, minlength=256)
+        counts = np.bincount(downstream_audio.MULAW, minlength=256)
+        decode = sums / np.maximum(counts, 1)
+        received = decode[np.frombuffer(payload, dtype=np.uint8)]
+    else:
+        received = np.frombuffer(payload, dtype="<i2").astype(np.float64)
+    # Filter delay and edges left out
+    received = received[sample_rate // 10 : -sample_rate // 10]
+    t = np.arange(len(received)) / sample_rate
+    basis = np.stack(
+        [np.sin(2 * np.pi * 1000 * t), np.cos(2 * np.pi * 1000 * t), np.ones_like(t)],
+        axis=1,
+    )
+    fitted = basis @ np.linalg.lstsq(basis, received, rcond=None)[0]
+    noise = np.mean((received - fitted) ** 2)
+    return 10 * np.log10(np.mean(fitted**2) / max(noise, 1e-12))
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--seconds", type=float, default=300, help="Gemini audio per interview"
+    )
+    parser.add_argument("--chunk", type=int, default=960, help="samples @24kHz")
+    parser.add_argument("--concurrency", default="1,20", help="sessions at once")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    available = downstream_audio.available_encodings()
+    levels = [int(value) for value in args.concurrency.split(",")]
+    print(
+        f"{args.seconds:.0f}s of Gemini audio per interview, chunks of "
+        f"{args.chunk} samples @24kHz; opus "
+        f"{'available' if 'opus' in available else 'not installed, skipped'}"
+    )
+    print(
+        f"{'transport':<10}{'format':<14}{'MB/interview':>13}{'vs 24k':>8}"
+        + "".join(f"{f'CPU ms/s x{n}':>15}" for n in levels)
+        + f"{'sessions/core':>15}{'SNR dB':>8}"
+    )
+    for binary, transport in [(False, "json"), (True, "binary")]:
+        baseline = None
+        for encoding, sample_rate in FORMATS:
+            if encoding not in available:
+                continue
+            runs = {}
+            for sessions in levels:
+                runs[sessions] = min(
+                    [
+                        await measure(args, encoding, sample_rate, binary, sessions)
+                        for _ in range(args.repeat)
+                    ],
+                    key=lambda run: run["cpu_ms_per_s"],
+                )
+            egress = runs[levels[0]]["bytes"]
+            if baseline is None:
+                baseline = egress
+            worst = max(run["cpu_ms_per_s"] for run in runs.values())
+            snr = tone_snr(encoding, sample_rate)
+            print(
+                f"{transport:<10}{f'{encoding}/{sample_rate // 1000}k':<14}"
+                f"{egress / 1e6:>13.2f}{egress / baseline:>8.1%}"
+                + "".join(f"{runs[n]['cpu_ms_per_s']:>15.3f}" for n in levels)
+                + f"{1000 / worst:>15.0f}"
+                + (f"{snr:>8.1f}" if snr is not None else f"{'-':>8}")
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
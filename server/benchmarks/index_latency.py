@@ -0,0 +1,190 @@
+"""
+Query latency with and without the registered indexes.
+
+Fills a scratch database with --documents interview responses and questions
+asked (plus proportional interviews, candidates, questions and sessions),
+then times every query of indexes.QUERIES first with only the _id indexes
+and again after indexes.ensure_indexes(). Equality values of each query are
+taken from a random document, so the queries hit real data.
+
+Needs MongoDB at MONGODB_URI. Usage (from the server directory):
+    python -m benchmarks.index_latency --documents 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient
+
+from benchmarks.common import percentile
+from indexes import INDEXES, QUERIES, ensure_indexes, explain_queries
+
+
+async def insert(collection, documents) -> None:
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+
+
+async def fill(db, documents: int) -> None:
+    for collection in INDEXES:
+        await db[collection].drop()
+
+    start = datetime(2023, 12, 1)
+    job_vacancies = [ObjectId() for _ in range(100)]
+    candidates = [ObjectId() for _ in range(max(1, documents // 10))]
+    interviews = [ObjectId() for _ in range(max(1, documents // 10))]
+
+    def ids():
+        return {
+            "interview_id": random.choice(interviews),
+            "candidate_id": random.choice(candidates),
+            "job_vacancy_id": random.choice(job_vacancies),
+        }
+
+    await insert(
+        db.interview_responses,
+        (
+            {
+                **ids(),
+                "tag": f"pergunta_{i % 10 + 1}",
+                "response": "Resposta do candidato " * 10,
+                "answered_at": start + timedelta(seconds=i * 10),
+            }
+            for i in range(documents)
+        ),
+    )
+    await insert(
+        db.interview_questions_asked,
+        (
+            {
+                **ids(),
+                "question": "Pergunta feita ao candidato",
+                "question_number": i % 10 + 1,
+                "asked_at": start + timedelta(seconds=i * 10),
+            }
+            for i in range(documents)
+        ),
+    )
+    await insert(
+        db.interviews,
+        (
+            {
+                "_id": interview,
+                "candidate_id": random.choice(candidates),
+                "job_vacancy_id": random.choice(job_vacancies),
+                "status": "completed",
+                "started_at": start + timedelta(minutes=i),
+            }
+            for i, interview in enumerate(interviews)
+        ),
+    )
+    await insert(
+        db.candidates,
+        (
+            {"_id": candidate, "job_vacancy_id": random.choice(job_vacancies)}
+            for candidate in candidates
+        ),
+    )
+    await insert(
+        db.interview_questions,
+        (
+            {
+                "job_vacancy_id": job_vacancy,
+                "question": f"Pergunta {i + 1}",
+                "tag": f"pergunta_{i + 1}",
+                "active": i < 8,
+            }
+            for job_vacancy in job_vacancies
+            for i in range(10)
+        ),
+    )
+    await insert(
+        db.active_sessions,
+        (
+            {
+                "_id": f"session-{i}",
+                "worker_id": f"worker-{i % 8}",
+                "expires_at": datetime(2024, 1, 1) + timedelta(seconds=i - 500),
+            }
+            for i in range(1000)
+        ),
+    )
+
+
+async def bind(db, query: dict) -> dict:
+    """The query filter with equality values from a random document."""
+    sample = await db[query["collection"]].aggregate([{"$sample": {"size": 1}}])
+    sample = (await sample.to_list(None) or [{}])[0]
+    return {
+        key: sample.get(key, value) if not isinstance(value, dict) else value
+        for key, value in query["filter"].items()
+    }
+
+
+async def time_queries(db, repeat: int, limit: int) -> dict:
+    timings = {}
+    for query in QUERIES:
+        latencies = []
+        for _ in range(repeat):
+            cursor = db[query["collection"]].find(await bind(db, query))
+            if query.get("sort"):
+                cursor = cursor.sort(query["sort"])
+            start = time.perf_counter()
+            await cursor.limit(limit).to_list(None)
+            latencies.append((time.perf_counter() - start) * 1000)
+        timings[query["name"]] = latencies
+    return timings
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--database", default="hr_conversational_ai_bench")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--reuse", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncMongoClient(os.environ.get("MONGODB_URI"))
+    db = client[args.database]
+    if not args.reuse:
+        print(f"Inserting {args.documents} documents per collection...")
+        await fill(db, args.documents)
+
+    for collection in INDEXES:
+        await db[collection].drop_indexes()
+    before = await time_queries(db, args.repeat, args.limit)
+
+    await ensure_indexes(db)
+    after = await time_queries(db, args.repeat, args.limit)
+    plans = {entry["name"]: entry for entry in await explain_queries(db)}
+
+    print(
+        f"{'query':<42} {'p50 before':>11} {'p50 after':>10} "
+        f"{'p99 before':>11} {'p99 after':>10}  plan"
+    )
+    for query in QUERIES:
+        name = query["name"]
+        print(
+            f"{name:<42} {percentile(before[name], 50):>9.2f}ms "
+            f"{percentile(after[name], 50):>8.2f}ms "
+            f"{percentile(before[name], 99):>9.2f}ms "
+            f"{percentile(after[name], 99):>8.2f}ms  "
+            f"{' <- '.join(plans[name]['stages'])}"
+        )
+    await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
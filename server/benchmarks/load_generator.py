@@ -0,0 +1,194 @@
+"""
+End-to-end load generator for the /ws endpoint.
+
+Opens N concurrent simulated candidates that authenticate, send the setup
+for a job vacancy and stream 16 kHz PCM in 128 ms chunks, like the browser
+does. Run the proxy against mock_gemini.py in echo mode so every chunk comes
+back as model audio; each chunk carries its send time in its first bytes,
+which gives the round-trip forwarding latency through the proxy (both
+directions plus the mock).
+
+    python mock_gemini.py --mode echo --port 9000
+    GEMINI_SERVICE_URL=ws://127.0.0.1:9000/ws uvicorn server:app --port 3001
+    python -m benchmarks.load_generator --sessions 50 --server-pid <uvicorn pid>
+
+--seed creates questions for a fresh job vacancy through the REST API.
+--server-pid reports the CPU used by the server per session (Linux only).
+--find-max doubles the number of sessions until the p99 latency exceeds
+--p99-budget-ms or sessions start failing, and reports the last good step
+as the maximum sessions per worker.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import struct
+import time
+
+import aiohttp
+import websockets
+from bson.objectid import ObjectId
+
+from benchmarks.common import latency_summary, percentile
+
+CHUNK_SAMPLES = 2048
+CHUNK_SECONDS = CHUNK_SAMPLES / 16000
+MAGIC = b"LGEN"
+
+
+def timestamped_chunk() -> str:
+    """Random PCM whose first 12 bytes carry a marker and the send time."""
+    pcm = MAGIC + struct.pack("<d", time.perf_counter())
+    pcm += os.urandom(CHUNK_SAMPLES * 2 - len(pcm))
+    return json.dumps(
+        {
+            "realtime_input": {
+                "media_chunks": [
+                    {
+                        "mime_type": "audio/pcm",
+                        "data": base64.b64encode(pcm).decode("ascii"),
+                    }
+                ]
+            }
+        }
+    )
+
+
+def process_cpu_seconds(pid: int) -> float:
+    """utime + stime of a process, read from /proc."""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+async def seed_job_vacancy(api_url: str, questions: int) -> str:
+    job_vacancy_id = str(ObjectId())
+    async with aiohttp.ClientSession() as session:
+        for i in range(questions):
+            async with session.post(
+                f"{api_url}/interview_questions",
+                json={
+                    "question": f"Pergunta de carga {i + 1}",
+                    "tag": f"carga_{i + 1}",
+                    "job_vacancy_id": job_vacancy_id,
+                },
+            ) as response:
+                response.raise_for_status()
+    return job_vacancy_id
+
+
+async def candidate(url: str, job_vacancy_id: str, seconds: float, result: dict):
+    """One simulated interview; appends latencies to result."""
+    try:
+        async with websockets.connect(url, max_size=None) as websocket:
+            await websocket.recv()  # authComplete
+            await websocket.send(
+                json.dumps(
+                    {
+                        "setup": {
+                            "job_vacancy_id": job_vacancy_id,
+                            "job_candidate_id": str(ObjectId()),
+                        }
+                    }
+                )
+            )
+
+            async def receive():
+                async for message in websocket:
+                    if "inlineData" not in message:
+                        continue
+                    data = json.loads(message)["serverContent"]["modelTurn"]
+                    pcm = base64.b64decode(data["parts"][0]["inlineData"]["data"])
+                    if pcm[:4] == MAGIC:
+                        sent_at = struct.unpack("<d", pcm[4:12])[0]
+                        result["latencies"].append(
+                            (time.perf_counter() - sent_at) * 1000
+                        )
+
+            receiving = asyncio.create_task(receive())
+            next_at = time.perf_counter()
+            end = next_at + seconds
+            while time.perf_counter() < end:
+                await websocket.send(timestamped_chunk())
+                result["sent"] += 1
+                next_at += CHUNK_SECONDS
+                await asyncio.sleep(max(0, next_at - time.perf_counter()))
+            # Give the last chunks time to come back
+            await asyncio.sleep(0.5)
+            receiving.cancel()
+            result["completed"] += 1
+    except Exception as e:
+        result["errors"].append(repr(e))
+
+
+async def run_step(args, job_vacancy_id: str, sessions: int) -> dict:
+    result = {"latencies": [], "sent": 0, "completed": 0, "errors": []}
+    cpu_before = process_cpu_seconds(args.server_pid) if args.server_pid else None
+    start = time.perf_counter()
+
+    tasks = []
+    for _ in range(sessions):
+        tasks.append(
+            asyncio.create_task(
+                candidate(args.url, job_vacancy_id, args.seconds, result)
+            )
+        )
+        await asyncio.sleep(args.ramp / max(sessions, 1))
+    await asyncio.gather(*tasks)
+
+    elapsed = time.perf_counter() - start
+    latencies = result["latencies"]
+    print(
+        f"sessions={sessions} completed={result['completed']} "
+        f"errors={len(result['errors'])} sent={result['sent']} "
+        f"echoed={len(latencies)}"
+    )
+    print(f"  forwarding round trip {latency_summary(latencies)}")
+    if cpu_before is not None:
+        cpu = process_cpu_seconds(args.server_pid) - cpu_before
+        print(
+            f"  server CPU {cpu / elapsed * 100:.1f}% of a core, "
+            f"{cpu / elapsed / sessions * 1000:.2f} ms CPU per session-second"
+        )
+    if result["errors"]:
+        print(f"  first error: {result['errors'][0]}")
+    result["p99"] = percentile(latencies, 99)
+    return result
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="ws://127.0.0.1:3001/ws")
+    parser.add_argument("--api-url", default="http://127.0.0.1:3001")
+    parser.add_argument("--job-vacancy-id", default=None)
+    parser.add_argument("--seed", type=int, default=3, help="questions to create")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--ramp", type=float, default=2.0)
+    parser.add_argument("--server-pid", type=int, default=None)
+    parser.add_argument("--find-max", action="store_true")
+    parser.add_argument("--p99-budget-ms", type=float, default=150)
+    args = parser.parse_args()
+
+    job_vacancy_id = args.job_vacancy_id or await seed_job_vacancy(
+        args.api_url, args.seed
+    )
+
+    if not args.find_max:
+        await run_step(args, job_vacancy_id, args.sessions)
+        return
+
+    sessions, best = args.sessions, 0
+    while True:
+        result = await run_step(args, job_vacancy_id, sessions)
+        if result["errors"] or result["p99"] > args.p99_budget_ms:
+            break
+        best = sessions
+        sessions *= 2
+    print(f"max sessions per worker within p99 {args.p99_budget_ms}ms: {best}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,127 @@
+"""
+Cost of the metrics instrumentation.
+
+- primitives: ns per counter increment and histogram observation
+- proxy: CPU per forwarded audio frame through proxy.proxy_task with the
+  per-frame metrics on and off (metrics.ENABLED)
+- REST: CPU per request of a trivial route with and without
+  metrics.RequestMetricsMiddleware, through an in-process ASGI transport
+
+Usage (from the server directory):
+    python -m benchmarks.metrics_overhead
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+import metrics
+from benchmarks.proxy_forwarding import client_audio_frame
+from proxy import proxy_task
+
+
+class FrameSource:
+    """Async iterator over the same frame, standing in for a websocket."""
+
+    def __init__(self, message: str, count: int):
+        self.message = message
+        self.count = count
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.count == 0:
+            raise StopAsyncIteration
+        self.count -= 1
+        return self.message
+
+
+class NullTarget:
+    async def send(self, message) -> None:
+        pass
+
+
+def primitives(iterations: int) -> None:
+    counter = metrics.Counter("bench_total", "bench", ["direction"]).labels("a")
+    histogram = metrics.Histogram(
+        "bench_seconds", "bench", ["direction"], metrics.FRAME_BUCKETS
+    ).labels("a")
+    for name, operation in [
+        ("counter inc", lambda: counter.inc()),
+        ("histogram observe", lambda: histogram.observe(0.0003)),
+        ("perf_counter", time.perf_counter),
+    ]:
+        start = time.perf_counter_ns()
+        for _ in range(iterations):
+            operation()
+        elapsed = (time.perf_counter_ns() - start) / iterations
+        print(f"{name:<20} {elapsed:>8.0f} ns")
+
+
+async def proxy_frames(frames: int) -> None:
+    message = client_audio_frame(2048)
+    results = {}
+    for enabled in [False, True, False, True]:
+        metrics.ENABLED = enabled
+        source = FrameSource(message, frames)
+        start = time.process_time()
+        await proxy_task(source, NullTarget(), "Client->Server")
+        results.setdefault(enabled, []).append(
+            (time.process_time() - start) / frames * 1_000_000
+        )
+    off, on = min(results[False]), min(results[True])
+    print(
+        f"proxy frame          off={off:.2f}us on={on:.2f}us "
+        f"overhead={on - off:.2f}us ({(on - off) / off * 100:.1f}%)"
+    )
+
+
+async def rest_requests(requests: int) -> None:
+    def build(instrumented: bool) -> FastAPI:
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {"item_id": item_id}
+
+        if instrumented:
+            app.add_middleware(metrics.RequestMetricsMiddleware)
+        return app
+
+    results = {}
+    for instrumented in [False, True, False, True]:
+        transport = httpx.ASGITransport(app=build(instrumented))
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://x"
+        ) as client:
+            start = time.process_time()
+            for i in range(requests):
+                await client.get(f"/items/{i}")
+            results.setdefault(instrumented, []).append(
+                (time.process_time() - start) / requests * 1_000_000
+            )
+    off, on = min(results[False]), min(results[True])
+    print(
+        f"REST request         off={off:.1f}us on={on:.1f}us "
+        f"overhead={on - off:.1f}us ({(on - off) / off * 100:.1f}%)"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=1_000_000)
+    parser.add_argument("--frames", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    primitives(args.iterations)
+    await proxy_frames(args.frames)
+    await rest_requests(args.requests)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,178 @@
+"""
+Multi-worker session scaling benchmark.
+
+For each worker count W it starts mock_gemini.py (echo mode, one process
+per worker sharing the port), uvicorn with --workers W and the mongo
+session registry, then runs W load generator processes with --sessions
+candidates each, so the load grows with the number of workers. With
+near-linear scaling the forwarding latency and the CPU per session stay
+flat while the total number of sessions grows W times. The global session
+count reported by /health_check during the run shows that every worker
+sees the sessions of the others.
+
+Needs MongoDB at MONGODB_URI (the questions and active_sessions live there).
+
+Usage (from the server directory):
+    python -m benchmarks.multi_worker_scaling --workers 1 2 4 --sessions 50
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import subprocess
+import sys
+import time
+
+import aiohttp
+
+from benchmarks.common import latency_summary
+from benchmarks.load_generator import process_cpu_seconds, run_step, seed_job_vacancy
+
+MOCK_SCRIPT = """
+import asyncio, sys, websockets
+from mock_gemini import MockGemini
+
+async def main():
+    async with websockets.serve(
+        MockGemini(mode="echo").handler,
+        "127.0.0.1",
+        int(sys.argv[1]),
+        max_size=None,
+        reuse_port=True,
+    ):
+        await asyncio.Future()
+
+asyncio.run(main())
+"""
+
+
+def tree_cpu_seconds(pid: int) -> float:
+    """CPU of a process and its direct children (the uvicorn workers)."""
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        children = [int(child) for child in f.read().split()]
+    total = process_cpu_seconds(pid)
+    for child in children:
+        try:
+            total += process_cpu_seconds(child)
+        except FileNotFoundError:
+            pass
+    return total
+
+
+def client_process(args, job_vacancy_id: str) -> dict:
+    """Runs one load generator step in its own process."""
+    result = asyncio.run(run_step(args, job_vacancy_id, args.sessions))
+    return {"latencies": result["latencies"], "errors": len(result["errors"])}
+
+
+async def wait_until_ready(api_url: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        for _ in range(100):
+            try:
+                async with session.get(f"{api_url}/health_check") as response:
+                    return await response.json()
+            except aiohttp.ClientError:
+                await asyncio.sleep(0.2)
+    raise RuntimeError("Server did not start")
+
+
+async def sample_global_sessions(api_url: str, delay: float) -> int:
+    await asyncio.sleep(delay)
+    health = await wait_until_ready(api_url)
+    return health["sessions"]["global_sessions"]
+
+
+def run_workers(workers: int, args) -> dict:
+    env = {
+        **os.environ,
+        "GEMINI_SERVICE_URL": f"ws://127.0.0.1:{args.mock_port}/ws",
+        "GEMINI_API_KEY": os.environ.get("GEMINI_API_KEY", "benchmark"),
+        "SESSION_REGISTRY": "mongo",
+    }
+    mocks = [
+        subprocess.Popen([sys.executable, "-c", MOCK_SCRIPT, str(args.mock_port)])
+        for _ in range(workers)
+    ]
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "server:app",
+            "--port",
+            str(args.port),
+            "--workers",
+            str(workers),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        api_url = f"http://127.0.0.1:{args.port}"
+        asyncio.run(wait_until_ready(api_url))
+        job_vacancy_id = asyncio.run(seed_job_vacancy(api_url, 3))
+
+        client_args = argparse.Namespace(
+            url=f"ws://127.0.0.1:{args.port}/ws",
+            seconds=args.seconds,
+            ramp=args.ramp,
+            sessions=args.sessions,
+            server_pid=None,
+        )
+
+        cpu_before = tree_cpu_seconds(server.pid)
+        start = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            pending = pool.starmap_async(
+                client_process, [(client_args, job_vacancy_id)] * workers
+            )
+            global_sessions = asyncio.run(
+                sample_global_sessions(api_url, args.ramp + args.seconds / 2)
+            )
+            results = pending.get()
+        elapsed = time.perf_counter() - start
+        cpu = tree_cpu_seconds(server.pid) - cpu_before
+    finally:
+        server.terminate()
+        server.wait()
+        for mock in mocks:
+            mock.terminate()
+            mock.wait()
+
+    sessions = workers * args.sessions
+    latencies = [latency for result in results for latency in result["latencies"]]
+    return {
+        "sessions": sessions,
+        "global_sessions": global_sessions,
+        "errors": sum(result["errors"] for result in results),
+        "latency": latency_summary(latencies),
+        "cpu_per_session_ms": cpu / elapsed / sessions * 1000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--sessions", type=int, default=50, help="per worker")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--ramp", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=3101)
+    parser.add_argument("--mock-port", type=int, default=9101)
+    args = parser.parse_args()
+
+    for workers in args.workers:
+        result = run_workers(workers, args)
+        print(
+            f"workers={workers} sessions={result['sessions']} "
+            f"seen_by_registry={result['global_sessions']} "
+            f"errors={result['errors']}"
+        )
+        print(f"  forwarding round trip {result['latency']}")
+        print(f"  server CPU {result['cpu_per_session_ms']:.2f} ms per session-second")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Full-collection listing vs keyset pagination at 1M documents.
+
+Fills interview_responses in a scratch database with --documents answers
+(once; rerun with --reuse to skip the insert) and compares:
+
+- the old listing: find().sort(answered_at).to_list(None), i.e. the whole
+  collection decoded and serialized for one request
+- the first page and a page --depth pages deep with pagination.paginate,
+  with and without a ?fields= projection
+
+Peak Python memory comes from tracemalloc and response size from the codec.
+
+Needs MongoDB at MONGODB_URI. Usage (from the server directory):
+    python -m benchmarks.pagination_1m --documents 1000000
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient
+
+import codec
+from pagination import paginate
+
+
+async def fill(collection, documents: int) -> None:
+    await collection.drop()
+    start = datetime(2024, 1, 1)
+    batch = []
+    for i in range(documents):
+        batch.append(
+            {
+                "interview_id": ObjectId(),
+                "candidate_id": ObjectId(),
+                "job_vacancy_id": ObjectId(),
+                "tag": f"pergunta_{i % 10}",
+                "response": "Resposta do candidato " * 10,
+                "answered_at": start + timedelta(seconds=i),
+            }
+        )
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    await collection.create_index([("answered_at", -1), ("_id", -1)])
+
+
+async def measure(label: str, run) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    documents = await run()
+    body = codec.dumps_bytes({"interview_responses": documents})
+    elapsed = (time.perf_counter() - start) * 1000
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<32} {elapsed:>10.1f}ms  docs={len(documents):<8} "
+        f"body={len(body) / 1e6:>8.2f}MB  peak={peak / 1e6:>8.1f}MB"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--documents", type=int, default=1_000_000)
+    parser.add_argument("--database", default="hr_conversational_ai_bench")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=1000)
+    parser.add_argument("--reuse", action="store_true")
+    parser.add_argument("--skip-full", action="store_true")
+    args = parser.parse_args()
+
+    client = AsyncMongoClient(os.environ.get("MONGODB_URI"))
+    collection = client[args.database].interview_responses
+    if not args.reuse:
+        print(f"Inserting {args.documents} documents...")
+        await fill(collection, args.documents)
+
+    if not args.skip_full:
+        await measure(
+            "full listing (before)",
+            lambda: collection.find({}).sort("answered_at", -1).to_list(None),
+        )
+
+    async def page(fields=None):
+        documents, _ = await paginate(
+            collection, {}, "answered_at", -1, limit=args.limit, fields=fields
+        )
+        return documents
+
+    await measure("first page", page)
+    await measure("first page, fields=tag", lambda: page("tag"))
+
+    # Walk to a deep page; only the last request is measured
+    cursor = None
+    for _ in range(args.depth - 1):
+        _, cursor = await paginate(
+            collection,
+            {},
+            "answered_at",
+            -1,
+            cursor=cursor,
+            limit=args.limit,
+            fields="_id",
+        )
+
+    async def deep_page():
+        documents, _ = await paginate(
+            collection, {}, "answered_at", -1, cursor=cursor, limit=args.limit
+        )
+        return documents
+
+    await measure(f"page {args.depth}", deep_page)
+    await client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
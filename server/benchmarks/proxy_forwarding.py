@@ -0,0 +1,101 @@
+"""
+Per-frame CPU cost of the proxy forwarding path.
+
+Compares the old behaviour (json.loads + json.dumps on every frame) with the
+raw-text sniffing done by proxy.is_passthrough, using audio frames shaped like
+the ones the browser and Gemini actually exchange.
+
+Usage (from the server directory):
+    python -m benchmarks.proxy_forwarding
+"""
+
+import base64
+import json
+import os
+import time
+
+from proxy import is_passthrough
+
+ITERATIONS = 2000
+
+
+def client_audio_frame(samples: int) -> str:
+    """16 kHz PCM chunk as sent by web/src/helpers/geminiLiveAPI.js"""
+    pcm = os.urandom(samples * 2)
+    return json.dumps(
+        {
+            "realtime_input": {
+                "media_chunks": [
+                    {
+                        "mime_type": "audio/pcm",
+                        "data": base64.b64encode(pcm).decode("ascii"),
+                    }
+                ]
+            }
+        }
+    )
+
+
+def server_audio_frame(samples: int) -> str:
+    """24 kHz PCM chunk as sent by Gemini inside serverContent"""
+    pcm = os.urandom(samples * 2)
+    return json.dumps(
+        {
+            "serverContent": {
+                "modelTurn": {
+                    "parts": [
+                        {
+                            "inlineData": {
+                                "mimeType": "audio/pcm;rate=24000",
+                                "data": base64.b64encode(pcm).decode("ascii"),
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+    )
+
+
+def old_path(message: str, name: str) -> str:
+    data = json.loads(message)
+    if "setup" in data or "toolCall" in data:
+        pass
+    return json.dumps(data)
+
+
+def new_path(message: str, name: str) -> str:
+    if is_passthrough(message, name):
+        return message
+    return old_path(message, name)
+
+
+def measure(fn, message: str, name: str) -> float:
+    """Returns the CPU time per frame in microseconds."""
+    start = time.process_time()
+    for _ in range(ITERATIONS):
+        fn(message, name)
+    return (time.process_time() - start) / ITERATIONS * 1_000_000
+
+
+def main() -> None:
+    cases = [
+        ("Client->Server", "16 kHz 2048 samples (128 ms)", client_audio_frame(2048)),
+        ("Client->Server", "16 kHz 4096 samples (256 ms)", client_audio_frame(4096)),
+        ("Server->Client", "24 kHz 960 samples (40 ms)", server_audio_frame(960)),
+        ("Server->Client", "24 kHz 3840 samples (160 ms)", server_audio_frame(3840)),
+    ]
+
+    print(
+        f"{'direction':<16}{'frame':<32}{'bytes':>8}{'old us':>10}{'new us':>10}{'speedup':>9}"
+    )
+    for name, label, message in cases:
+        old = measure(old_path, message, name)
+        new = measure(new_path, message, name)
+        print(
+            f"{name:<16}{label:<32}{len(message):>8}{old:>10.2f}{new:>10.2f}{old / new:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
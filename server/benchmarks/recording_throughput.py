@@ -0,0 +1,149 @@
+"""
+Disk throughput of interview recording (recorder.py) with many sessions.
+
+--sessions concurrent sessions tee audio exactly as the proxy does: the
+candidate's pcm16.v1 frames (2048 samples @16kHz) and Gemini's JSON audio
+messages (960 samples @24kHz), both continuously, which is more than a real
+interview where they take turns. Audio is produced --speedup times faster
+than real time, to find where the writer pool stops keeping up.
+
+Reported per run: PCM written to disk per second, frames dropped because a
+session's buffer was full, average write batch time, the cost of a tee()
+call on the event loop and the event loop lag (how late a 10 ms timer
+fires), next to the same load with recording off.
+
+Usage (from the server directory):
+    python -m benchmarks.recording_throughput
+    python -m benchmarks.recording_throughput --sessions 200 --speedup 1,4,16
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import time
+
+import audio_frames
+import recorder as recorder_module
+from benchmarks.common import percentile
+from benchmarks.proxy_forwarding import server_audio_frame
+
+CLIENT_SAMPLES = 2048
+SERVER_SAMPLES = 960
+
+
+async def loop_lag(samples: list, stop: asyncio.Event) -> None:
+    """How late a 10 ms sleep wakes up, in milliseconds."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        samples.append((time.perf_counter() - start - 0.01) * 1000)
+
+
+async def session(recording, seconds: float, speedup: float, tee_times: list):
+    client_frame = audio_frames.encode_frame(
+        os.urandom(CLIENT_SAMPLES * 2), audio_frames.CLIENT_RATE
+    )
+    server_message = server_audio_frame(SERVER_SAMPLES)
+    client_interval = CLIENT_SAMPLES / 16000 / speedup
+    server_interval = SERVER_SAMPLES / 24000 / speedup
+    tee = recording.tee if recording is not None else None
+    start = time.perf_counter()
+    next_client = next_server = 0.0
+    end = seconds / speedup
+    while True:
+        now = time.perf_counter() - start
+        if now >= end:
+            break
+        # Same pacing with recording off, only the tee is left out
+        while next_client <= now:
+            if tee is not None:
+                began = time.perf_counter()
+                tee("candidate", client_frame, began)
+                tee_times.append(time.perf_counter() - began)
+            next_client += client_interval
+        while next_server <= now:
+            if tee is not None:
+                began = time.perf_counter()
+                tee("interviewer", server_message, began)
+                tee_times.append(time.perf_counter() - began)
+            next_server += server_interval
+        await asyncio.sleep(max(0, min(next_client, next_server) - now))
+
+
+async def run(args, speedup: float, recording_on: bool) -> dict:
+    recorder = recorder_module.Recorder()
+    recorder.enabled = recording_on
+    recorder.path = args.path
+    recorder.workers = args.workers
+    recorder.buffer_bytes = args.buffer_bytes
+    await recorder.start()
+    recordings = [await recorder.open(f"bench-{i}") for i in range(args.sessions)]
+
+    lag, tee_times, stop = [], [], asyncio.Event()
+    lag_task = asyncio.create_task(loop_lag(lag, stop))
+    wall_start, cpu_start = time.perf_counter(), time.process_time()
+    await asyncio.gather(
+        *[
+            session(recording, args.seconds, speedup, tee_times)
+            for recording in recordings
+        ]
+    )
+    # Lag while sessions stream, not while they end
+    stop.set()
+    await lag_task
+    # Everything still buffered is written before the clock stops
+    if recording_on:
+        await asyncio.gather(*[recorder.close(recording) for recording in recordings])
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    stats = recorder.stats()
+    await recorder.stop()
+    shutil.rmtree(args.path, ignore_errors=True)
+    return {
+        "mb_per_s": stats["bytes_written"] / wall / 1e6,
+        "frames": stats["frames"] + stats["dropped"],
+        "dropped": stats["dropped"],
+        "write_ms": stats["avg_write_ms"],
+        "tee_us": percentile(tee_times, 99) * 1e6,
+        "lag_p99": percentile(lag, 99),
+        "cpu": cpu / wall,
+    }
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=200)
+    parser.add_argument("--seconds", type=float, default=20, help="audio per session")
+    parser.add_argument("--speedup", default="1,4,16")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--buffer-bytes", type=int, default=4194304)
+    parser.add_argument("--path", default="data/bench_recordings")
+    args = parser.parse_args()
+
+    realtime = (CLIENT_SAMPLES * 2 / (CLIENT_SAMPLES / 16000)) + (
+        SERVER_SAMPLES * 2 / (SERVER_SAMPLES / 24000)
+    )
+    print(
+        f"{args.sessions} sessions, {args.seconds:.0f}s of audio each, "
+        f"{args.workers} writer threads; real time is "
+        f"{realtime * args.sessions / 1e6:.1f} MB/s of PCM"
+    )
+    print(
+        f"{'speedup':>8}{'recording':>11}{'MB/s':>8}{'frames':>9}{'dropped':>9}"
+        f"{'write ms':>10}{'tee p99 us':>12}{'lag p99 ms':>12}{'CPU':>7}"
+    )
+    for speedup in [float(value) for value in args.speedup.split(",")]:
+        for recording_on in [False, True]:
+            result = await run(args, speedup, recording_on)
+            print(
+                f"{speedup:>7.0f}x{'on' if recording_on else 'off':>11}"
+                f"{result['mb_per_s']:>8.1f}{result['frames']:>9}"
+                f"{result['dropped']:>9}{result['write_ms']:>10.2f}"
+                f"{result['tee_us']:>12.2f}{result['lag_p99']:>12.2f}"
+                f"{result['cpu']:>7.0%}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,162 @@
+"""
+Audio forwarding latency while the REST API is under query load.
+
+Runs the FastAPI app in-process, next to a simulated interview session that
+pushes one 128 ms audio frame through the proxy fast path on the same event
+loop. The frame delay (how late each frame is handled compared to its
+schedule) is measured first with an idle API and then while a separate
+thread hammers the read endpoints. With the async data layer both phases
+should report the same percentiles; with blocking driver calls the loaded
+phase shows delays in the order of the query time.
+
+Requires a reachable MongoDB (MONGODB_URI). Use --seed to insert sample
+documents first.
+
+Usage (from the server directory):
+    python -m benchmarks.rest_load_audio_latency --seed 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import threading
+import time
+from datetime import datetime
+
+import aiohttp
+import uvicorn
+from bson.objectid import ObjectId
+from pymongo import MongoClient
+
+from benchmarks.common import latency_summary
+from benchmarks.proxy_forwarding import client_audio_frame
+from database import DATABASE_NAME
+from proxy import is_passthrough
+
+FRAME_INTERVAL = 0.128
+
+
+def seed(count: int) -> str:
+    """Inserts sample documents and returns a candidate id for /meet."""
+    db = MongoClient(os.environ.get("MONGODB_URI"))[DATABASE_NAME]
+    job_vacancy_id = db.job_vacancies.insert_one({"title": "Benchmark"}).inserted_id
+    candidate_id = db.candidates.insert_one(
+        {"name": "Benchmark", "job_vacancy_id": job_vacancy_id}
+    ).inserted_id
+    db.interview_questions.insert_many(
+        {
+            "question": f"Pergunta {i}",
+            "tag": f"pergunta_{i}",
+            "job_vacancy_id": job_vacancy_id,
+            "active": True,
+            "created_at": datetime.utcnow(),
+        }
+        for i in range(10)
+    )
+    db.interview_responses.insert_many(
+        {
+            "candidate_id": ObjectId(),
+            "job_vacancy_id": job_vacancy_id,
+            "tag": f"pergunta_{i % 10}",
+            "response": "x" * 200,
+            "answered_at": datetime.utcnow(),
+        }
+        for i in range(count)
+    )
+    return str(candidate_id)
+
+
+async def audio_session(stop: asyncio.Event, delays_ms: list) -> None:
+    """Simulates the Client->Server direction of one interview."""
+    frame = client_audio_frame(2048)
+    queue = asyncio.Queue()
+    next_at = time.perf_counter() + FRAME_INTERVAL
+    while not stop.is_set():
+        await asyncio.sleep(max(0, next_at - time.perf_counter()))
+        delays_ms.append((time.perf_counter() - next_at) * 1000)
+        if is_passthrough(frame, "Client->Server"):
+            queue.put_nowait(frame)
+            queue.get_nowait()
+        next_at += FRAME_INTERVAL
+
+
+def rest_load(base_url: str, paths, concurrency: int, stop: threading.Event, counts):
+    """Issues GET requests from a separate thread and event loop."""
+
+    async def worker(session, index):
+        while not stop.is_set():
+            path = paths[index % len(paths)]
+            index += 1
+            async with session.get(base_url + path) as response:
+                await response.read()
+                counts[response.status] = counts.get(response.status, 0) + 1
+
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(*(worker(session, i) for i in range(concurrency)))
+
+    asyncio.run(run())
+
+
+async def phase(label: str, seconds: float, load=None) -> None:
+    delays_ms = []
+    stop = asyncio.Event()
+    session = asyncio.create_task(audio_session(stop, delays_ms))
+    load_stop = threading.Event()
+    counts = {}
+    thread = None
+    if load:
+        thread = threading.Thread(target=load, args=(load_stop, counts))
+        thread.start()
+    await asyncio.sleep(seconds)
+    stop.set()
+    load_stop.set()
+    await session
+    if thread:
+        await asyncio.to_thread(thread.join)
+    requests = sum(counts.values())
+    print(f"{label:<12} frame delay {latency_summary(delays_ms)}")
+    if load:
+        print(f"{'':<12} REST {requests / seconds:.0f} req/s, status codes {counts}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--candidate-id", default=None)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--port", type=int, default=3999)
+    args = parser.parse_args()
+
+    candidate_id = args.candidate_id
+    if args.seed:
+        candidate_id = seed(args.seed)
+
+    from server import app
+
+    server = uvicorn.Server(
+        uvicorn.Config(app, host="127.0.0.1", port=args.port, log_level="warning")
+    )
+    server.install_signal_handlers = lambda: None
+    serving = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+
+    paths = ["/interview_responses", "/interview_questions", "/job_vacancies"]
+    if candidate_id:
+        paths.append(f"/candidates/{candidate_id}/meet")
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    def load(stop, counts):
+        rest_load(base_url, paths, args.concurrency, stop, counts)
+
+    await phase("idle", args.seconds)
+    await phase("under load", args.seconds, load)
+
+    server.should_exit = True
+    await serving
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,141 @@
+"""
+Slow consumer harness for the per-session frame queues.
+
+Runs proxy.create_proxy against a local fake Gemini WebSocket server and an
+in-process fake browser, where either side can be made slower than the
+audio it receives. For every frame queue policy it reports how many frames
+were delivered, dropped or coalesced, the queue high-water mark and the
+end-to-end latency of the audio that made it to the browser.
+
+Usage (from the server directory):
+    python -m benchmarks.slow_consumer_harness --client-delay 0.06
+    python -m benchmarks.slow_consumer_harness --gemini-delay 0.2
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import time
+
+import websockets
+
+import frame_queue
+from benchmarks.common import latency_summary
+from benchmarks.proxy_forwarding import client_audio_frame
+from gemini_client import GeminiClient
+from proxy import create_proxy
+
+SERVER_FRAME_SAMPLES = 960  # 40 ms at 24 kHz
+
+
+def server_audio_frame() -> str:
+    pcm = os.urandom(SERVER_FRAME_SAMPLES * 2)
+    return json.dumps(
+        {
+            "serverContent": {
+                "modelTurn": {
+                    "parts": [
+                        {
+                            "inlineData": {
+                                "mimeType": "audio/pcm;rate=24000",
+                                "data": base64.b64encode(pcm).decode("ascii"),
+                            }
+                        }
+                    ]
+                }
+            },
+            "sentAt": time.perf_counter(),
+        }
+    )
+
+
+class FakeGemini:
+    """Streams audio as fast as real time and reads client frames slowly."""
+
+    def __init__(self, read_delay: float):
+        self.read_delay = read_delay
+        self.received = 0
+
+    async def handler(self, websocket):
+        async def stream():
+            while True:
+                await websocket.send(server_audio_frame())
+                await asyncio.sleep(SERVER_FRAME_SAMPLES / 24000)
+
+        streaming = asyncio.create_task(stream())
+        try:
+            async for _ in websocket:
+                self.received += 1
+                await asyncio.sleep(self.read_delay)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            streaming.cancel()
+
+
+class FakeBrowser:
+    """Sends 128 ms microphone chunks and plays received audio slowly."""
+
+    def __init__(self, seconds: float, play_delay: float):
+        self.seconds = seconds
+        self.play_delay = play_delay
+        self.latencies_ms = []
+
+    async def __aiter__(self):
+        frame = client_audio_frame(2048)
+        end = time.perf_counter() + self.seconds
+        while time.perf_counter() < end:
+            yield frame
+            await asyncio.sleep(0.128)
+
+    async def send_text(self, message: str):
+        sent_at = json.loads(message).get("sentAt")
+        if sent_at:
+            self.latencies_ms.append((time.perf_counter() - sent_at) * 1000)
+        await asyncio.sleep(self.play_delay)
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+async def run(policy: str, args, port: int) -> None:
+    os.environ["FRAME_QUEUE_POLICY"] = policy
+    os.environ["FRAME_QUEUE_SIZE"] = str(args.queue_size)
+    for key in frame_queue.totals:
+        frame_queue.totals[key] = 0
+
+    gemini = FakeGemini(args.gemini_delay)
+    async with websockets.serve(gemini.handler, "127.0.0.1", port):
+        client = GeminiClient()
+        client.service_url = f"ws://127.0.0.1:{port}/ws"
+        client.pool_size = 0
+        browser = FakeBrowser(args.seconds, args.client_delay)
+        await create_proxy(browser, client, {})
+
+    totals = frame_queue.totals
+    print(
+        f"{policy:<12} delivered={len(browser.latencies_ms):<5} "
+        f"gemini_received={gemini.received:<5} dropped={totals['dropped']:<5} "
+        f"coalesced={totals['coalesced']:<5} high_water={totals['high_water_mark']}"
+    )
+    print(f"{'':<12} browser audio latency {latency_summary(browser.latencies_ms)}")
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--client-delay", type=float, default=0.0)
+    parser.add_argument("--gemini-delay", type=float, default=0.0)
+    parser.add_argument("--queue-size", type=int, default=64)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.environ.setdefault("GEMINI_API_KEY", "harness")
+    for policy in frame_queue.POLICIES:
+        await run(policy, args, args.port)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
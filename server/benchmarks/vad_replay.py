@@ -0,0 +1,189 @@
+"""
+Replays candidate audio traces through the voice activity detector (vad.py).
+
+Each trace is one session of 16 kHz PCM16 mono: WAV files given with
+--trace, or synthetic interviews (background noise, listening pauses and
+answers made of voiced syllables, fricatives and short hesitations) when
+none is given. The trace is cut into the browser's chunks and fed to a
+VoiceActivityDetector as the proxy would.
+
+Reported per session: share of chunks suppressed and VAD CPU per chunk.
+
+Turn taking is validated with a reference endpointer standing in for
+Gemini's: 20 ms windows above --endpoint-db are speech, and a turn ends
+after --turn-silence-ms of non-speech audio. It runs once over the whole
+trace and once over only the forwarded chunks (in audio time, as Gemini
+hears them); every start of speech and end of turn must be found in both,
+at the same position of the original trace, and no reference speech window
+may fall in a suppressed chunk.
+
+Usage (from the server directory):
+    python -m benchmarks.vad_replay --sessions 5
+    python -m benchmarks.vad_replay --trace a.wav --trace b.wav
+    python -m benchmarks.vad_replay --hangover-ms 300,600,1000
+"""
+
+import argparse
+import time
+import wave
+
+import numpy as np
+
+from vad import FULL_SCALE, VoiceActivityDetector, frame_windows, window_energy
+
+RATE = 16000
+
+
+def load_trace(path: str) -> np.ndarray:
+    with wave.open(path, "rb") as trace:
+        if (
+            trace.getframerate() != RATE
+            or trace.getnchannels() != 1
+            or trace.getsampwidth() != 2
+        ):
+            raise SystemExit(f"{path}: expected 16 kHz mono PCM16")
+        return np.frombuffer(trace.readframes(trace.getnframes()), dtype="<i2")
+
+
+def synthetic_trace(seconds: float, seed: int) -> np.ndarray:
+    """An interview seen from the candidate's microphone."""
+    rng = np.random.default_rng(seed)
+    total = int(seconds * RATE)
+    # Room noise around -58 dBFS
+    audio = rng.normal(0, 32768 * 10 ** (-58 / 20), total)
+    position = 0
+    while position < total:
+        # Listening to the question
+        position += int(rng.uniform(4, 12) * RATE)
+        answer_end = min(total, position + int(rng.uniform(3, 15) * RATE))
+        while position < answer_end:
+            kind = rng.random()
+            if kind < 0.7:
+                # Voiced syllable: a few harmonics under a smooth envelope
+                length = int(rng.uniform(0.15, 0.4) * RATE)
+                t = np.arange(length) / RATE
+                f0 = rng.uniform(100, 220)
+                sound = sum(
+                    np.sin(2 * np.pi * f0 * h * t) / h for h in range(1, 6)
+                ) * np.hanning(length)
+                level = rng.uniform(-28, -18)
+            else:
+                # Fricative: quiet high-frequency noise
+                length = int(rng.uniform(0.08, 0.15) * RATE)
+                sound = np.diff(rng.normal(0, 1, length + 1)) * np.hanning(length)
+                level = rng.uniform(-42, -34)
+            sound *= 32768 * 10 ** (level / 20) / (np.sqrt(np.mean(sound**2)) + 1e-9)
+            end = min(answer_end, position + length)
+            audio[position:end] += sound[: end - position]
+            position = end
+            # Gap between sounds, sometimes a hesitation shorter than a turn end
+            pause = 0.5 if rng.random() < 0.05 else rng.uniform(0.03, 0.2)
+            position += int(pause * RATE)
+    return np.clip(audio, -32768, 32767).astype("<i2")
+
+
+def endpoint_events(audio: np.ndarray, origin: np.ndarray, args) -> tuple:
+    """
+    Reference turn detection over `audio`; origin[i] is the position of
+    sample i in the original trace. Returns the events as
+    (kind, original sample) and the original positions of speech windows.
+    """
+    window = RATE * 20 // 1000
+    energy = window_energy(frame_windows(audio.tobytes(), window))
+    speech = energy >= FULL_SCALE * 10 ** (args.endpoint_db / 10)
+    needed = args.turn_silence_ms // 20
+    events, silent, in_turn = [], needed, False
+    for index, is_speech in enumerate(speech):
+        if is_speech:
+            if not in_turn:
+                events.append(("start", int(origin[index * window])))
+                in_turn = True
+            silent = 0
+        else:
+            silent += 1
+            if in_turn and silent == needed:
+                events.append(("end", int(origin[index * window])))
+                in_turn = False
+    speech_positions = origin[np.flatnonzero(speech) * window]
+    return events, speech_positions
+
+
+def replay(audio: np.ndarray, args, hangover_ms: int) -> dict:
+    chunks = [
+        audio[start : start + args.chunk] for start in range(0, len(audio), args.chunk)
+    ]
+    detector = VoiceActivityDetector(
+        hangover_ms=hangover_ms, preroll_ms=args.preroll_ms, keep_every=0
+    )
+    forwarded = []
+    start = time.process_time()
+    for index, chunk in enumerate(chunks):
+        forwarded += detector.process(chunk.tobytes(), RATE, index)
+    cpu = time.process_time() - start
+    detector.close()
+
+    origin = np.arange(len(audio))
+    reference, speech_positions = endpoint_events(audio, origin, args)
+    kept = np.concatenate([chunks[i] for i in forwarded]) if forwarded else audio[:0]
+    kept_origin = (
+        np.concatenate(
+            [origin[i * args.chunk : (i + 1) * args.chunk] for i in forwarded]
+        )
+        if forwarded
+        else origin[:0]
+    )
+    heard, _ = endpoint_events(kept, kept_origin, args)
+
+    forwarded_chunks = np.zeros(len(chunks), dtype=bool)
+    forwarded_chunks[forwarded] = True
+    clipped = int(np.count_nonzero(~forwarded_chunks[speech_positions // args.chunk]))
+    window = RATE * 20 // 1000
+    matched = len(reference) == len(heard) and all(
+        a[0] == b[0] and abs(a[1] - b[1]) <= window for a, b in zip(reference, heard)
+    )
+    summary = detector.summary()
+    return {
+        "seconds": len(audio) / RATE,
+        "ratio": summary["suppressed_ratio"],
+        "chunks": summary["frames"],
+        "turns": sum(1 for kind, _ in reference if kind == "end"),
+        "clipped": clipped,
+        "matched": matched,
+        "events": (len(reference), len(heard)),
+        "cpu_us": cpu / max(1, len(chunks)) * 1_000_000,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--trace", action="append", default=[], help="16 kHz WAV")
+    parser.add_argument("--sessions", type=int, default=5, help="synthetic traces")
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--chunk", type=int, default=2048, help="samples per chunk")
+    parser.add_argument("--hangover-ms", default="1000")
+    parser.add_argument("--preroll-ms", type=int, default=300)
+    parser.add_argument("--endpoint-db", type=float, default=-45)
+    parser.add_argument("--turn-silence-ms", type=int, default=800)
+    args = parser.parse_args()
+
+    traces = [(path, load_trace(path)) for path in args.trace] or [
+        (f"synthetic-{seed}", synthetic_trace(args.seconds, seed))
+        for seed in range(args.sessions)
+    ]
+    print(
+        f"{'session':<16}{'hangover':>9}{'seconds':>9}{'chunks':>8}{'turns':>7}"
+        f"{'suppressed':>12}{'clipped':>9}{'turns ok':>10}{'cpu us':>8}"
+    )
+    for hangover_ms in [int(value) for value in args.hangover_ms.split(",")]:
+        for name, audio in traces:
+            result = replay(audio, args, hangover_ms)
+            status = "yes" if result["matched"] else "NO %d/%d" % result["events"]
+            print(
+                f"{name:<16}{hangover_ms:>7}ms{result['seconds']:>9.0f}"
+                f"{result['chunks']:>8}{result['turns']:>7}{result['ratio']:>12.1%}"
+                f"{result['clipped']:>9}{status:>10}{result['cpu_us']:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
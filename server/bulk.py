@@ -0,0 +1,155 @@
+"""
+Bulk imports of interview questions and candidates.
+
+The body is either a JSON array or NDJSON (Content-Type application/x-ndjson,
+one document per line), so an ATS export can be posted as is. Every item is
+validated with a pydantic model and the valid ones are written with a single
+insert_many, which the driver splits into as few round trips as the server
+allows. Errors are reported per item, by position in the input.
+
+With ordered=true the import stops at the first invalid or rejected item,
+like an ordered insert_many; otherwise every valid item is written.
+"""
+
+import os
+from typing import Optional
+
+from bson.objectid import ObjectId
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from pymongo.errors import BulkWriteError
+
+import codec
+
+MAX_ITEMS = int(os.environ.get("BULK_MAX_ITEMS", 50000))
+
+NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class InterviewQuestionIn(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    question: str = Field(min_length=1)
+    category: str = "personal"
+    difficulty: str = "easy"
+    tag: str = ""
+    active: bool = True
+    job_vacancy_id: Optional[str] = None
+
+    @field_validator("job_vacancy_id")
+    @classmethod
+    def valid_object_id(cls, value):
+        if value is not None and not ObjectId.is_valid(value):
+            raise ValueError("Invalid job vacancy ID")
+        return value
+
+
+class CandidateIn(BaseModel):
+    # Extra fields from the ATS are kept, as in the single-item endpoint
+    model_config = ConfigDict(extra="allow")
+
+    name: str = Field(min_length=1)
+    email: str = Field(min_length=3, pattern=r"^[^@\s]+@[^@\s]+$")
+    status: str = "initial"
+
+
+async def read_items(request: Request) -> list:
+    """
+    The items of a bulk request body. NDJSON lines that are not valid JSON
+    are returned as exceptions and reported as item errors.
+    """
+    body = await request.body()
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+
+    if content_type in NDJSON_TYPES:
+        items = []
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            try:
+                items.append(codec.loads(line))
+            except codec.DECODE_ERRORS as e:
+                items.append(e)
+    else:
+        try:
+            items = codec.loads(body)
+        except codec.DECODE_ERRORS:
+            raise HTTPException(status_code=400, detail="Invalid JSON body")
+        if not isinstance(items, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array")
+
+    if not items:
+        raise HTTPException(status_code=400, detail="No items to import")
+    if len(items) > MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_ITEMS} items per request"
+        )
+    return items
+
+
+def validate_items(items: list, model, ordered: bool):
+    """
+    Splits the items into (index, validated model) pairs and item errors.
+    """
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            if isinstance(item, Exception):
+                raise ValueError(f"Invalid JSON: {item}")
+            valid.append((index, model.model_validate(item)))
+        except ValidationError as e:
+            errors.append({"index": index, "errors": validation_messages(e)})
+        except ValueError as e:
+            errors.append({"index": index, "errors": [str(e)]})
+        if errors and ordered:
+            break
+    return valid, errors
+
+
+def validation_messages(error: ValidationError) -> list:
+    return [
+        ".".join(str(part) for part in detail["loc"]) + ": " + detail["msg"]
+        for detail in error.errors()
+    ]
+
+
+async def insert_items(collection, indexed_documents: list, ordered: bool) -> dict:
+    """
+    insert_many of (index, document) pairs; write errors are mapped back to
+    the positions of the items in the request.
+    """
+    inserted, errors = [], []
+    if not indexed_documents:
+        return {"inserted": inserted, "errors": errors}
+
+    indexes = [index for index, _ in indexed_documents]
+    documents = [document for _, document in indexed_documents]
+    failed = set()
+    try:
+        await collection.insert_many(documents, ordered=ordered)
+    except BulkWriteError as e:
+        for write_error in e.details.get("writeErrors", []):
+            failed.add(write_error["index"])
+            errors.append(
+                {
+                    "index": indexes[write_error["index"]],
+                    "errors": [write_error.get("errmsg", "Write error")],
+                }
+            )
+        if ordered and failed:
+            # Ordered inserts stop at the first error
+            documents = documents[: min(failed)]
+
+    for position, document in enumerate(documents):
+        if position not in failed:
+            inserted.append({"index": indexes[position], "_id": document["_id"]})
+    return {"inserted": inserted, "errors": errors}
+
+
+def bulk_result(inserted: list, errors: list, total: int) -> dict:
+    return {
+        "received": total,
+        "inserted_count": len(inserted),
+        "inserted": inserted,
+        "errors": sorted(errors, key=lambda error: error["index"]),
+    }
@@ -0,0 +1,95 @@
+"""
+Invalidation of the in-process caches (response_cache, setup_cache) across
+workers.
+
+Each uvicorn worker (WEB_CONCURRENCY) has its own copy of the caches, so an
+invalidate() alone only clears the worker that handled the write. Every
+invalidation also increments the cache's counter in the cache_versions
+collection ({"_id": <cache name>, "version": n}). Before a lookup, a cache
+whose last check is older than CACHE_SYNC_INTERVAL seconds reads the counter
+and, when another worker changed it, drops everything it holds.
+
+Another worker can thus serve data changed elsewhere for up to
+CACHE_SYNC_INTERVAL seconds (0 checks on every lookup). A check or update
+that takes longer than CACHE_SYNC_TIMEOUT seconds is given up, so a slow or
+unreachable Mongo never holds up a cache hit; the entries then live until
+they expire (their TTL).
+"""
+
+import asyncio
+import logging
+import os
+import time
+
+from pymongo import ReturnDocument
+
+from database import get_db
+
+logger = logging.getLogger(__name__)
+
+
+class SharedVersion:
+    """
+    Invalidation counter of one cache, shared by every worker.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.interval = float(os.environ.get("CACHE_SYNC_INTERVAL", 1))
+        self.timeout = float(os.environ.get("CACHE_SYNC_TIMEOUT", 0.5))
+        # Last counter seen; None until the first check
+        self.version = None
+        self.checked_at = float("-inf")
+        self.remote_invalidations = 0
+        self.errors = 0
+
+    async def changed(self) -> bool:
+        """True when another worker invalidated the cache since the last check."""
+        now = time.monotonic()
+        if now - self.checked_at < self.interval:
+            return False
+        # Set before the query, so concurrent lookups do not check again
+        self.checked_at = now
+        try:
+            async with asyncio.timeout(self.timeout):
+                document = await get_db().cache_versions.find_one({"_id": self.name})
+        except Exception as e:
+            self.errors += 1
+            logger.warning(
+                f"Error checking cache version: {e!r}", extra={"cache": self.name}
+            )
+            return False
+        version = document["version"] if document else 0
+        changed = self.version is not None and version != self.version
+        self.version = version
+        if changed:
+            self.remote_invalidations += 1
+        return changed
+
+    async def bump(self) -> None:
+        """Tells the other workers that the cache was invalidated."""
+        try:
+            async with asyncio.timeout(self.timeout):
+                document = await get_db().cache_versions.find_one_and_update(
+                    {"_id": self.name},
+                    {"$inc": {"version": 1}},
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER,
+                )
+        except Exception as e:
+            self.errors += 1
+            logger.warning(
+                f"Error publishing cache invalidation: {e!r}",
+                extra={"cache": self.name},
+            )
+            return
+        # Only this bump since the last check: this worker is already up to
+        # date. Otherwise the next check sees the other workers' changes.
+        if self.version is not None and document["version"] == self.version + 1:
+            self.version = document["version"]
+
+    def stats(self) -> dict:
+        return {
+            "remote_invalidations": self.remote_invalidations,
+            "sync_errors": self.errors,
+        }
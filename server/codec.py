@@ -0,0 +1,95 @@
+"""
+JSON codec shared by the WebSocket proxy and the REST API.
+
+Uses orjson or msgspec when they are installed and falls back to the stdlib
+json module otherwise. The backend can be forced with the JSON_CODEC
+environment variable ("orjson", "msgspec" or "json"). ObjectId and datetime
+values are encoded natively, so Mongo documents can be returned as they come
+out of the driver.
+"""
+
+import json
+import os
+
+from fastapi.responses import JSONResponse
+
+from database import serialize_objectid
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+
+def _select_backend() -> str:
+    requested = os.environ.get("JSON_CODEC", "").lower()
+    available = {
+        "orjson": orjson is not None,
+        "msgspec": msgspec is not None,
+        "json": True,
+    }
+    if requested:
+        if not available.get(requested):
+            raise ValueError(f"JSON codec '{requested}' is not available")
+        return requested
+    return next(name for name, ok in available.items() if ok)
+
+
+BACKEND = _select_backend()
+
+if BACKEND == "orjson":
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, default=serialize_objectid)
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, default=serialize_objectid).decode("utf-8")
+
+    loads = orjson.loads
+    _decode_error = orjson.JSONDecodeError
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder(enc_hook=serialize_objectid)
+    _decoder = msgspec.json.Decoder()
+
+    dumps_bytes = _encoder.encode
+
+    def dumps(obj) -> str:
+        return _encoder.encode(obj).decode("utf-8")
+
+    loads = _decoder.decode
+    _decode_error = msgspec.DecodeError
+
+else:
+
+    def dumps(obj) -> str:
+        return json.dumps(
+            obj, default=serialize_objectid, ensure_ascii=False, separators=(",", ":")
+        )
+
+    def dumps_bytes(obj) -> bytes:
+        return dumps(obj).encode("utf-8")
+
+    loads = json.loads
+    _decode_error = json.JSONDecodeError
+
+# What loads() can raise on input that is not valid JSON: the backend's
+# decode error, and ValueError / RecursionError for bad UTF-8, numbers out of
+# range or nesting too deep, depending on the backend
+DECODE_ERRORS = (_decode_error, ValueError, RecursionError)
+
+
+class CodecJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with the selected codec.
+    Endpoints returning Mongo documents should return this directly, which
+    also skips FastAPI's jsonable_encoder pass over the content.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
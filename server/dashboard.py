@@ -0,0 +1,99 @@
+"""
+Job vacancy dashboard: every candidate with its interview status and
+response counts, in one aggregation instead of one request per candidate.
+
+The candidates of the page are selected first and only then joined, so the
+$lookup stages run for at most one page of candidates. Both lookups use the
+candidate_id indexes of interviews and interview_responses (indexes.py).
+"""
+
+import asyncio
+
+from bson.objectid import ObjectId
+
+from pagination import decode_cursor, encode_cursor, page_size
+
+
+def dashboard_pipeline(job_vacancy_id: ObjectId, after_id=None, size: int = 100):
+    match = {"job_vacancy_id": job_vacancy_id}
+    if after_id is not None:
+        match["_id"] = {"$gt": after_id}
+
+    return [
+        {"$match": match},
+        {"$sort": {"_id": 1}},
+        {"$limit": size + 1},
+        {
+            "$lookup": {
+                "from": "interviews",
+                "localField": "_id",
+                "foreignField": "candidate_id",
+                "pipeline": [
+                    {"$sort": {"started_at": -1}},
+                    {"$project": {"status": 1, "started_at": 1, "completed_at": 1}},
+                ],
+                "as": "interviews",
+            }
+        },
+        {
+            "$lookup": {
+                "from": "interview_responses",
+                "localField": "_id",
+                "foreignField": "candidate_id",
+                "pipeline": [
+                    {
+                        "$group": {
+                            "_id": None,
+                            "count": {"$sum": 1},
+                            "last_answered_at": {"$max": "$answered_at"},
+                        }
+                    }
+                ],
+                "as": "responses",
+            }
+        },
+        {
+            "$addFields": {
+                "interview": {"$arrayElemAt": ["$interviews", 0]},
+                "interviews_count": {"$size": "$interviews"},
+                "responses_count": {
+                    "$ifNull": [{"$arrayElemAt": ["$responses.count", 0]}, 0]
+                },
+                "last_answered_at": {
+                    "$arrayElemAt": ["$responses.last_answered_at", 0]
+                },
+            }
+        },
+        {"$project": {"interviews": 0, "responses": 0}},
+    ]
+
+
+async def job_vacancy_dashboard(
+    db, job_vacancy_id: ObjectId, cursor: str = None, limit: int = None
+) -> dict:
+    """
+    The job vacancy and one page of its candidates, each with its latest
+    interview, number of interviews and number of responses.
+    """
+    size = page_size(limit)
+    after_id = decode_cursor(cursor)[1] if cursor else None
+
+    async def candidates():
+        result = await db.candidates.aggregate(
+            dashboard_pipeline(job_vacancy_id, after_id, size)
+        )
+        return await result.to_list(None)
+
+    job_vacancy, candidates = await asyncio.gather(
+        db.job_vacancies.find_one({"_id": job_vacancy_id}), candidates()
+    )
+
+    next_cursor = None
+    if len(candidates) > size:
+        candidates = candidates[:size]
+        next_cursor = encode_cursor(candidates[-1], "_id")
+    return {
+        "job_vacancy": job_vacancy,
+        "candidates": candidates,
+        "next_cursor": next_cursor,
+    }
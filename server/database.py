@@ -1,5 +1,71 @@
+"""
+MongoDB data access shared by the REST API and the WebSocket proxy.
+
+Everything goes through a single AsyncMongoClient per process so that the
+connection pool is shared and no query ever blocks the event loop that is
+also forwarding the interview audio. The pool can be tuned with the
+MONGODB_* environment variables below.
+"""
+
+import os
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import AsyncMongoClient
+
+from metrics import MongoCommandMetrics
+
+DATABASE_NAME = "hr_conversational_ai"
+
+_client = None
+_db = None
+
+
+def get_client() -> AsyncMongoClient:
+    """
+    Returns the process-wide client, creating it on first use.
+    The client binds to the event loop it is first used on.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncMongoClient(
+            os.environ.get("MONGODB_URI"),
+            maxPoolSize=int(os.environ.get("MONGODB_MAX_POOL_SIZE", 100)),
+            minPoolSize=int(os.environ.get("MONGODB_MIN_POOL_SIZE", 5)),
+            maxIdleTimeMS=int(os.environ.get("MONGODB_MAX_IDLE_TIME_MS", 60000)),
+            waitQueueTimeoutMS=int(
+                os.environ.get("MONGODB_WAIT_QUEUE_TIMEOUT_MS", 5000)
+            ),
+            serverSelectionTimeoutMS=int(
+                os.environ.get("MONGODB_SERVER_SELECTION_TIMEOUT_MS", 5000)
+            ),
+            appname="hr-conversational-ai",
+            event_listeners=[MongoCommandMetrics()],
+        )
+    return _client
+
+
+def get_db():
+    """Returns the application database on the shared client."""
+    global _db
+    if _db is None:
+        _db = get_client()[DATABASE_NAME]
+    return _db
+
+
+async def close_client() -> None:
+    """Closes the shared client, e.g. on application shutdown."""
+    global _client, _db
+    if _client is not None:
+        await _client.close()
+    _client = None
+    _db = None
+
+
 def serialize_objectid(obj):
-    """Convert ObjectId to string for JSON serialization."""
+    """Convert ObjectId (and datetime) values for JSON serialization."""
     if isinstance(obj, ObjectId):
         return str(obj)
-    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
\ No newline at end of file
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {obj.__class__.__name__} is not JSON serializable")
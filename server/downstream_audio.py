@@ -0,0 +1,294 @@
+"""
+Per-session transcoding of Gemini's audio on its way to the browser.
+
+Gemini answers with 24 kHz PCM16, 48 KB per second of speech. A client on a
+slow network can ask for something smaller in its setup message:
+
+    {"setup": {..., "audio_output": {"encoding": "mulaw", "sample_rate": 8000}}}
+
+- sample_rate: 24000 (as Gemini sends it), 16000 or 8000; the audio is
+  resampled with a polyphase FIR filter, vectorized with NumPy, that keeps
+  its state between chunks
+- encoding: "pcm16", "mulaw" (G.711, one byte per sample) or "opus" when
+  opuslib and libopus are installed
+
+The proxy answers with {"audioOutput": {...}} carrying what was accepted.
+Audio then reaches the browser with a matching mimeType ("audio/pcm",
+"audio/pcmu" or "audio/opus", with ";rate=N") in JSON mode, or with the
+frame kind of audio_frames in binary mode. Opus payloads are a sequence of
+20 ms packets, each preceded by its length as a little-endian uint16.
+
+When a turn ends (turnComplete or interrupted) the audio still held back,
+the resampler's filter delay and a partial Opus packet padded with silence,
+is sent before the turn signal, and the next turn starts from a clean state.
+
+DOWNSTREAM_AUDIO=0 ignores the requests and always sends Gemini's audio.
+"""
+
+import base64
+import math
+import os
+import struct
+
+import numpy as np
+
+import audio_frames
+import codec
+
+try:
+    import opuslib
+except Exception:
+    # opuslib raises at import time when libopus itself is missing
+    opuslib = None
+
+ENABLED = os.environ.get("DOWNSTREAM_AUDIO", "1") != "0"
+
+# Counters over every session of the process
+totals = {
+    "sessions": 0,
+    "messages": 0,
+    "bytes_in": 0,
+    "bytes_out": 0,
+}
+
+SAMPLE_RATES = (24000, 16000, 8000)
+ENCODINGS = {
+    "pcm16": (audio_frames.KIND_PCM16, "audio/pcm"),
+    "mulaw": (audio_frames.KIND_MULAW, "audio/pcmu"),
+    "opus": (audio_frames.KIND_OPUS, "audio/opus"),
+}
+
+# Filter taps per polyphase branch
+TAPS_PER_PHASE = 24
+
+TURN_END_MARKERS = ('"turnComplete"', '"interrupted"')
+
+
+def available_encodings() -> list:
+    return [name for name in ENCODINGS if name != "opus" or opuslib is not None]
+
+
+def lowpass_filter(length: int, cutoff: float) -> np.ndarray:
+    """Windowed-sinc FIR; cutoff as a fraction of the sample rate."""
+    n = np.arange(length) - (length - 1) / 2
+    return 2 * cutoff * np.sinc(2 * cutoff * n) * np.kaiser(length, 8.0)
+
+
+class Resampler:
+    """
+    Streaming rational resampler (up by L, low-pass, down by M) computed as
+    a polyphase filter: every L-th output uses the same branch of the filter
+    on windows M input samples apart, so a chunk costs L strided
+    matrix-vector products.
+    """
+
+    def __init__(self, in_rate: int, out_rate: int):
+        divisor = math.gcd(in_rate, out_rate)
+        self.up = out_rate // divisor
+        self.down = in_rate // divisor
+        cutoff = 0.45 * min(in_rate, out_rate) / (in_rate * self.up)
+        taps = lowpass_filter(TAPS_PER_PHASE * self.up, cutoff) * self.up
+        # branches[p][k] multiplies x[i - k]; reversed for a sliding window
+        self.branches = np.ascontiguousarray(
+            taps.reshape(TAPS_PER_PHASE, self.up).T[:, ::-1], dtype=np.float32
+        )
+        self.history = np.zeros(TAPS_PER_PHASE - 1, dtype=np.float32)
+        self.consumed = 0
+        self.produced = 0
+
+    def process(self, samples: np.ndarray) -> np.ndarray:
+        if self.up == self.down:
+            return samples
+        available = self.consumed + len(samples)
+        # Output j sits at input position j * M / L
+        end = (available * self.up - 1) // self.down + 1
+        result = np.empty(max(0, end - self.produced), dtype=np.float32)
+
+        buffer = np.concatenate([self.history, samples.astype(np.float32)])
+        windows = np.lib.stride_tricks.sliding_window_view(buffer, TAPS_PER_PHASE)
+        for offset in range(min(self.up, len(result))):
+            first = self.produced + offset
+            newest, phase = divmod(first * self.down, self.up)
+            count = len(range(offset, len(result), self.up))
+            start = newest - self.consumed
+            result[offset :: self.up] = (
+                windows[start : start + (count - 1) * self.down + 1 : self.down]
+                @ self.branches[phase]
+            )
+
+        self.history = buffer[len(buffer) - (TAPS_PER_PHASE - 1) :]
+        self.consumed = available
+        self.produced = end
+        return result
+
+    def flush(self) -> np.ndarray:
+        """The output still delayed by the filter, as if silence followed."""
+        return self.process(np.zeros(TAPS_PER_PHASE // 2, dtype=np.float32))
+
+
+def mulaw_table() -> np.ndarray:
+    """
+    G.711 mu-law byte of every int16 value, indexed by value + 32768
+    (the reference encoder on 14-bit samples, as audioop.lin2ulaw).
+    """
+    values = np.arange(-32768, 32768, dtype=np.int32) >> 2
+    mask = np.where(values < 0, 0x7F, 0xFF)
+    magnitude = np.minimum(np.abs(values), 8159) + 0x21
+    segment = np.floor(np.log2(magnitude)).astype(np.int32) - 5
+    code = np.where(
+        segment > 7,
+        0x7F,
+        (segment << 4) | ((magnitude >> (segment + 1)) & 0x0F),
+    )
+    return (code ^ mask).astype(np.uint8)
+
+
+MULAW = mulaw_table()
+
+
+def to_int16(samples: np.ndarray) -> np.ndarray:
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2")
+
+
+class DownstreamAudio:
+    """Transcoder of one session's Gemini audio."""
+
+    def __init__(self, encoding: str = "pcm16", sample_rate: int = 24000):
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.kind, mime_type = ENCODINGS[encoding]
+        self.mime_type = f"{mime_type};rate={sample_rate}"
+        self.resamplers = {}
+        self.encoder = None
+        self.opus_pending = np.zeros(0, dtype="<i2")
+        if encoding == "opus":
+            self.encoder = opuslib.Encoder(sample_rate, 1, opuslib.APPLICATION_VOIP)
+
+    @classmethod
+    def negotiate(cls, requested):
+        """
+        Transcoder for the setup's audio_output, or None when the client
+        did not ask for one or asked for Gemini's own format. Unsupported
+        values fall back to Gemini's rate and PCM16.
+        """
+        if not ENABLED or not isinstance(requested, dict):
+            return None
+        encoding = requested.get("encoding", "pcm16")
+        sample_rate = requested.get("sample_rate", 24000)
+        if encoding not in available_encodings():
+            encoding = "pcm16"
+        if sample_rate not in SAMPLE_RATES:
+            sample_rate = 24000
+        if encoding == "pcm16" and sample_rate == audio_frames.SERVER_RATE:
+            return None
+        totals["sessions"] += 1
+        return cls(encoding, sample_rate)
+
+    def describe(self) -> dict:
+        return {"encoding": self.encoding, "sample_rate": self.sample_rate}
+
+    def transcode(self, pcm: bytes, rate: int) -> bytes:
+        samples = np.frombuffer(pcm, dtype="<i2")
+        if rate != self.sample_rate:
+            resampler = self.resamplers.get(rate)
+            if resampler is None:
+                resampler = self.resamplers[rate] = Resampler(rate, self.sample_rate)
+            samples = to_int16(resampler.process(samples))
+        return self.encode(samples)
+
+    def flush(self) -> bytes:
+        """
+        Payload of the audio held back at the end of a turn; the resamplers
+        and the Opus encoder start the next turn from scratch.
+        """
+        parts = [to_int16(resampler.flush()) for resampler in self.resamplers.values()]
+        self.resamplers = {}
+        samples = np.concatenate(parts) if parts else np.zeros(0, dtype="<i2")
+        if self.encoding == "opus":
+            frame = self.sample_rate // 50
+            partial = (len(self.opus_pending) + len(samples)) % frame
+            if partial:
+                samples = np.concatenate([samples, np.zeros(frame - partial, "<i2")])
+        return self.encode(samples)
+
+    def encode(self, samples: np.ndarray) -> bytes:
+        if self.encoding == "mulaw":
+            return MULAW[samples.view("<u2") ^ 0x8000].tobytes()
+        if self.encoding == "opus":
+            return self.encode_opus(samples)
+        return samples.tobytes()
+
+    def encode_opus(self, samples: np.ndarray) -> bytes:
+        """Whole 20 ms packets; the rest waits for the next chunk."""
+        frame = self.sample_rate // 50
+        samples = np.concatenate([self.opus_pending, samples])
+        whole = len(samples) // frame * frame
+        self.opus_pending = samples[whole:]
+        packets = []
+        for start in range(0, whole, frame):
+            packet = self.encoder.encode(
+                samples[start : start + frame].tobytes(), frame
+            )
+            packets.append(struct.pack("<H", len(packet)) + packet)
+        return b"".join(packets)
+
+    @staticmethod
+    def ends_turn(message: str) -> bool:
+        return any(marker in message for marker in TURN_END_MARKERS)
+
+    def end_turn(self, binary: bool):
+        """
+        Message with the audio held back when a turn ends, to be sent before
+        the turn signal; None when nothing was held back.
+        """
+        payload = self.flush()
+        if not payload:
+            return None
+        totals["bytes_out"] += len(payload)
+        if binary:
+            return audio_frames.encode_frame(payload, self.sample_rate, self.kind)
+        return codec.dumps(
+            {
+                "serverContent": {
+                    "modelTurn": {
+                        "parts": [
+                            {
+                                "inlineData": {
+                                    "mimeType": self.mime_type,
+                                    "data": base64.b64encode(payload).decode("ascii"),
+                                }
+                            }
+                        ]
+                    }
+                }
+            }
+        )
+
+    def convert(self, message: str, binary: bool):
+        """
+        Gemini message with a single PCM part -> transcoded message for the
+        browser: a binary frame when it is audio-only, otherwise the same
+        JSON with the new audio (and what the turn held back, when it ends
+        the turn). None when it has no PCM part.
+        """
+        spans = audio_frames.inline_audio_spans(message)
+        if spans is None:
+            return None
+        audio = audio_frames.server_json_pcm(message, spans)
+        if audio is None:
+            return None
+        rate, pcm = audio
+        payload = self.transcode(pcm, rate)
+        if self.ends_turn(message):
+            payload += self.flush()
+        totals["messages"] += 1
+        totals["bytes_in"] += len(pcm)
+        totals["bytes_out"] += len(payload)
+        if binary and audio_frames.audio_only(message, spans):
+            return audio_frames.encode_frame(payload, self.sample_rate, self.kind)
+        return audio_frames.replace_inline_audio(
+            message,
+            spans,
+            self.mime_type,
+            base64.b64encode(payload).decode("ascii"),
+        )
@@ -0,0 +1,175 @@
+"""
+Streaming NDJSON and CSV exports of interviews and interview responses.
+
+The Mongo cursor is read in batches of EXPORT_BATCH_SIZE documents and rows
+are sent as they are encoded, in chunks of about EXPORT_CHUNK_BYTES, so the
+memory used by an export does not depend on how many documents it returns.
+The first rows are sent as soon as they are encoded.
+
+Documents come in date order (answered_at or started_at, then _id), which is
+the order of the index behind each filter (see indexes.py), so Mongo returns
+the first batch without sorting the whole result first.
+"""
+
+import csv
+import io
+import logging
+import os
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+
+import codec
+
+BATCH_SIZE = int(os.environ.get("EXPORT_BATCH_SIZE", 1000))
+CHUNK_BYTES = int(os.environ.get("EXPORT_CHUNK_BYTES", 64 * 1024))
+
+FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+# Columns of the CSV exports; NDJSON always has the whole document
+COLUMNS = {
+    "interview_responses": [
+        "_id",
+        "interview_id",
+        "candidate_id",
+        "job_vacancy_id",
+        "tag",
+        "response",
+        "answered_at",
+    ],
+    "interviews": [
+        "_id",
+        "candidate_id",
+        "job_vacancy_id",
+        "status",
+        "started_at",
+        "updated_at",
+        "completed_at",
+        "responses",
+        "questions_asked",
+    ],
+}
+
+
+def object_id(value: str, name: str) -> ObjectId:
+    if not ObjectId.is_valid(value):
+        raise HTTPException(status_code=400, detail=f"Invalid {name}")
+    return ObjectId(value)
+
+
+def parse_date(value: str, name: str) -> datetime:
+    try:
+        return datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date")
+
+
+def build_filter(
+    date_field: str,
+    job_vacancy_id: str = None,
+    candidate_id: str = None,
+    since: str = None,
+    until: str = None,
+) -> dict:
+    """Mongo filter for the export query parameters."""
+    query = {}
+    if job_vacancy_id:
+        query["job_vacancy_id"] = object_id(job_vacancy_id, "job vacancy ID")
+    if candidate_id:
+        query["candidate_id"] = object_id(candidate_id, "candidate ID")
+    if since or until:
+        query[date_field] = {}
+        if since:
+            query[date_field]["$gte"] = parse_date(since, "since")
+        if until:
+            query[date_field]["$lt"] = parse_date(until, "until")
+    return query
+
+
+def csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, (dict, list)):
+        return codec.dumps(value)
+    return value
+
+
+async def ndjson_chunks(cursor):
+    buffer = bytearray()
+    first = True
+    async for document in cursor:
+        buffer += codec.dumps_bytes(document)
+        buffer += b"\n"
+        if first or len(buffer) >= CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+            first = False
+    if buffer:
+        yield bytes(buffer)
+
+
+async def csv_chunks(cursor, columns: list):
+    text = io.StringIO()
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    yield text.getvalue().encode("utf-8")
+    text.seek(0)
+    text.truncate()
+
+    first = True
+    async for document in cursor:
+        writer.writerow([csv_value(document.get(column)) for column in columns])
+        if first or text.tell() >= CHUNK_BYTES:
+            yield text.getvalue().encode("utf-8")
+            text.seek(0)
+            text.truncate()
+            first = False
+    if text.tell():
+        yield text.getvalue().encode("utf-8")
+
+
+def stream_export(
+    collection, query: dict, format: str, date_field: str
+) -> StreamingResponse:
+    """
+    Streams every document matching query, in date_field and _id order, as
+    NDJSON or CSV.
+    """
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format: {format}")
+
+    async def chunks():
+        cursor = (
+            collection.find(query)
+            .sort([(date_field, 1), ("_id", 1)])
+            .batch_size(BATCH_SIZE)
+        )
+        try:
+            if format == "csv":
+                rows = csv_chunks(cursor, COLUMNS[collection.name])
+            else:
+                rows = ndjson_chunks(cursor)
+            async for chunk in rows:
+                yield chunk
+        except Exception as e:
+            # The status line is already sent; all we can do is cut the body
+            logging.error(f"Error exporting {collection.name}: {e}")
+            raise
+        finally:
+            await cursor.close()
+
+    filename = f"{collection.name}.{format}"
+    return StreamingResponse(
+        chunks(),
+        media_type=FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
@@ -0,0 +1,194 @@
+"""
+Bounded per-session frame queues between the client and Gemini.
+
+Each direction of a proxied session writes into its own FrameQueue, drained
+by a separate sender task, so a slow peer only fills its own queue instead of
+stalling the reader on the other side. When a queue is full the policy for
+audio frames decides what happens:
+
+- "block": the reader waits for room (backpressure down to the TCP socket)
+- "drop_oldest": the oldest queued audio frame is discarded
+- "coalesce": the two oldest adjacent audio frames are merged into one
+
+Control frames (setup, tool calls, turn signals) are never dropped or merged;
+they always wait for room. Queue size and policy come from FRAME_QUEUE_SIZE
+and FRAME_QUEUE_POLICY.
+"""
+
+import asyncio
+import base64
+import collections
+import os
+
+import audio_frames
+import codec
+
+POLICIES = ("block", "drop_oldest", "coalesce")
+
+# Counters over every queue of the process, reported by /health_check
+totals = {
+    "queues": 0,
+    "frames": 0,
+    "dropped": 0,
+    "coalesced": 0,
+    "high_water_mark": 0,
+}
+
+
+class QueueClosed(Exception):
+    """Raised by FrameQueue.put once the sending side has gone away."""
+
+
+def merge_audio_frames(first, second):
+    """
+    Merges two consecutive audio messages of the same direction.
+    Returns None when they do not have the expected shape.
+    """
+    # Binary pcm16.v1 frames to the browser: the PCM is simply appended
+    if isinstance(first, bytes) or isinstance(second, bytes):
+        if isinstance(first, bytes) and isinstance(second, bytes):
+            return audio_frames.merge_frames(first, second)
+        return None
+
+    a = codec.loads(first)
+    b = codec.loads(second)
+
+    # Client->Server: media chunks can simply be sent together
+    if "realtime_input" in a and "realtime_input" in b:
+        a["realtime_input"]["media_chunks"] = a["realtime_input"].get(
+            "media_chunks", []
+        ) + b["realtime_input"].get("media_chunks", [])
+        return codec.dumps(a)
+
+    # Server->Client: the browser only plays the first part, so the PCM of
+    # both frames is joined into it
+    try:
+        part_a = a["serverContent"]["modelTurn"]["parts"][0]["inlineData"]
+        part_b = b["serverContent"]["modelTurn"]["parts"][0]["inlineData"]
+    except (KeyError, IndexError, TypeError):
+        return None
+    if part_a.get("mimeType") != part_b.get("mimeType"):
+        return None
+    pcm = base64.b64decode(part_a["data"]) + base64.b64decode(part_b["data"])
+    part_a["data"] = base64.b64encode(pcm).decode("ascii")
+    return codec.dumps(a)
+
+
+class FrameQueue:
+    """
+    Bounded FIFO of outgoing messages for one direction of a session.
+    """
+
+    def __init__(self, name: str, max_frames: int = None, policy: str = None):
+        self.name = name
+        self.max_frames = max_frames or int(os.environ.get("FRAME_QUEUE_SIZE", 64))
+        self.policy = policy or os.environ.get("FRAME_QUEUE_POLICY", "drop_oldest")
+        if self.policy not in POLICIES:
+            raise ValueError(f"Unknown frame queue policy: {self.policy}")
+
+        # (message, is_audio) pairs
+        self.frames = collections.deque()
+        self.readable = asyncio.Event()
+        self.writable = asyncio.Event()
+        self.writable.set()
+        self.closed = False
+
+        self.high_water_mark = 0
+        self.dropped = 0
+        self.coalesced = 0
+        totals["queues"] += 1
+
+    def __len__(self):
+        return len(self.frames)
+
+    async def put(self, message, is_audio: bool = False) -> None:
+        """
+        Queues a message, applying the overflow policy to audio frames.
+        Raises QueueClosed when the queue no longer has a consumer.
+        """
+        while len(self.frames) >= self.max_frames and not self.closed:
+            if is_audio and self.policy != "block" and self._make_room():
+                break
+            self.writable.clear()
+            await self.writable.wait()
+        if self.closed:
+            raise QueueClosed(self.name)
+
+        self.frames.append((message, is_audio))
+        totals["frames"] += 1
+        if len(self.frames) > self.high_water_mark:
+            self.high_water_mark = len(self.frames)
+            totals["high_water_mark"] = max(
+                totals["high_water_mark"], self.high_water_mark
+            )
+        self.readable.set()
+
+    async def get(self):
+        """
+        Returns the next message, or None once the queue is closed and empty.
+        """
+        while not self.frames:
+            if self.closed:
+                return None
+            self.readable.clear()
+            await self.readable.wait()
+
+        message, _ = self.frames.popleft()
+        self.writable.set()
+        return message
+
+    def close(self) -> None:
+        """Wakes up both sides; pending messages can still be read."""
+        self.closed = True
+        self.readable.set()
+        self.writable.set()
+
+    def stats(self) -> dict:
+        return {
+            "depth": len(self.frames),
+            "high_water_mark": self.high_water_mark,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+        }
+
+    def _make_room(self) -> bool:
+        """Frees one slot according to the policy; False if nothing applies."""
+        audio = [i for i, (_, is_audio) in enumerate(self.frames) if is_audio]
+
+        if self.policy == "coalesce":
+            for first, second in zip(audio, audio[1:]):
+                if second != first + 1:
+                    continue
+                merged = merge_audio_frames(
+                    self.frames[first][0], self.frames[second][0]
+                )
+                if merged is None:
+                    continue
+                self.frames[first] = (merged, True)
+                del self.frames[second]
+                self.coalesced += 1
+                totals["coalesced"] += 1
+                return True
+
+        # drop_oldest, or coalesce with nothing left to merge
+        if audio:
+            del self.frames[audio[0]]
+            self.dropped += 1
+            totals["dropped"] += 1
+            return True
+        return False
+
+
+async def drain_queue(queue: FrameQueue, websocket, send) -> None:
+    """
+    Sends everything put in the queue until it is closed.
+    Closes the queue if sending fails, so the producer stops as well.
+    """
+    try:
+        while True:
+            message = await queue.get()
+            if message is None:
+                break
+            await send(websocket, message)
+    finally:
+        queue.close()
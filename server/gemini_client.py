@@ -13,11 +13,21 @@
 # limitations under the License.
 """Gemini API Direct Connection Client"""
 
+import asyncio
+import collections
+import logging
 import ssl
-import traceback
+import time
 import websockets
 import certifi
 import os
+from urllib.parse import urlparse
+from websockets.protocol import State
+
+from liveness import liveness_monitor
+from metrics import gemini_connect_seconds
+
+logger = logging.getLogger(__name__)
 
 
 class GeminiClient:
@@ -28,8 +38,34 @@ class GeminiClient:
     def __init__(self):
         self.host = "generativelanguage.googleapis.com"
         self.service_url = f"wss://{self.host}/ws/google.ai.generativelanguage.v1alpha.GenerativeService.BidiGenerateContent"
+
+        # Points the client to another BidiGenerateContent server, such as
+        # the local mock in mock_gemini.py
+        if os.environ.get("GEMINI_SERVICE_URL"):
+            self.service_url = os.environ["GEMINI_SERVICE_URL"]
+            self.host = urlparse(self.service_url).netloc
         self.active_connections = set()
         self.api_key = None
+        self.ssl_context = None
+
+        # Pool of upstream sockets opened ahead of time, handed out on demand
+        self.pool_size = int(os.environ.get("GEMINI_POOL_SIZE", 2))
+        self.pool_max_idle = float(os.environ.get("GEMINI_POOL_MAX_IDLE", 60))
+        self.pool_check_interval = float(
+            os.environ.get("GEMINI_POOL_CHECK_INTERVAL", 10)
+        )
+        self.max_connections = int(os.environ.get("GEMINI_MAX_CONNECTIONS", 200))
+        self.idle_connections = collections.deque()
+        self.connection_slots = None
+        self.slot_holders = set()
+        self.pool_task = None
+        self.pool_wakeup = None
+
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.acquire_count = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
 
     def get_api_key(self):
         """Retrieves the API key from environment or file."""
@@ -46,32 +82,56 @@ class GeminiClient:
             return api_key
 
         except Exception as e:
-            print(f"Error getting API key: {e}")
-            print(f"Full traceback:\n{traceback.format_exc()}")
+            logger.error(f"Error getting API key: {e}")
             raise
 
-    async def connect_to_gemini(self, api_key: str):
+    def get_ssl_context(self) -> ssl.SSLContext:
+        """Returns the SSL context, loading the CA bundle only once."""
+        if self.ssl_context is None:
+            self.ssl_context = ssl.create_default_context(cafile=certifi.where())
+        return self.ssl_context
+
+    async def open_connection(self, api_key: str):
         """
-        Establishes a WebSocket connection to Gemini API Direct service
+        Opens a new WebSocket to Gemini API Direct service
         """
-        try:
-            # Construct the URL with API key
-            url_with_key = f"{self.service_url}?key={api_key}"
+        # Construct the URL with API key
+        url_with_key = f"{self.service_url}?key={api_key}"
+
+        logger.debug(f"Connecting to {self.host}")
 
-            print(f"Connecting to {self.host}...")
+        connection = await websockets.connect(
+            url_with_key,
+            ssl=self.get_ssl_context() if url_with_key.startswith("wss://") else None,
+        )
 
-            connection = await websockets.connect(
-                url_with_key,
-                ssl=ssl.create_default_context(cafile=certifi.where()),
-            )
+        logger.info("Connected to Gemini API", extra={"host": self.host})
+        return connection
+
+    async def connect_to_gemini(self, api_key: str):
+        """
+        Returns a WebSocket connection to Gemini API Direct service, taken
+        from the pool of pre-established connections when one is available
+        """
+        try:
+            start = time.perf_counter()
+            connection = self.take_idle_connection()
+            if connection is not None:
+                self.pool_hits += 1
+                source = "pool"
+            else:
+                self.pool_misses += 1
+                connection = await self.open_connection(api_key)
+                source = "new"
+            gemini_connect_seconds.labels(source).observe(time.perf_counter() - start)
 
-            print("Connected to Gemini API")
             self.active_connections.add(connection)
+            liveness_monitor.watch(connection, on_dead=self.cleanup_connection)
+            self.wake_pool()
             return connection
 
         except Exception as e:
-            print(f"Error connecting to Gemini: {e}")
-            print(f"Full traceback: {traceback.format_exc()}")
+            logger.exception(f"Error connecting to Gemini: {e}")
             raise
 
     async def authenticate_and_connect(self):
@@ -81,15 +141,19 @@ class GeminiClient:
         try:
             # Get API key
             api_key = self.get_api_key()
-            print("Retrieved API key for Gemini connection")
 
-            # Connect to Gemini
-            connection = await self.connect_to_gemini(api_key)
+            # Wait for a free slot, then connect to Gemini
+            await self.acquire_slot()
+            try:
+                connection = await self.connect_to_gemini(api_key)
+            except Exception:
+                self.connection_slots.release()
+                raise
+            self.slot_holders.add(connection)
             return connection, api_key
 
         except Exception as e:
-            print(f"Error in authentication and connection: {e}")
-            print(f"Full traceback: {traceback.format_exc()}")
+            logger.error(f"Error in authentication and connection: {e}")
             raise
 
     def add_connection(self, connection):
@@ -100,6 +164,103 @@ class GeminiClient:
         """Remove a connection from the active connections set"""
         if connection in self.active_connections:
             self.active_connections.remove(connection)
+        liveness_monitor.unwatch(connection)
+        if connection in self.slot_holders:
+            self.slot_holders.remove(connection)
+            self.connection_slots.release()
+
+    async def acquire_slot(self):
+        """
+        Waits until fewer than max_connections sessions are open
+        """
+        if self.connection_slots is None:
+            self.connection_slots = asyncio.Semaphore(self.max_connections)
+
+        start = time.perf_counter()
+        await self.connection_slots.acquire()
+        waited = time.perf_counter() - start
+
+        self.acquire_count += 1
+        self.acquire_wait_total += waited
+        self.acquire_wait_max = max(self.acquire_wait_max, waited)
+
+    def take_idle_connection(self):
+        """
+        Pops the newest healthy pooled connection, discarding stale ones
+        """
+        now = time.monotonic()
+        while self.idle_connections:
+            connection, opened_at = self.idle_connections.pop()
+            if connection.state is State.OPEN and now - opened_at < self.pool_max_idle:
+                return connection
+            asyncio.ensure_future(connection.close())
+        return None
+
+    def wake_pool(self):
+        """Starts the pool maintenance task or asks it to replenish now"""
+        if self.pool_size <= 0 or not os.getenv("GEMINI_API_KEY"):
+            return
+        if self.pool_task is None or self.pool_task.done():
+            self.pool_wakeup = asyncio.Event()
+            self.pool_task = asyncio.create_task(self.maintain_pool())
+        self.pool_wakeup.set()
+
+    async def maintain_pool(self):
+        """
+        Keeps pool_size healthy idle connections open in the background
+        """
+        while True:
+            # Drop idle connections that are too old or no longer answer
+            now = time.monotonic()
+            for entry in list(self.idle_connections):
+                connection, opened_at = entry
+                healthy = (
+                    connection.state is State.OPEN
+                    and now - opened_at < self.pool_max_idle
+                )
+                if healthy:
+                    try:
+                        async with asyncio.timeout(5):
+                            await (await connection.ping())
+                    except Exception:
+                        healthy = False
+                if not healthy and entry in self.idle_connections:
+                    self.idle_connections.remove(entry)
+                    await self.cleanup_connection(connection)
+
+            while len(self.idle_connections) < self.pool_size:
+                try:
+                    connection = await self.open_connection(self.get_api_key())
+                except Exception as e:
+                    logger.warning(f"Error pre-connecting to Gemini: {e}")
+                    break
+                self.idle_connections.append((connection, time.monotonic()))
+
+            self.pool_wakeup.clear()
+            try:
+                async with asyncio.timeout(self.pool_check_interval):
+                    await self.pool_wakeup.wait()
+            except TimeoutError:
+                pass
+
+    def pool_stats(self) -> dict:
+        """Pool hit rate and slot acquire wait times"""
+        handed_out = self.pool_hits + self.pool_misses
+        return {
+            "idle_connections": len(self.idle_connections),
+            "active_connections": len(self.active_connections),
+            "pool_hits": self.pool_hits,
+            "pool_misses": self.pool_misses,
+            "pool_hit_rate": (
+                round(self.pool_hits / handed_out, 3) if handed_out else 0.0
+            ),
+            "acquire_wait_avg_ms": (
+                round(self.acquire_wait_total / self.acquire_count * 1000, 2)
+                if self.acquire_count
+                else 0.0
+            ),
+            "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 2),
+        }
 
     async def cleanup_connection(self, connection):
         """Clean up a specific connection"""
@@ -110,30 +271,24 @@ class GeminiClient:
             pass
 
     async def cleanup_all_connections(self):
-        """Clean up all active connections"""
-        for conn in list(self.active_connections):
+        """Clean up all active and pooled connections"""
+        if self.pool_task is not None:
+            self.pool_task.cancel()
+            try:
+                await self.pool_task
+            except asyncio.CancelledError:
+                pass
+            self.pool_task = None
+        while self.idle_connections:
+            conn, _ = self.idle_connections.pop()
             try:
                 await conn.close()
             except Exception:
                 pass
-        self.active_connections.clear()
-        print("All Gemini connections cleaned up.")
-
-    async def ping_connections(self):
-        """
-        Ping all active connections to check if they're still alive
-        Returns list of stale connections
-        """
-        stale_connections = []
         for conn in list(self.active_connections):
+            self.remove_connection(conn)
             try:
-                await conn.ping()
+                await conn.close()
             except Exception:
-                print("Found stale Gemini connection")
-                stale_connections.append(conn)
-                self.remove_connection(conn)
-                try:
-                    await conn.close()
-                except Exception:
-                    pass
-        return stale_connections
+                pass
+        logger.info("All Gemini connections cleaned up")
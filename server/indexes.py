@@ -0,0 +1,381 @@
+"""
+Index registry: the indexes behind every query the API and the proxy run.
+
+INDEXES declares the compound indexes per collection and QUERIES the access
+paths they exist for, with the same filter and sort shapes as the code in
+server.py, proxy.py and the other modules. ensure_indexes() creates the
+indexes at startup (creating an existing index is a no-op) and drops the
+ones listed in SUPERSEDED, replaced by a compound index. explain_queries()
+asks the query planner for the winning plan of every registered query and
+reports the ones that would scan the whole collection.
+
+Diagnostic mode, which exits with status 1 on any COLLSCAN:
+    python indexes.py --explain
+
+INDEX_EXPLAIN_ON_STARTUP=1 runs the same check when the app starts and
+refuses to start on a COLLSCAN.
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from database import close_client, get_db
+
+INDEXES = {
+    "interview_questions": [
+        IndexModel(
+            [("job_vacancy_id", ASCENDING), ("active", ASCENDING)],
+            name="job_vacancy_active",
+        ),
+    ],
+    "interview_responses": [
+        # Upsert filter of the response writer
+        IndexModel(
+            [
+                ("candidate_id", ASCENDING),
+                ("job_vacancy_id", ASCENDING),
+                ("interview_id", ASCENDING),
+                ("tag", ASCENDING),
+            ],
+            name="response_key",
+        ),
+        # Dates end with _id so that exports (date then _id order) need no
+        # in-memory sort
+        IndexModel(
+            [
+                ("candidate_id", ASCENDING),
+                ("answered_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            name="candidate_answered_at_id",
+        ),
+        IndexModel(
+            [("interview_id", ASCENDING), ("answered_at", ASCENDING)],
+            name="interview_answered_at",
+        ),
+        IndexModel(
+            [
+                ("job_vacancy_id", ASCENDING),
+                ("answered_at", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="job_vacancy_answered_at_id",
+        ),
+        IndexModel(
+            [("answered_at", DESCENDING), ("_id", DESCENDING)],
+            name="answered_at_page",
+        ),
+    ],
+    "interview_questions_asked": [
+        IndexModel(
+            [("interview_id", ASCENDING), ("question_number", ASCENDING)],
+            name="interview_question_number",
+        ),
+        # _id last: the page sort breaks ties on it, which also serves the
+        # sort on asked_at alone
+        IndexModel(
+            [
+                ("candidate_id", ASCENDING),
+                ("asked_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            name="candidate_asked_at_page",
+        ),
+        IndexModel(
+            [
+                ("interview_id", ASCENDING),
+                ("asked_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            name="interview_asked_at_page",
+        ),
+        IndexModel(
+            [("asked_at", DESCENDING), ("_id", DESCENDING)],
+            name="asked_at_page",
+        ),
+    ],
+    "interviews": [
+        IndexModel(
+            [
+                ("candidate_id", ASCENDING),
+                ("started_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            name="candidate_started_at_id",
+        ),
+        IndexModel(
+            [
+                ("job_vacancy_id", ASCENDING),
+                ("started_at", ASCENDING),
+                ("_id", ASCENDING),
+            ],
+            name="job_vacancy_started_at_id",
+        ),
+        # Exports filtered by date only
+        IndexModel(
+            [("started_at", ASCENDING), ("_id", ASCENDING)],
+            name="started_at_id",
+        ),
+    ],
+    "candidates": [
+        # Candidate list and dashboard pages, in _id order
+        IndexModel(
+            [("job_vacancy_id", ASCENDING), ("_id", ASCENDING)],
+            name="job_vacancy_page",
+        ),
+    ],
+    "active_sessions": [
+        IndexModel([("expires_at", ASCENDING)], name="lease", expireAfterSeconds=0),
+        IndexModel([("worker_id", ASCENDING)], name="worker"),
+    ],
+}
+
+# Indexes replaced by one of INDEXES (same prefix), dropped by ensure_indexes
+SUPERSEDED = {
+    "candidates": ["job_vacancy"],
+    "interview_questions_asked": ["candidate_asked_at"],
+    "interview_responses": ["candidate_answered_at", "job_vacancy_answered_at"],
+    "interviews": ["candidate_started_at", "job_vacancy_started_at"],
+}
+
+_ID = ObjectId()
+_NOW = datetime(2024, 1, 1)
+
+# Access paths: name, collection, filter and sort as issued by the code
+QUERIES = [
+    {
+        "name": "questions by job vacancy (setup, meet)",
+        "collection": "interview_questions",
+        "filter": {"job_vacancy_id": _ID, "active": True},
+    },
+    {
+        "name": "response upsert (save_response)",
+        "collection": "interview_responses",
+        "filter": {
+            "interview_id": None,
+            "candidate_id": _ID,
+            "job_vacancy_id": _ID,
+            "tag": "pergunta_1",
+        },
+    },
+    {
+        "name": "responses by candidate",
+        "collection": "interview_responses",
+        "filter": {"candidate_id": _ID},
+        "sort": [("answered_at", DESCENDING)],
+    },
+    {
+        "name": "responses by interview",
+        "collection": "interview_responses",
+        "filter": {"interview_id": _ID},
+        "sort": [("answered_at", ASCENDING)],
+    },
+    {
+        "name": "responses page",
+        "collection": "interview_responses",
+        "filter": {},
+        "sort": [("answered_at", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "name": "responses export by job vacancy",
+        "collection": "interview_responses",
+        "filter": {"job_vacancy_id": _ID, "answered_at": {"$gte": _NOW}},
+        "sort": [("answered_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "responses export by candidate",
+        "collection": "interview_responses",
+        "filter": {"candidate_id": _ID},
+        "sort": [("answered_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "responses export by date",
+        "collection": "interview_responses",
+        "filter": {"answered_at": {"$gte": _NOW}},
+        "sort": [("answered_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "questions asked by interview",
+        "collection": "interview_questions_asked",
+        "filter": {"interview_id": _ID},
+        "sort": [("question_number", ASCENDING)],
+    },
+    {
+        "name": "questions asked by candidate",
+        "collection": "interview_questions_asked",
+        "filter": {"candidate_id": _ID},
+        "sort": [("asked_at", DESCENDING)],
+    },
+    {
+        "name": "questions asked page",
+        "collection": "interview_questions_asked",
+        "filter": {},
+        "sort": [("asked_at", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "name": "questions asked page of a candidate",
+        "collection": "interview_questions_asked",
+        "filter": {"candidate_id": _ID},
+        "sort": [("asked_at", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "name": "questions asked page of an interview",
+        "collection": "interview_questions_asked",
+        "filter": {"interview_id": _ID},
+        "sort": [("asked_at", DESCENDING), ("_id", DESCENDING)],
+    },
+    {
+        "name": "interviews by candidate",
+        "collection": "interviews",
+        "filter": {"candidate_id": _ID},
+    },
+    {
+        "name": "latest interview of a candidate (turn latency)",
+        "collection": "interviews",
+        "filter": {"candidate_id": _ID, "job_vacancy_id": _ID},
+        "sort": [("started_at", DESCENDING)],
+    },
+    {
+        "name": "turn latency by job vacancy",
+        "collection": "interviews",
+        "filter": {"job_vacancy_id": _ID, "latency": {"$exists": True}},
+        "sort": [("started_at", DESCENDING)],
+    },
+    {
+        "name": "interviews export by job vacancy",
+        "collection": "interviews",
+        "filter": {"job_vacancy_id": _ID, "started_at": {"$gte": _NOW}},
+        "sort": [("started_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "interviews export by candidate",
+        "collection": "interviews",
+        "filter": {"candidate_id": _ID},
+        "sort": [("started_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "interviews export by date",
+        "collection": "interviews",
+        "filter": {"started_at": {"$gte": _NOW}},
+        "sort": [("started_at", ASCENDING), ("_id", ASCENDING)],
+    },
+    {
+        "name": "candidates by job vacancy (list, dashboard)",
+        "collection": "candidates",
+        "filter": {"job_vacancy_id": _ID},
+        "sort": [("_id", ASCENDING)],
+    },
+    {
+        "name": "live sessions",
+        "collection": "active_sessions",
+        "filter": {"expires_at": {"$gt": _NOW}},
+    },
+]
+
+
+async def ensure_indexes(db=None) -> None:
+    """Creates every registered index; errors are logged, not raised."""
+    db = db if db is not None else get_db()
+
+    async def create(collection, indexes):
+        try:
+            await db[collection].create_indexes(indexes)
+        except Exception as e:
+            logging.error(f"Error creating indexes on {collection}: {e}")
+            return
+        for name in SUPERSEDED.get(collection, []):
+            try:
+                await db[collection].drop_index(name)
+            except OperationFailure as e:
+                # Already dropped, or never created
+                if e.code != 27:
+                    logging.error(f"Error dropping index {collection}.{name}: {e}")
+
+    await asyncio.gather(
+        *(create(collection, indexes) for collection, indexes in INDEXES.items())
+    )
+
+
+def plan_stages(plan: dict) -> list:
+    """Every stage of a winning plan, outermost first."""
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages += plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += plan_stages(child)
+    return stages
+
+
+async def explain_queries(db=None) -> list:
+    """
+    Explains every registered query. Returns one dict per query with the
+    stages of its winning plan and whether it is a collection scan.
+    """
+    db = db if db is not None else get_db()
+    report = []
+    for query in QUERIES:
+        cursor = db[query["collection"]].find(query["filter"])
+        if query.get("sort"):
+            cursor = cursor.sort(query["sort"])
+        explained = await cursor.explain()
+        planner = explained.get("queryPlanner", {})
+        # Slot-based engine plans keep the classic tree under queryPlan
+        plan = planner.get("winningPlan", {})
+        plan = plan.get("queryPlan", plan)
+        stages = plan_stages(plan)
+        report.append(
+            {
+                "name": query["name"],
+                "collection": query["collection"],
+                "stages": stages,
+                "collscan": "COLLSCAN" in stages,
+                "blocking_sort": "SORT" in stages,
+            }
+        )
+    return report
+
+
+async def check_query_plans(db=None) -> None:
+    """Raises RuntimeError if any registered query is a COLLSCAN."""
+    scans = [entry for entry in await explain_queries(db) if entry["collscan"]]
+    if scans:
+        names = ", ".join(entry["name"] for entry in scans)
+        raise RuntimeError(f"Queries without a usable index: {names}")
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description="Index registry")
+    parser.add_argument(
+        "--explain", action="store_true", help="fail on any COLLSCAN plan"
+    )
+    parser.add_argument(
+        "--no-create", action="store_true", help="do not create missing indexes"
+    )
+    args = parser.parse_args()
+
+    if not args.no_create:
+        await ensure_indexes()
+    status = 0
+    if args.explain:
+        for entry in await explain_queries():
+            flag = "COLLSCAN" if entry["collscan"] else "ok"
+            if entry["blocking_sort"]:
+                flag += " (in-memory sort)"
+            print(f"{flag:<26} {entry['name']}: {' <- '.join(entry['stages'])}")
+            if entry["collscan"]:
+                status = 1
+    await close_client()
+    return status
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    sys.exit(asyncio.run(main()))
@@ -0,0 +1,177 @@
+"""
+Liveness checks for the client and Gemini WebSocket connections.
+
+Connections are watched from the moment a session starts using them. Every
+frame the proxy receives marks its source as active, so busy sessions are
+never pinged at all: a connection is only pinged after LIVENESS_IDLE_INTERVAL
+seconds without traffic. Checks are kept in a heap ordered by due time, so
+the monitor only wakes up for the next connection that may have gone quiet
+instead of sweeping all of them. Pings run concurrently, at most
+LIVENESS_MAX_CONCURRENT_PINGS at a time, and a peer that does not answer
+within LIVENESS_PING_TIMEOUT is closed through its on_dead callback.
+"""
+
+import asyncio
+import heapq
+import inspect
+import itertools
+import logging
+import os
+import time
+
+
+async def ping_connection(connection) -> None:
+    """Pings and waits for the pong (websockets returns an awaitable)."""
+    pong = await connection.ping()
+    if inspect.isawaitable(pong):
+        await pong
+
+
+class LivenessMonitor:
+    """
+    Schedules pings of idle connections.
+    """
+
+    def __init__(self):
+        self.idle_interval = float(os.environ.get("LIVENESS_IDLE_INTERVAL", 30))
+        self.ping_timeout = float(os.environ.get("LIVENESS_PING_TIMEOUT", 10))
+        self.max_concurrent_pings = int(
+            os.environ.get("LIVENESS_MAX_CONCURRENT_PINGS", 50)
+        )
+        # connection -> {"last_activity", "due", "on_dead", "pinging"}
+        self.watched = {}
+        # (due, seq, connection); entries whose due time no longer matches
+        # the watched entry are stale and skipped
+        self.schedule = []
+        self.counter = itertools.count()
+        self.wakeup = None
+        self.task = None
+        self.pings = set()
+        self.ping_slots = None
+
+        self.pings_sent = 0
+        self.ping_failures = 0
+        self.checks_skipped = 0
+        self.closed_dead = 0
+
+    async def start(self) -> None:
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.ping_slots = asyncio.Semaphore(self.max_concurrent_pings)
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        tasks = [task for task in [self.task, *self.pings] if task is not None]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.task = None
+        self.pings.clear()
+        self.watched.clear()
+        self.schedule.clear()
+
+    def watch(self, connection, on_dead=None) -> None:
+        """
+        Starts checking a connection. on_dead(connection) is awaited when it
+        stops answering pings.
+        """
+        now = time.monotonic()
+        self.watched[connection] = {
+            "last_activity": now,
+            "due": None,
+            "on_dead": on_dead,
+            "pinging": False,
+        }
+        self._schedule(connection, now + self.idle_interval)
+
+    def unwatch(self, connection) -> None:
+        self.watched.pop(connection, None)
+
+    def touch(self, connection) -> None:
+        """Records traffic on a connection; called for every received frame."""
+        entry = self.watched.get(connection)
+        if entry is not None:
+            entry["last_activity"] = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "watched": len(self.watched),
+            "scheduled": len(self.schedule),
+            "pings_in_flight": len(self.pings),
+            "pings_sent": self.pings_sent,
+            "ping_failures": self.ping_failures,
+            "checks_skipped": self.checks_skipped,
+            "closed_dead": self.closed_dead,
+        }
+
+    def _schedule(self, connection, due: float) -> None:
+        entry = self.watched[connection]
+        entry["due"] = due
+        heapq.heappush(self.schedule, (due, next(self.counter), connection))
+        # Only wake up the loop if this check is now the first one
+        if self.wakeup is not None and self.schedule[0][2] is connection:
+            self.wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            self.wakeup.clear()
+            timeout = None
+            if self.schedule:
+                timeout = max(0, self.schedule[0][0] - time.monotonic())
+            try:
+                async with asyncio.timeout(timeout):
+                    await self.wakeup.wait()
+            except TimeoutError:
+                pass
+
+            now = time.monotonic()
+            while self.schedule and self.schedule[0][0] <= now:
+                due, _, connection = heapq.heappop(self.schedule)
+                entry = self.watched.get(connection)
+                if entry is None or entry["due"] != due or entry["pinging"]:
+                    continue
+
+                idle_until = entry["last_activity"] + self.idle_interval
+                if idle_until > now:
+                    # Traffic since the check was scheduled: no ping needed
+                    self.checks_skipped += 1
+                    self._schedule(connection, idle_until)
+                    continue
+
+                entry["pinging"] = True
+                task = asyncio.create_task(self._ping(connection, entry))
+                self.pings.add(task)
+                task.add_done_callback(self.pings.discard)
+
+    async def _ping(self, connection, entry) -> None:
+        async with self.ping_slots:
+            self.pings_sent += 1
+            try:
+                async with asyncio.timeout(self.ping_timeout):
+                    await ping_connection(connection)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.ping_failures += 1
+                await self._close_dead(connection, entry)
+                return
+
+        entry["pinging"] = False
+        if self.watched.get(connection) is entry:
+            entry["last_activity"] = time.monotonic()
+            self._schedule(connection, entry["last_activity"] + self.idle_interval)
+
+    async def _close_dead(self, connection, entry) -> None:
+        logging.info("Found stale connection, closing it")
+        self.unwatch(connection)
+        self.closed_dead += 1
+        try:
+            if entry["on_dead"] is not None:
+                await entry["on_dead"](connection)
+            elif hasattr(connection, "close"):
+                await connection.close()
+        except Exception:
+            pass
+
+
+liveness_monitor = LivenessMonitor()
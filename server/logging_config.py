@@ -0,0 +1,142 @@
+"""
+Logging setup shared by the server modules.
+
+Records are put on an in-memory queue by a QueueHandler and written to stdout
+by a QueueListener thread, so a log call on the event loop never blocks on
+the terminal or the container log driver. Output is one JSON object per line
+(LOG_FORMAT=json, the default) or plain text (LOG_FORMAT=text); fields passed
+with extra= become JSON keys.
+
+LOG_LEVEL sets the root level and LOG_LEVELS overrides it per module, e.g.
+LOG_LEVELS=proxy=DEBUG,gemini_client=WARNING. Per-frame events are logged
+with extra={"sampled": True} and only one in LOG_SAMPLE_EVERY of them is
+written per call site.
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+from datetime import datetime, timezone
+
+# LogRecord attributes that are not extra= fields
+RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+_listener = None
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, with the extra= fields as keys."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and key != "sampled":
+                entry[key] = value
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class LogQueueHandler(logging.handlers.QueueHandler):
+    """
+    Renders only the message and traceback on the caller's thread; the
+    JSON or text formatting happens on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.message = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Lets through one in `every` records marked sampled, counted per call
+    site; the kept record carries the sample rate.
+    """
+
+    def __init__(self, every: int):
+        super().__init__()
+        self.every = max(1, every)
+        self.counts = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not getattr(record, "sampled", False):
+            return True
+        site = (record.pathname, record.lineno)
+        count = self.counts.get(site, 0)
+        self.counts[site] = count + 1
+        if count % self.every:
+            return False
+        record.sample_rate = self.every
+        return True
+
+
+def parse_levels(value: str) -> dict:
+    """'proxy=DEBUG,gemini_client=WARNING' -> {'proxy': 'DEBUG', ...}"""
+    levels = {}
+    for item in value.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging() -> None:
+    """Installs the queue handler on the root logger; safe to call twice."""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_format = os.environ.get("LOG_FORMAT", "json").lower()
+    stream = logging.StreamHandler(sys.stdout)
+    if log_format == "json":
+        stream.setFormatter(JsonFormatter())
+    else:
+        stream.setFormatter(
+            logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+    records = queue.SimpleQueue()
+    handler = LogQueueHandler(records)
+    handler.addFilter(SamplingFilter(int(os.environ.get("LOG_SAMPLE_EVERY", 100))))
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(os.environ.get("LOG_LEVEL", "INFO").upper())
+    for name, level in parse_levels(os.environ.get("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(level)
+
+    if log_format == "json":
+        # uvicorn's own handlers write synchronously and in text
+        for name in ["uvicorn", "uvicorn.error", "uvicorn.access"]:
+            logging.getLogger(name).handlers = []
+            logging.getLogger(name).propagate = True
+
+    _listener = logging.handlers.QueueListener(
+        records, stream, respect_handler_level=True
+    )
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flushes the queued records and stops the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
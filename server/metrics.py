@@ -0,0 +1,315 @@
+"""
+Prometheus metrics for the proxy and the REST API, served by GET /metrics.
+
+Counters, gauges and histograms are kept in plain Python objects and only
+turned into the text exposition format when scraped, so an observation on
+the hot path is an attribute increment (plus a bisect for histograms). Hot
+paths bind the labelled child once, e.g. per proxy direction, instead of
+looking it up per frame. The existing stats() of the response writer,
+Gemini pool, frame queues, liveness monitor and caches are exported as
+gauges by collectors registered at startup.
+
+METRICS=0 turns off the per-frame proxy instrumentation; everything else is
+always on.
+"""
+
+import bisect
+import os
+import time
+
+from pymongo import monitoring
+
+ENABLED = os.environ.get("METRICS", "1") != "0"
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds; frames are forwarded in microseconds, requests take milliseconds
+FRAME_BUCKETS = (
+    0.00005,
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def label_text(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount=1) -> None:
+        self.value += amount
+
+
+class GaugeChild(CounterChild):
+    __slots__ = ()
+
+    def set(self, value) -> None:
+        self.value = value
+
+    def dec(self, amount=1) -> None:
+        self.value -= amount
+
+
+class HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metric:
+    """A metric family; labels() returns (and keeps) the child for a value set."""
+
+    kind = "untyped"
+    child_class = CounterChild
+
+    def __init__(self, name: str, help: str, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.children = {}
+
+    def labels(self, *values):
+        values = tuple(str(value) for value in values)
+        child = self.children.get(values)
+        if child is None:
+            child = self.children[values] = self.new_child()
+        return child
+
+    def new_child(self):
+        return self.child_class()
+
+    def samples(self):
+        for values, child in self.children.items():
+            yield self.name, label_text(self.labelnames, values), child.value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for name, labels, value in self.samples():
+            lines.append(f"{name}{labels} {format_value(value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1) -> None:
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    kind = "gauge"
+    child_class = GaugeChild
+
+    def set(self, value) -> None:
+        self.labels().set(value)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def new_child(self):
+        return HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def samples(self):
+        for values, child in self.children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                labels = label_text(
+                    self.labelnames, values, f'le="{format_value(bound)}"'
+                )
+                yield f"{self.name}_bucket", labels, cumulative
+            labels = label_text(self.labelnames, values)
+            yield f"{self.name}_sum", labels, child.sum
+            yield f"{self.name}_count", labels, child.count
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+        self.collectors = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def add_collector(self, prefix: str, stats) -> None:
+        """Exports the numeric values of stats() as {prefix}_{key} gauges."""
+        self.collectors.append((prefix, stats))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines += metric.render()
+        for prefix, stats in self.collectors:
+            for key, value in stats().items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{prefix}_{key}"
+                lines += [f"# TYPE {name} gauge", f"{name} {format_value(value)}"]
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+proxy_frames = registry.register(
+    Counter("proxy_frames_total", "Frames received by the proxy", ["direction"])
+)
+proxy_bytes = registry.register(
+    Counter("proxy_bytes_total", "Bytes received by the proxy", ["direction"])
+)
+proxy_forward_seconds = registry.register(
+    Histogram(
+        "proxy_forward_seconds",
+        "Time from receiving a frame to handing it to the other side",
+        ["direction"],
+        FRAME_BUCKETS,
+    )
+)
+tool_call_seconds = registry.register(
+    Histogram(
+        "proxy_tool_call_seconds",
+        "Time to handle a Gemini tool call and send its response",
+        ["tool"],
+    )
+)
+gemini_connect_seconds = registry.register(
+    Histogram(
+        "gemini_connect_seconds",
+        "Time to get a Gemini connection, from the pool or a new one",
+        ["source"],
+    )
+)
+mongo_command_seconds = registry.register(
+    Histogram(
+        "mongo_command_seconds",
+        "MongoDB command latency",
+        ["command", "collection"],
+    )
+)
+mongo_command_failures = registry.register(
+    Counter(
+        "mongo_command_failures_total",
+        "MongoDB commands that failed",
+        ["command", "collection"],
+    )
+)
+vad_suppressed_ratio = registry.register(
+    Histogram(
+        "vad_suppressed_ratio",
+        "Share of the candidate's audio chunks suppressed as silence, per session",
+        buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1),
+    )
+)
+http_request_seconds = registry.register(
+    Histogram(
+        "http_request_seconds",
+        "REST request latency by route template",
+        ["method", "route", "status"],
+    )
+)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Command monitoring listener feeding mongo_command_seconds."""
+
+    def __init__(self):
+        self.collections = {}
+
+    def started(self, event) -> None:
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            # getMore carries the cursor id, the collection is separate
+            target = event.command.get("collection", "")
+        self.collections[(event.connection_id, event.request_id)] = target
+
+    def succeeded(self, event) -> None:
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        mongo_command_seconds.labels(event.command_name, collection).observe(
+            event.duration_micros / 1_000_000
+        )
+
+    def failed(self, event) -> None:
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        mongo_command_seconds.labels(event.command_name, collection).observe(
+            event.duration_micros / 1_000_000
+        )
+        mongo_command_failures.labels(event.command_name, collection).inc()
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware timing every HTTP request until its last byte is sent.
+    Requests are labelled with the route template, not the raw path, so ids
+    do not create new series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            http_request_seconds.labels(
+                scope["method"],
+                route.path if route is not None else "unmatched",
+                status,
+            ).observe(time.perf_counter() - start)
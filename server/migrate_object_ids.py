@@ -0,0 +1,121 @@
+"""
+One-time migration of foreign keys stored as strings to ObjectId.
+
+Older interview questions kept job_vacancy_id exactly as the client sent
+it, so lookups had to try both types. This converts every foreign key
+listed in FOREIGN_KEYS that is a valid ObjectId hex string, in _id order and
+in batches. Progress is checkpointed in the migrations collection after each
+batch, so an interrupted run resumes where it stopped; rerunning a finished
+migration only looks at documents added since. Strings that are not valid
+ObjectIds are left untouched and reported.
+
+Usage (from the server directory):
+    python migrate_object_ids.py [--batch-size 1000] [--dry-run | --restart]
+"""
+
+import argparse
+import asyncio
+
+from bson.objectid import ObjectId
+from dotenv import load_dotenv
+from pymongo import UpdateOne
+
+from database import close_client, get_db
+
+MIGRATION_ID = "foreign_keys_to_object_id"
+
+FOREIGN_KEYS = {
+    "interview_questions": ["job_vacancy_id"],
+    "candidates": ["job_vacancy_id"],
+    "interviews": ["candidate_id", "job_vacancy_id"],
+    "interview_responses": ["interview_id", "candidate_id", "job_vacancy_id"],
+    "interview_questions_asked": ["interview_id", "candidate_id", "job_vacancy_id"],
+}
+
+
+async def migrate_field(
+    db, collection: str, field: str, batch_size: int, dry_run: bool
+) -> dict:
+    key = f"{collection}.{field}"
+    state = await db.migrations.find_one({"_id": MIGRATION_ID}) or {}
+    last_id = state.get("progress", {}).get(key)
+    counts = {"converted": 0, "invalid": 0}
+
+    while True:
+        query = {field: {"$type": "string"}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        documents = (
+            await db[collection]
+            .find(query, {field: 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+            .to_list(None)
+        )
+        if not documents:
+            break
+
+        operations = []
+        for document in documents:
+            value = document[field]
+            if ObjectId.is_valid(value):
+                # The value is part of the filter, so a concurrent write
+                # to the same document is never overwritten
+                operations.append(
+                    UpdateOne(
+                        {"_id": document["_id"], field: value},
+                        {"$set": {field: ObjectId(value)}},
+                    )
+                )
+            else:
+                counts["invalid"] += 1
+                print(f"{key}: {document['_id']} has invalid id {value!r}")
+        last_id = documents[-1]["_id"]
+
+        if not dry_run:
+            if operations:
+                result = await db[collection].bulk_write(operations, ordered=False)
+                counts["converted"] += result.modified_count
+            await db.migrations.update_one(
+                {"_id": MIGRATION_ID},
+                {"$set": {f"progress.{key}": last_id}},
+                upsert=True,
+            )
+        else:
+            counts["converted"] += len(operations)
+
+    return counts
+
+
+async def migrate(batch_size: int = 1000, dry_run: bool = False) -> None:
+    db = get_db()
+    for collection, fields in FOREIGN_KEYS.items():
+        for field in fields:
+            counts = await migrate_field(db, collection, field, batch_size, dry_run)
+            verb = "would convert" if dry_run else "converted"
+            print(
+                f"{collection}.{field}: {verb} {counts['converted']}, "
+                f"invalid {counts['invalid']}"
+            )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Foreign keys to ObjectId")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    # A dry run never writes, so it cannot drop the saved progress either
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--dry-run", action="store_true")
+    mode.add_argument(
+        "--restart", action="store_true", help="ignore the saved progress"
+    )
+    args = parser.parse_args()
+
+    if args.restart:
+        await get_db().migrations.delete_one({"_id": MIGRATION_ID})
+    await migrate(args.batch_size, args.dry_run)
+    await close_client()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    asyncio.run(main())
@@ -0,0 +1,230 @@
+"""
+Local stand-in for the Gemini Live BidiGenerateContent WebSocket service.
+
+Lets the /ws endpoint be exercised and benchmarked without the real model:
+point the proxy to it with GEMINI_SERVICE_URL=ws://127.0.0.1:9000/ws and run
+
+    python mock_gemini.py --port 9000 --mode script
+
+Modes:
+- "script": plays an interview. Every model turn is --response-seconds of
+  24 kHz audio; after --turn-frames candidate audio frames (or a client
+  turn_complete) it calls save_response with the next question tag taken
+  from the system prompt, and end_interview after the last one.
+- "echo": answers every candidate audio frame with a serverContent audio
+  frame carrying the same data, for round-trip latency measurements.
+- "stream": streams model audio continuously, regardless of the client.
+
+--latency/--jitter delay each model response, --audio-rate speeds up or
+slows down the audio stream relative to real time and --read-delay makes
+the server a slow reader.
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import re
+
+import websockets
+
+OUTPUT_RATE = 24000
+CHUNK_SECONDS = 0.04
+
+
+def audio_message(data: str) -> str:
+    return json.dumps(
+        {
+            "serverContent": {
+                "modelTurn": {
+                    "parts": [
+                        {
+                            "inlineData": {
+                                "mimeType": f"audio/pcm;rate={OUTPUT_RATE}",
+                                "data": data,
+                            }
+                        }
+                    ]
+                }
+            }
+        }
+    )
+
+
+class MockGemini:
+    """
+    Serves one simulated Gemini Live session per WebSocket connection.
+    """
+
+    def __init__(
+        self,
+        mode: str = "script",
+        response_seconds: float = 2.0,
+        audio_rate: float = 1.0,
+        turn_frames: int = 20,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        read_delay: float = 0.0,
+    ):
+        self.mode = mode
+        self.response_seconds = response_seconds
+        self.audio_rate = audio_rate
+        self.turn_frames = turn_frames
+        self.latency = latency
+        self.jitter = jitter
+        self.read_delay = read_delay
+
+        chunk_bytes = int(OUTPUT_RATE * CHUNK_SECONDS) * 2
+        self.chunk = audio_message(
+            base64.b64encode(os.urandom(chunk_bytes)).decode("ascii")
+        )
+        self.sessions = 0
+        self.frames_received = 0
+        self.frames_sent = 0
+
+    async def think(self):
+        """Injected model latency."""
+        delay = self.latency + random.uniform(0, self.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def speak(self, websocket, seconds: float):
+        """Streams a model turn of the given length, then turnComplete."""
+        await self.think()
+        for _ in range(max(1, round(seconds / CHUNK_SECONDS))):
+            await websocket.send(self.chunk)
+            self.frames_sent += 1
+            await asyncio.sleep(CHUNK_SECONDS / self.audio_rate)
+        await websocket.send(json.dumps({"serverContent": {"turnComplete": True}}))
+
+    async def tool_call(self, websocket, name: str, args: dict = None):
+        await self.think()
+        call = {"id": f"call-{random.getrandbits(32):08x}", "name": name}
+        if args is not None:
+            call["args"] = args
+        await websocket.send(json.dumps({"toolCall": {"functionCalls": [call]}}))
+
+    async def handler(self, websocket):
+        self.sessions += 1
+        try:
+            setup = json.loads(await websocket.recv())
+            system_prompt = (
+                setup.get("setup", {})
+                .get("system_instruction", {})
+                .get("parts", [{}])[0]
+                .get("text", "")
+            )
+            await websocket.send(json.dumps({"setupComplete": {}}))
+
+            if self.mode == "stream":
+                streaming = asyncio.create_task(self.stream(websocket))
+                try:
+                    await self.read(websocket)
+                finally:
+                    streaming.cancel()
+            elif self.mode == "echo":
+                await self.echo(websocket)
+            else:
+                # Only the numbered question lines, not the tool descriptions
+                tags = re.findall(
+                    r"^\d+\. .* \(tag: ([^)]*)\)$", system_prompt, re.M
+                ) or ["pergunta_1"]
+                await self.script(websocket, tags)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self.sessions -= 1
+
+    async def read(self, websocket):
+        async for _ in websocket:
+            self.frames_received += 1
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+
+    async def stream(self, websocket):
+        while True:
+            await websocket.send(self.chunk)
+            self.frames_sent += 1
+            await asyncio.sleep(CHUNK_SECONDS / self.audio_rate)
+
+    async def echo(self, websocket):
+        async for message in websocket:
+            self.frames_received += 1
+            data = json.loads(message)
+            for chunk in data.get("realtime_input", {}).get("media_chunks", []):
+                await websocket.send(audio_message(chunk["data"]))
+                self.frames_sent += 1
+            if self.read_delay:
+                await asyncio.sleep(self.read_delay)
+
+    async def script(self, websocket, tags: list):
+        """Question, answer, save_response ... end_interview."""
+        for index, tag in enumerate(tags):
+            await self.speak(websocket, self.response_seconds)
+
+            # Wait for the candidate to answer
+            frames = 0
+            async for message in websocket:
+                self.frames_received += 1
+                if self.read_delay:
+                    await asyncio.sleep(self.read_delay)
+                data = json.loads(message)
+                if "realtime_input" in data:
+                    frames += 1
+                turn_complete = data.get("client_content", {}).get("turn_complete")
+                if frames >= self.turn_frames or turn_complete:
+                    break
+
+            await self.tool_call(
+                websocket,
+                "save_response",
+                {"tag": tag, "response": f"Resposta simulada {index + 1}"},
+            )
+
+            # The proxy answers the tool call itself
+            async for message in websocket:
+                self.frames_received += 1
+                if "tool_response" in message:
+                    break
+
+        await self.speak(websocket, self.response_seconds)
+        await self.tool_call(websocket, "end_interview")
+        await self.read(websocket)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Mock Gemini Live server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    parser.add_argument(
+        "--mode", choices=["script", "echo", "stream"], default="script"
+    )
+    parser.add_argument("--response-seconds", type=float, default=2.0)
+    parser.add_argument("--audio-rate", type=float, default=1.0)
+    parser.add_argument("--turn-frames", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--read-delay", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = MockGemini(
+        mode=args.mode,
+        response_seconds=args.response_seconds,
+        audio_rate=args.audio_rate,
+        turn_frames=args.turn_frames,
+        latency=args.latency,
+        jitter=args.jitter,
+        read_delay=args.read_delay,
+    )
+    async with websockets.serve(mock.handler, args.host, args.port, max_size=None):
+        print(f"Mock Gemini ({args.mode}) listening on ws://{args.host}:{args.port}/ws")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except KeyboardInterrupt:
+        pass
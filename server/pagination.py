@@ -0,0 +1,115 @@
+"""
+Keyset (cursor) pagination and field projection for the list endpoints.
+
+Pages are read with a range query on the sort key instead of skip(), so
+every page costs the same no matter how deep the client goes, and only one
+page of documents is ever held in memory. The cursor handed back to the
+client is the sort value and _id of the last document of the page, encoded
+as URL-safe base64; _id breaks ties between equal sort values.
+
+PAGE_SIZE_DEFAULT is used when the request has no limit and PAGE_SIZE_MAX
+caps it.
+"""
+
+import base64
+import os
+import re
+from datetime import datetime
+
+from bson import json_util
+from bson.objectid import ObjectId
+from fastapi import HTTPException
+
+DEFAULT_PAGE_SIZE = int(os.environ.get("PAGE_SIZE_DEFAULT", 100))
+MAX_PAGE_SIZE = int(os.environ.get("PAGE_SIZE_MAX", 1000))
+
+FIELD_NAME = re.compile(r"^[A-Za-z0-9_]+(\.[A-Za-z0-9_]+)*$")
+
+# Types a sort value can have; anything else (a dict would be read as query
+# operators) means the cursor was not issued by encode_cursor
+CURSOR_VALUE_TYPES = (str, int, float, ObjectId, datetime, type(None))
+
+
+def encode_cursor(document: dict, sort_field: str) -> str:
+    key = [document.get(sort_field), document["_id"]]
+    return base64.urlsafe_b64encode(json_util.dumps(key).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        value, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if not isinstance(value, CURSOR_VALUE_TYPES) or not isinstance(last_id, ObjectId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return [value, last_id]
+
+
+def page_size(limit: int = None) -> int:
+    if limit is None:
+        return DEFAULT_PAGE_SIZE
+    if limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be positive")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def parse_fields(fields: str = None, *required: str):
+    """
+    Turns ?fields=a,b.c into a projection, or None for whole documents.
+    The required fields (the pagination key) are always included.
+    """
+    if not fields:
+        return None
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    for name in names:
+        if not FIELD_NAME.match(name):
+            raise HTTPException(status_code=400, detail=f"Invalid field: {name}")
+    return {name: 1 for name in [*names, *required]}
+
+
+async def paginate(
+    collection,
+    query: dict,
+    sort_field: str = "_id",
+    direction: int = 1,
+    cursor: str = None,
+    limit: int = None,
+    fields: str = None,
+):
+    """
+    Returns (documents, next_cursor) for one page of a query sorted by
+    sort_field and _id in the given direction. next_cursor is None on the
+    last page.
+    """
+    size = page_size(limit)
+    compare = "$gt" if direction == 1 else "$lt"
+
+    if cursor:
+        value, last_id = decode_cursor(cursor)
+        if sort_field == "_id":
+            after = {"_id": {compare: last_id}}
+        else:
+            after = {
+                "$or": [
+                    {sort_field: {compare: value}},
+                    {sort_field: value, "_id": {compare: last_id}},
+                ]
+            }
+        query = {"$and": [query, after]} if query else after
+
+    sort = [(sort_field, direction)]
+    if sort_field != "_id":
+        sort.append(("_id", direction))
+
+    documents = (
+        await collection.find(query, parse_fields(fields, sort_field, "_id"))
+        .sort(sort)
+        .limit(size + 1)
+        .to_list(None)
+    )
+
+    next_cursor = None
+    if len(documents) > size:
+        documents = documents[:size]
+        next_cursor = encode_cursor(documents[-1], sort_field)
+    return documents, next_cursor
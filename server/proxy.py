@@ -1,61 +1,151 @@
 import asyncio
-import json
-import traceback
+import logging
+import time
+import uuid
 import websockets
 import os
 import re
-from datetime import datetime
 from websockets.legacy.protocol import WebSocketCommonProtocol
 from websockets.legacy.server import WebSocketServerProtocol
-from gemini_client import GeminiClient
-from pymongo import MongoClient
 from bson.objectid import ObjectId
+import audio_coalescer
+import audio_frames
+import codec
+import metrics
+from database import get_db
+from downstream_audio import DownstreamAudio
+from response_writer import response_writer
+from session_registry import session_registry
+from setup_cache import setup_cache
+from frame_queue import FrameQueue, QueueClosed, drain_queue
+from gemini_client import GeminiClient
+from liveness import liveness_monitor
+from recorder import TRACKS, recorder, save_recording
+from turn_latency import TurnTimeline, save_turn_latency
+import vad
 
-DEBUG = True
+logger = logging.getLogger(__name__)
 
 # Track active client connections
 active_client_connections = set()
 
-# MongoDB connection
-mongo_client = MongoClient(os.environ.get("MONGODB_URI"))
-mongo_client_db = mongo_client.hr_conversational_ai
+# Only a handful of messages need to be inspected by the proxy: the client
+# `setup` (rewritten into the Gemini setup) and the Gemini `toolCall`s. Every
+# other frame - essentially all of the audio in both directions - is forwarded
+# as-is, so we sniff for the key on the raw text instead of parsing the JSON.
+DECODE_MARKERS = {
+    "Client->Server": '"setup"',
+    "Server->Client": '"toolCall"',
+}
+
+
+def is_passthrough(message: str, name: str) -> bool:
+    """
+    Tells whether a raw message can be forwarded without being decoded.
+    A false negative only costs a decode, so matching the quoted key
+    anywhere in the frame is enough.
+    """
+    marker = DECODE_MARKERS.get(name)
+    return marker is not None and marker not in message
+
+
+# Audio frames are the only ones a full frame queue may drop or merge
+AUDIO_MARKERS = {
+    "Client->Server": '"realtime_input"',
+    "Server->Client": '"inlineData"',
+}
+# Server messages that must reach the browser even if they carry audio
+CONTROL_MARKERS = ('"turnComplete"', '"interrupted"', '"generationComplete"')
+
+
+def is_audio_frame(message: str, name: str) -> bool:
+    """
+    Tells whether a passthrough message only carries audio.
+    """
+    marker = AUDIO_MARKERS.get(name)
+    if marker is None or marker not in message:
+        return False
+    return not any(control in message for control in CONTROL_MARKERS)
+
+
+async def send_message(websocket, message) -> None:
+    """Send a text or binary message through a FastAPI or a websockets socket."""
+    if hasattr(websocket, "send_text"):
+        if isinstance(message, bytes):
+            await websocket.send_bytes(message)
+        else:
+            await websocket.send_text(message)
+    else:
+        await websocket.send(message)
+
+
+async def iter_messages(websocket):
+    """Text and binary messages of a FastAPI websocket, until it disconnects."""
+    while True:
+        message = await websocket.receive()
+        if message["type"] == "websocket.disconnect":
+            return
+        text = message.get("text")
+        yield text if text is not None else message.get("bytes")
+
 
+async def deliver(queue: FrameQueue, websocket, message: str, is_audio=False) -> None:
+    """Queue a message for the websocket's sender task, or send it directly."""
+    if queue is None:
+        await send_message(websocket, message)
+    else:
+        await queue.put(message, is_audio)
 
-def save_response_in_db(
+
+async def forward_client_audio(
+    detector, coalescer, rate: int, pcm: bytes, message, outbox, websocket
+) -> bool:
+    """
+    Runs a client audio chunk through the voice activity detector and the
+    coalescer, when there are, and sends what comes out to Gemini. message
+    is the original realtime_input text, or None when the PCM arrived in a
+    binary frame. Returns whether the chunk was speech.
+    """
+    chunks = [(rate, pcm, message)]
+    speech = True
+    if detector is not None:
+        chunks = detector.process(pcm, rate, chunks[0])
+        speech = detector.speech
+    for rate, pcm, message in chunks:
+        if coalescer is not None and coalescer.takes(rate, len(pcm)):
+            await coalescer.add(rate, pcm)
+        else:
+            if coalescer is not None and coalescer.pending:
+                # Buffered audio, or a timed flush still being sent, goes first
+                await coalescer.flush()
+            if message is None:
+                message = audio_frames.pcm_to_json(rate, pcm)
+            await deliver(outbox, websocket, message, True)
+    return speech
+
+
+async def save_response_in_db(
     interview_id, tag, response, candidate_id=None, job_vacancy_id=None
 ):
+    """
+    Hands the answer to the write-behind writer.
+    The upsert into interview_responses happens in the background, so the
+    tool response can go back to Gemini without waiting for MongoDB.
+    """
     try:
-        # 1. Defina o FILTRO para encontrar o documento
-        # Um documento de resposta é único pela combinação de entrevista, candidato, vaga e a tag da pergunta.
-        filter_doc = {
-            "interview_id": ObjectId(interview_id) if interview_id else None,
-            "candidate_id": ObjectId(candidate_id) if candidate_id else None,
-            "job_vacancy_id": ObjectId(job_vacancy_id) if job_vacancy_id else None,
-            "tag": tag,
-        }
-
-        # 2. Defina a ATUALIZAÇÃO usando o operador $set
-        # Isso diz ao MongoDB para definir (ou atualizar) estes campos.
-        update_doc = {
-            "$set": {
-                "response": response,
-                "answered_at": datetime.utcnow(),
-                "interview_id": ObjectId(interview_id) if interview_id else None,
-                "candidate_id": ObjectId(candidate_id) if candidate_id else None,
-                "job_vacancy_id": ObjectId(job_vacancy_id) if job_vacancy_id else None,
+        await response_writer.enqueue(
+            interview_id, tag, response, candidate_id, job_vacancy_id
+        )
+        logger.info(
+            "Response queued",
+            extra={
+                "interview_id": interview_id,
                 "tag": tag,
-            }
-        }
-
-        # 3. Execute o comando upsert
-        result = mongo_client_db.interview_responses.update_one(
-            filter_doc, update_doc, upsert=True
+                "response_chars": len(response or ""),
+            },
         )
-        print(f"✅ Resposta salva: {tag} = {response}")
-        return str(result.upserted_id)
     except Exception as e:
-        print(f"❌ Erro ao salvar resposta: {e}")
-        return None
+        logger.error(f"Error queueing response: {e}", extra={"tag": tag})
 
 
 async def proxy_task(
@@ -64,142 +154,203 @@ async def proxy_task(
     name: str = "",
     gemini_client: GeminiClient = None,
     interview_state=None,
+    outbox: FrameQueue = None,
+    replies: FrameQueue = None,
+    binary: bool = False,
 ) -> None:
     """
     Forwards messages from one WebSocket connection to another.
+    When given, outbox and replies are the frame queues feeding the target
+    and the source websockets; otherwise messages are sent directly.
+    With binary, the browser side talks the audio_frames subprotocol and
+    audio is converted to and from Gemini's JSON here.
     """
+    # Checked once: per-frame debug records are sampled, but even building
+    # them is skipped unless the proxy logger is at DEBUG
+    log_frames = logger.isEnabledFor(logging.DEBUG)
+    # Labelled metric children are looked up once per direction
+    measure = metrics.ENABLED
+    frames = metrics.proxy_frames.labels(name)
+    frame_bytes = metrics.proxy_bytes.labels(name)
+    forward_seconds = metrics.proxy_forward_seconds.labels(name)
+    # Turn timing: client audio marks the end of speech, Gemini audio the reply
+    timeline = interview_state.get("timeline") if interview_state else None
+    on_audio = None
+    # Silence suppression, on the candidate's audio only
+    detector = None
+    if interview_state and name == "Client->Server":
+        detector = interview_state.get("vad")
+    # Small chunks are joined into fewer, larger messages to Gemini
+    coalescer = None
+    if name == "Client->Server" and audio_coalescer.ENABLED:
+
+        async def send_upstream(message: str) -> None:
+            await deliver(outbox, target_websocket, message, True)
+
+        coalescer = audio_coalescer.AudioCoalescer(send_upstream)
+    if timeline is not None:
+        on_audio = (
+            timeline.client_audio if name == "Client->Server" else timeline.server_audio
+        )
+    to_binary = binary and name == "Server->Client"
+    # Audio is teed to the session's recording as received, before any change
+    recording = interview_state.get("recording") if interview_state else None
+    track = TRACKS.get(name)
     try:
         iterator = (
-            source_websocket.iter_text()
-            if hasattr(source_websocket, "iter_text")
+            iter_messages(source_websocket)
+            if hasattr(source_websocket, "receive")
             else source_websocket
         )
         async for message in iterator:
+            liveness_monitor.touch(source_websocket)
+            received = time.perf_counter()
+            if measure:
+                frames.inc()
+                frame_bytes.inc(len(message))
             try:
                 if isinstance(message, bytes):
+                    if binary and name == "Client->Server":
+                        if recording is not None:
+                            recording.tee(track, message, received)
+                        # Raw PCM from the browser, wrapped for Gemini
+                        rate, pcm = audio_frames.decode_frame(message)
+                        speech = await forward_client_audio(
+                            detector,
+                            coalescer,
+                            rate,
+                            pcm,
+                            None,
+                            outbox,
+                            target_websocket,
+                        )
+                        if speech and on_audio is not None:
+                            on_audio(received)
+                        if measure:
+                            forward_seconds.observe(time.perf_counter() - received)
+                        continue
                     message = message.decode("utf-8")
 
-                data = json.loads(message)
+                # Fast path: audio frames go straight through untouched
+                if is_passthrough(message, name):
+                    if log_frames:
+                        logger.debug(
+                            "Frame forwarded",
+                            extra={
+                                "direction": name,
+                                "bytes": len(message),
+                                "sampled": True,
+                            },
+                        )
+                    is_audio = is_audio_frame(message, name)
+                    if is_audio and recording is not None:
+                        recording.tee(track, message, received)
+                    audio = None
+                    if is_audio and (
+                        detector is not None
+                        or (
+                            coalescer is not None
+                            and coalescer.takes(
+                                audio_frames.CLIENT_RATE,
+                                audio_frames.json_pcm_size(message),
+                            )
+                        )
+                    ):
+                        audio = audio_frames.client_json_pcm(message)
+                    if audio is not None:
+                        speech = await forward_client_audio(
+                            detector,
+                            coalescer,
+                            *audio,
+                            message,
+                            outbox,
+                            target_websocket,
+                        )
+                        if speech and on_audio is not None:
+                            on_audio(received)
+                        if measure:
+                            forward_seconds.observe(time.perf_counter() - received)
+                        continue
+                    if name == "Server->Client":
+                        # Negotiated by the other direction at setup time
+                        downstream = (
+                            interview_state.get("downstream")
+                            if interview_state
+                            else None
+                        )
+                        if downstream is not None:
+                            # Audio next to other content (turnComplete, text)
+                            # is transcoded too and stays JSON
+                            converted = downstream.convert(message, to_binary)
+                            if downstream.ends_turn(message):
+                                # What the transcoder held back goes before
+                                # the turn signal
+                                tail = downstream.end_turn(to_binary)
+                                if tail is not None:
+                                    await deliver(outbox, target_websocket, tail, True)
+                            message = converted or message
+                        elif is_audio and to_binary:
+                            message = (
+                                audio_frames.server_json_to_frame(message) or message
+                            )
+                    if coalescer is not None and coalescer.pending:
+                        # Buffered audio goes out before anything else
+                        await coalescer.flush()
+                    await deliver(outbox, target_websocket, message, is_audio)
+                    if is_audio and on_audio is not None:
+                        on_audio(received)
+                    if measure:
+                        forward_seconds.observe(time.perf_counter() - received)
+                    continue
+
+                if coalescer is not None and coalescer.pending:
+                    await coalescer.flush()
+                data = codec.loads(message)
 
                 if "setup" in data and name == "Client->Server":
-                    # Get interview questions if job_vacancy_id is provided
-                    interview_questions = []
-                    question_tags = {}
-                    if "job_vacancy_id" in data.get("setup", {}):
-                        job_vacancy_id = data["setup"]["job_vacancy_id"]
-                        try:
-                            questions = list(
-                                mongo_client_db.interview_questions.find(
-                                    {"job_vacancy_id": job_vacancy_id, "active": True}
-                                )
-                            )
+                    setup = data.get("setup", {})
+                    if "job_vacancy_id" not in setup:
+                        raise Exception("Nenhuma pergunta de entrevista encontrada.")
 
-                            interview_questions = [q["question"] for q in questions]
-                            question_tags = {
-                                q["question"]: q.get("tag", "") for q in questions
-                            }
-                            interview_state["job_vacancy_id"] = job_vacancy_id
-                            interview_state["total_questions"] = len(
-                                interview_questions
-                            )
-                            if "job_candidate_id" in data.get("setup", {}):
-                                interview_state["candidate_id"] = data["setup"][
-                                    "job_candidate_id"
-                                ]
-                        except Exception as e:
-                            print(f"Error fetching interview questions: {e}")
-                            print(f"Full traceback: {traceback.format_exc()}")
-
-                    # --- CONTEXTO (PROMPT) MODIFICADO ---
-                    if interview_questions:
-                        context = "Você é um assistente de voz para pré-entrevistas de emprego. Você é gentil, educado e fala português do Brasil de forma clara e objetiva.\n\n"
-                        context += "MISSÃO: Sua tarefa é fazer uma pré-entrevista com o candidato, fazendo TODAS as perguntas da lista abaixo, UMA DE CADA VEZ, seguindo as regras de ação rigorosamente.\n\n"
-                        context += "PERGUNTAS OBRIGATÓRIAS (na ordem exata):\n"
-
-                        # Este loop onde você insere as perguntas continua igual
-                        for i, question in enumerate(interview_questions, 1):
-                            tag = question_tags.get(question, f"pergunta_{i}")
-                            context += f"{i}. {question} (tag: {tag})\n"
-
-                        context += "\nFERRAMENTAS DISPONÍVEIS:\n"
-                        context += "- save_response(tag: str, response: str): Use esta ferramenta para salvar o resumo da resposta de um candidato. O argumento 'tag' deve ser o identificador da pergunta que foi respondida, e 'response' deve ser a resposta do usuário.\n"
-                        context += "- end_interview(): Use esta ferramenta para encerrar a conexão do websocket.\n"
-
-                        # A seção de regras foi completamente reescrita para ser mais diretiva
-                        context += """
-                        REGRAS DE AÇÃO (TURNO A TURNO):
-                        Você deve seguir estas regras a cada interação.
-
-                        1.  **PARA INICIAR A CONVERSA:**
-                            - Se a conversa está apenas começando, faça uma BREVE saudação (ex: "Olá! Sou seu assistente para esta pré-entrevista. Vamos começar?") e então faça a **Pergunta 1** da lista.
-
-                        2.  **AO RECEBER UMA RESPOSTA DO CANDIDATO:**
-                            - Sua ÚNICA ação neste momento é sintetizar a resposta que você ouviu e chamar a ferramenta `save_response(tag, response)`.
-                            - **IMPORTANTE:** Não diga "Obrigado", "Certo", nem faça a próxima pergunta ainda. Apenas e somente chame a ferramenta.
-
-                        3.  **APÓS CHAMAR A FERRAMENTA `save_response`:**
-                            - Sua ÚNICA ação é fazer a **PRÓXIMA pergunta** da lista.
-                            - Continue este ciclo (Regra 2 -> Regra 3) para todas as perguntas.
-
-                        4.  **PARA FINALIZAR A CONVERSA:**
-                            - Após você chamar `save_response` para a **ÚLTIMA** pergunta da lista, em vez de procurar uma nova pergunta, suas ações são agradecer ao candidato, encerrar a conversa de forma profissional.
-
-                        5.  **PARA ENCERRAR A CONEXÂO:**
-                            - Chame a tool `end_interview()` para encerrar a conexão do websocket.
-                        """
-                    else:
+                    # Foreign keys are stored as ObjectId, so an invalid id
+                    # cannot have any questions
+                    job_vacancy_id = setup["job_vacancy_id"]
+                    if not ObjectId.is_valid(job_vacancy_id):
                         raise Exception("Nenhuma pergunta de entrevista encontrada.")
 
-                    gemini_setup = {
-                        "setup": {
-                            "model": "models/gemini-2.5-flash-preview-native-audio-dialog",
-                            "generation_config": {
-                                "response_modalities": ["audio"],
-                                "speech_config": {
-                                    "voice_config": {
-                                        "prebuilt_voice_config": {
-                                            "voice_name": "Aoede",
-                                        },
-                                    },
-                                },
-                            },
-                            "system_instruction": {"parts": [{"text": context}]},
-                            "tools": [
-                                {
-                                    "function_declarations": [
-                                        {
-                                            "name": "save_response",
-                                            "description": "Salva a resposta do candidato.",
-                                            "parameters": {
-                                                "type": "object",
-                                                "properties": {
-                                                    "tag": {
-                                                        "type": "string",
-                                                        "description": "A tag da pergunta.",
-                                                    },
-                                                    "response": {
-                                                        "type": "string",
-                                                        "description": "A resposta do candidato.",
-                                                    },
-                                                },
-                                                "required": ["tag", "response"],
-                                            },
-                                        },
-                                        {
-                                            "name": "end_interview",
-                                            "description": "Encerra a entrevista, finalizando a conexão do websocket.",
-                                        },
-                                    ]
-                                }
-                            ],
-                        },
-                    }
-                    await target_websocket.send(json.dumps(gemini_setup))
+                    # Prompt and setup payload are built once per job vacancy
+                    gemini_setup = await setup_cache.get(job_vacancy_id)
+
+                    interview_state["job_vacancy_id"] = job_vacancy_id
+                    interview_state["total_questions"] = gemini_setup["total_questions"]
+                    if ObjectId.is_valid(setup.get("job_candidate_id")):
+                        interview_state["candidate_id"] = setup["job_candidate_id"]
+                    if ObjectId.is_valid(setup.get("interview_id")):
+                        interview_state["interview_id"] = setup["interview_id"]
+
+                    await deliver(outbox, target_websocket, gemini_setup["payload"])
+
+                    # Compact audio for clients on slow networks
+                    downstream = DownstreamAudio.negotiate(setup.get("audio_output"))
+                    if downstream is not None:
+                        interview_state["downstream"] = downstream
+                        await deliver(
+                            replies,
+                            source_websocket,
+                            codec.dumps({"audioOutput": downstream.describe()}),
+                        )
+                    await session_registry.update(
+                        interview_state.get("session_id"),
+                        job_vacancy_id=job_vacancy_id,
+                        candidate_id=interview_state.get("candidate_id"),
+                    )
                     continue
                 # Handler para tool call do Gemini (CORRIGIDO)
-                if "toolCall" in data and name == "Server->Client": # Mensagem vinda do Gemini
+                if (
+                    "toolCall" in data and name == "Server->Client"
+                ):  # Mensagem vinda do Gemini
                     function_calls = data["toolCall"]["functionCalls"]
-                    
+
                     # Assumindo uma chamada de ferramenta por vez, como no seu fluxo
                     if function_calls:
                         tool_call = function_calls[0]
@@ -208,37 +359,52 @@ async def proxy_task(
                             args = tool_call.get("args", {})
                             tag = args.get("tag")
                             response = args.get("response")
-                            print(f"💾 Recebida resposta via Tool - Tag: {tag}")
+                            logger.info(
+                                "save_response tool call",
+                                extra={
+                                    "session_id": interview_state.get("session_id"),
+                                    "tag": tag,
+                                },
+                            )
+
+                            if timeline is not None:
+                                timeline.tool_call(received)
 
                             # 1. Salva a resposta no banco de dados (seu código original)
-                            save_response_in_db(
+                            save_started = time.perf_counter()
+                            await save_response_in_db(
                                 interview_id=interview_state.get("interview_id"),
                                 tag=tag,
                                 response=response,
                                 candidate_id=interview_state.get("candidate_id"),
                                 job_vacancy_id=interview_state.get("job_vacancy_id"),
                             )
+                            if timeline is not None:
+                                timeline.saved(time.perf_counter() - save_started)
 
                             # Construa o payload com a estrutura exata que a API espera.
                             # O valor de 'tool_response' é um objeto contendo o 'id' e o 'output'.
                             tool_response_payload = {
                                 "tool_response": {
-                                    "function_responses": 
-                                    {
+                                    "function_responses": {
                                         "id": tool_call.get("id"),
                                         "name": tool_call.get("name"),
                                         "response": {
                                             "result": "Resposta salva com sucesso."
-                                        }
+                                        },
                                     }
                                 }
                             }
 
-                            json_string_to_send = json.dumps(tool_response_payload)
-                            if hasattr(source_websocket, "send_text"):
-                                await source_websocket.send_text(json_string_to_send)
-                            else:
-                                await source_websocket.send(json_string_to_send)
+                            json_string_to_send = codec.dumps(tool_response_payload)
+                            await deliver(
+                                replies, source_websocket, json_string_to_send
+                            )
+                            if timeline is not None:
+                                timeline.tool_response_sent(time.perf_counter())
+                            metrics.tool_call_seconds.labels("save_response").observe(
+                                time.perf_counter() - received
+                            )
 
                             # 5. Continue para a próxima iteração do loop
                             #    Isso impede que a mensagem original seja encaminhada ao cliente final.
@@ -246,48 +412,48 @@ async def proxy_task(
                             # --- FIM DA CORREÇÃO ---
 
                         elif tool_call.get("name") == "end_interview":
-                            print("🏁 Entrevista finalizada.")
+                            logger.info(
+                                "Interview finished",
+                                extra={"session_id": interview_state.get("session_id")},
+                            )
                             args = tool_call.get("args", {})
 
                             interview_state["interview_completed"] = True
 
                             # Envia o JSON final de volta para o cliente original
                             await gemini_client.cleanup_connection(target_websocket)
+                            metrics.tool_call_seconds.labels("end_interview").observe(
+                                time.perf_counter() - received
+                            )
 
                             # Pula o resto do processamento para esta mensagem, pois a entrevista acabou
                             continue
-                # Forward the message
-                if hasattr(target_websocket, "send_text"):
-                    await target_websocket.send_text(json.dumps(data))
-                else:
-                    await target_websocket.send(json.dumps(data))
+                # Forward the message as it was received
+                await deliver(outbox, target_websocket, message)
+                if measure:
+                    forward_seconds.observe(time.perf_counter() - received)
 
-            except websockets.exceptions.ConnectionClosed as e:
+            except (websockets.exceptions.ConnectionClosed, QueueClosed) as e:
                 break
             except Exception as e:
-                print(f"\n{name} Error processing message:")
-                print("=" * 80)
-                print(f"Error details: {str(e)}")
-                print(f"Full traceback:\n{traceback.format_exc()}")
-                print("=" * 80)
+                logger.exception(
+                    f"Error processing message: {e}", extra={"direction": name}
+                )
 
     except websockets.exceptions.ConnectionClosed as e:
-        print(f"\n{name} connection closed:")
-        print("=" * 80)
-        print(f"Close code: {e.code}")
-        print("Close reason (full):")
-        print("-" * 40)
-        print(e.reason)
-        print("=" * 80)
+        logger.info(
+            "Connection closed",
+            extra={"direction": name, "code": e.code, "reason": e.reason},
+        )
     except Exception as e:
-        print(f"\n{name} Error:")
-        print("=" * 80)
-        print(f"Error details: {str(e)}")
-        print(f"Full traceback:\n{traceback.format_exc()}")
-        print("=" * 80)
+        logger.exception(f"Proxy error: {e}", extra={"direction": name})
     finally:
         # Clean up connections when done
-        print(f"{name} cleaning up connection")
+        logger.debug("Cleaning up connection", extra={"direction": name})
+        if coalescer is not None:
+            coalescer.close()
+        if outbox is not None:
+            outbox.close()
         if gemini_client and target_websocket:
             await gemini_client.cleanup_connection(target_websocket)
 
@@ -296,6 +462,7 @@ async def create_proxy(
     client_websocket: WebSocketCommonProtocol,
     gemini_client: GeminiClient,
     interview_state,
+    binary: bool = False,
 ) -> None:
     """
     Establishes a WebSocket connection to the server and creates two tasks for
@@ -304,6 +471,16 @@ async def create_proxy(
     try:
         # Authenticate and connect to Gemini
         server_websocket, bearer_token = await gemini_client.authenticate_and_connect()
+        if hasattr(client_websocket, "ping"):
+            liveness_monitor.watch(client_websocket)
+
+        # Bounded queues so that a slow peer only backs up its own direction
+        to_server = FrameQueue("Client->Server")
+        to_client = FrameQueue("Server->Client")
+        senders = [
+            asyncio.create_task(drain_queue(to_server, server_websocket, send_message)),
+            asyncio.create_task(drain_queue(to_client, client_websocket, send_message)),
+        ]
 
         # Create bidirectional proxy tasks
         client_to_server = asyncio.create_task(
@@ -313,6 +490,9 @@ async def create_proxy(
                 "Client->Server",
                 gemini_client,
                 interview_state,
+                outbox=to_server,
+                replies=to_client,
+                binary=binary,
             )
         )
         server_to_client = asyncio.create_task(
@@ -322,18 +502,23 @@ async def create_proxy(
                 "Server->Client",
                 gemini_client,
                 interview_state,
+                outbox=to_client,
+                replies=to_server,
+                binary=binary,
             )
         )
 
         try:
             # Wait for both tasks to complete
             await asyncio.gather(client_to_server, server_to_client)
+            # Let the senders flush what is left; they stop on closed sockets
+            await asyncio.gather(*senders, return_exceptions=True)
         except Exception as e:
-            print(f"Error during proxy operation: {e}")
-            print(f"Full traceback: {traceback.format_exc()}")
+            logger.exception(f"Error during proxy operation: {e}")
         finally:
+            liveness_monitor.unwatch(client_websocket)
             # Clean up tasks
-            for task in [client_to_server, server_to_client]:
+            for task in [client_to_server, server_to_client, *senders]:
                 if not task.done():
                     task.cancel()
                     try:
@@ -342,30 +527,31 @@ async def create_proxy(
                         pass
 
     except Exception as e:
-        print(f"Error creating proxy connection: {e}")
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(f"Error creating proxy connection: {e}")
 
 
 async def handle_client(
-    client_websocket: WebSocketCommonProtocol, gemini_client: GeminiClient
+    client_websocket: WebSocketCommonProtocol,
+    gemini_client: GeminiClient,
+    session_id: str = None,
+    binary: bool = False,
 ) -> None:
     """
     Handles a new client connection.
+    binary tells whether the client negotiated the audio_frames subprotocol.
     """
-    print("New connection...")
+    logger.info(
+        "New connection", extra={"session_id": session_id, "binary_audio": binary}
+    )
     try:
         # Send auth complete message to client
-        auth_message = json.dumps({"authComplete": True})
-        if hasattr(client_websocket, "send_text"):
-            await client_websocket.send_text(auth_message)
-        else:
-            await client_websocket.send(auth_message)
-        print("Sent auth complete message")
-
-        print("Creating proxy connection")
+        auth_message = codec.dumps({"authComplete": True})
+        await send_message(client_websocket, auth_message)
+        logger.debug("Sent auth complete message", extra={"session_id": session_id})
 
         # Track interview state
         interview_state = {
+            "session_id": session_id,
             "interview_id": None,
             "candidate_id": None,
             "job_vacancy_id": None,
@@ -374,47 +560,30 @@ async def handle_client(
             "total_questions": 0,
             "expecting_final_response": False,
             "interview_completed": False,
+            "timeline": TurnTimeline(),
+            "vad": vad.VoiceActivityDetector() if vad.ENABLED else None,
+            "downstream": None,
+            "recording": await recorder.open(session_id or uuid.uuid4().hex),
         }
 
-        await create_proxy(client_websocket, gemini_client, interview_state)
+        await create_proxy(client_websocket, gemini_client, interview_state, binary)
+        if interview_state["vad"] is not None:
+            interview_state["vad"].close()
+            summary = interview_state["vad"].summary()
+            metrics.vad_suppressed_ratio.observe(summary["suppressed_ratio"])
+            logger.info(
+                "Voice activity summary", extra={"session_id": session_id, **summary}
+            )
+        await save_turn_latency(get_db(), interview_state)
+        await save_recording(get_db(), interview_state)
 
     except asyncio.TimeoutError:
-        print("Timeout in handle_client")
+        logger.warning("Timeout in handle_client", extra={"session_id": session_id})
         if hasattr(client_websocket, "close"):
             await client_websocket.close(code=1008, reason="Auth timeout")
     except Exception as e:
-        print(f"Error in handle_client: {e}")
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(
+            f"Error in handle_client: {e}", extra={"session_id": session_id}
+        )
         if hasattr(client_websocket, "close"):
             await client_websocket.close(code=1011, reason=str(e))
-
-
-async def cleanup_connections(gemini_client: GeminiClient) -> None:
-    """
-    Periodically clean up stale connections
-    """
-    while True:
-        print(f"Active client connections: {len(active_client_connections)}")
-
-        # Clean up client connections
-        for conn in list(active_client_connections):
-            try:
-                if hasattr(conn, "ping"):
-                    await conn.ping()
-            except Exception:
-                print("Found stale client connection, removing...")
-                active_client_connections.remove(conn)
-                try:
-                    if hasattr(conn, "close"):
-                        await conn.close()
-                except Exception:
-                    pass
-
-        # Clean up Gemini connections
-        stale_gemini_connections = await gemini_client.ping_connections()
-        if stale_gemini_connections:
-            print(
-                f"Cleaned up {len(stale_gemini_connections)} stale Gemini connections"
-            )
-
-        await asyncio.sleep(30)  # Check every 30 seconds
\ No newline at end of file
@@ -0,0 +1,404 @@
+"""
+Recording of the interviews' audio, for compliance.
+
+The proxy tees every audio frame of a session, the candidate's and Gemini's,
+into the session's SessionRecording. On the event loop that is only an
+append of the message as it was received to a buffer bounded by
+RECORDING_BUFFER_BYTES: nothing is decoded or written there. Every
+RECORDING_FLUSH_INTERVAL seconds the Recorder hands what each session
+buffered to a pool of RECORDING_WORKERS threads, where the frames are decoded
+and appended to WAV files, one per speaker and segment:
+
+    RECORDING_PATH/<yyyy-mm-dd>/<session_id>/candidate-0001.wav
+    RECORDING_PATH/<yyyy-mm-dd>/<session_id>/interviewer-0001.wav
+    RECORDING_PATH/<yyyy-mm-dd>/<session_id>/index.json
+
+A segment is closed after RECORDING_SEGMENT_SECONDS of audio (or when the
+sample rate changes). index.json lists the closed segments with their rate,
+length and the session times of their first and last frames; it is
+rewritten as each segment closes, so a crash leaves the finished segments
+usable. When the session ends, the path of the index and the totals are
+stored on the interview (`recording`).
+
+Forwarding never waits for the disk: a session whose writer falls behind
+fills its buffer, and the frames that do not fit are dropped and counted
+(in the index and on /metrics). Decoding holds the GIL, so every extra
+writer thread also delays the event loop; one thread keeps up with hundreds
+of sessions, more only help on a slow disk.
+
+RECORDING=1 turns recording on.
+"""
+
+import asyncio
+import logging
+import os
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import audio_frames
+import codec
+from turn_latency import find_interview_id
+
+logger = logging.getLogger(__name__)
+
+TRACKS = {"Client->Server": "candidate", "Server->Client": "interviewer"}
+
+
+def frame_pcm(track: str, message):
+    """(sample_rate, pcm) of a teed audio frame; None if it has no PCM."""
+    if isinstance(message, bytes):
+        try:
+            return audio_frames.decode_frame(message)
+        except audio_frames.FrameError:
+            return None
+    if track == "candidate":
+        return audio_frames.client_json_pcm(message)
+    return audio_frames.server_json_pcm(message)
+
+
+class SessionRecording:
+    """
+    Audio of one session. tee() runs on the event loop; write() and
+    finish() run in the writer pool, one call at a time.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        directory: str,
+        capacity: int,
+        segment_seconds: float,
+        owner: "Recorder",
+    ):
+        self.session_id = session_id
+        self.directory = directory
+        self.capacity = capacity
+        self.segment_seconds = segment_seconds
+        # Recorder whose counters this session adds to
+        self.owner = owner
+        self.started = time.perf_counter()
+        self.started_at = datetime.utcnow()
+
+        # Loop side: (track, received, message) not yet handed to the pool
+        self.frames = []
+        self.buffered = 0
+        self.job = None
+        self.teed = 0
+        self.dropped = 0
+        # Part of the counts already added to the process counters
+        self.counted_teed = 0
+        self.counted_dropped = 0
+
+        # Pool side
+        self.tracks = {}
+        self.numbers = {}
+        self.segments = []
+        self.undecodable = 0
+
+    def tee(self, track: str, message, received: float) -> None:
+        size = len(message)
+        if self.buffered + size > self.capacity:
+            self.dropped += 1
+            return
+        self.frames.append((track, received, message))
+        self.buffered += size
+        self.teed += 1
+
+    def take(self) -> list:
+        frames, self.frames, self.buffered = self.frames, [], 0
+        return frames
+
+    def write(self, frames: list) -> int:
+        """Appends frames to the open segments; returns the PCM bytes."""
+        if frames and not os.path.isdir(self.directory):
+            os.makedirs(self.directory, exist_ok=True)
+        written = 0
+        for track, received, message in frames:
+            audio = frame_pcm(track, message)
+            if audio is None:
+                self.undecodable += 1
+                continue
+            rate, pcm = audio
+            segment = self.tracks.get(track)
+            if segment is not None and (
+                segment["rate"] != rate
+                or segment["samples"] >= self.segment_seconds * rate
+            ):
+                self._close_segment(track)
+                segment = None
+            at = round(received - self.started, 3)
+            if segment is None:
+                segment = self._open_segment(track, rate, at)
+            segment["wav"].writeframesraw(pcm)
+            segment["samples"] += len(pcm) // 2
+            segment["last_at"] = at
+            written += len(pcm)
+        return written
+
+    def finish(self) -> dict:
+        """Closes the open segments and writes the final index."""
+        for track in list(self.tracks):
+            self._close_segment(track, write_index=False)
+        if self.segments:
+            self._write_index(complete=True)
+        return self.summary()
+
+    def summary(self) -> dict:
+        seconds = {}
+        for segment in self.segments:
+            seconds[segment["track"]] = round(
+                seconds.get(segment["track"], 0) + segment["seconds"], 3
+            )
+        return {
+            "index": os.path.join(self.directory, "index.json"),
+            "started_at": self.started_at,
+            "segments": len(self.segments),
+            "seconds": seconds,
+            "frames": self.teed,
+            "dropped": self.dropped,
+            "undecodable": self.undecodable,
+        }
+
+    def _open_segment(self, track: str, rate: int, at: float) -> dict:
+        number = self.numbers[track] = self.numbers.get(track, 0) + 1
+        filename = f"{track}-{number:04d}.wav"
+        wav = wave.open(os.path.join(self.directory, filename), "wb")
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(rate)
+        segment = self.tracks[track] = {
+            "wav": wav,
+            "file": filename,
+            "rate": rate,
+            "samples": 0,
+            "first_at": at,
+            "last_at": at,
+        }
+        return segment
+
+    def _close_segment(self, track: str, write_index: bool = True) -> None:
+        segment = self.tracks.pop(track)
+        # The header only gets its final length here
+        segment["wav"].close()
+        self.segments.append(
+            {
+                "track": track,
+                "file": segment["file"],
+                "rate": segment["rate"],
+                "samples": segment["samples"],
+                "seconds": round(segment["samples"] / segment["rate"], 3),
+                "first_at": segment["first_at"],
+                "last_at": segment["last_at"],
+            }
+        )
+        self.owner.count("segments")
+        if write_index:
+            self._write_index(complete=False)
+
+    def _write_index(self, complete: bool) -> None:
+        index = {
+            "session_id": self.session_id,
+            "started_at": self.started_at.isoformat(),
+            "complete": complete,
+            "frames": self.teed,
+            "dropped": self.dropped,
+            "undecodable": self.undecodable,
+            "segments": self.segments,
+        }
+        path = os.path.join(self.directory, "index.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(codec.dumps(index))
+        os.replace(f"{path}.tmp", path)
+
+
+class Recorder:
+    """
+    Hands the sessions' buffered audio to the writer pool.
+    """
+
+    def __init__(self):
+        self.enabled = os.environ.get("RECORDING", "0") == "1"
+        self.path = os.environ.get("RECORDING_PATH", "data/recordings")
+        self.buffer_bytes = int(os.environ.get("RECORDING_BUFFER_BYTES", 4194304))
+        self.segment_seconds = float(os.environ.get("RECORDING_SEGMENT_SECONDS", 60))
+        self.flush_interval = float(os.environ.get("RECORDING_FLUSH_INTERVAL", 0.5))
+        self.workers = int(os.environ.get("RECORDING_WORKERS", 1))
+        self.sessions = set()
+        self.executor = None
+        self.task = None
+
+        # Counters of the pool threads are updated under the lock
+        self.lock = threading.Lock()
+        self.counters = {
+            "sessions": 0,
+            "frames": 0,
+            "dropped": 0,
+            "bytes_written": 0,
+            "segments": 0,
+            "writes": 0,
+            "write_errors": 0,
+        }
+        self.total_write_ms = 0.0
+
+    async def start(self) -> None:
+        if not self.enabled:
+            return
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(
+                self.workers, thread_name_prefix="recorder"
+            )
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stops the flush loop and finishes every recording still open."""
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+        for recording in list(self.sessions):
+            await self.close(recording)
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    async def open(self, session_id: str):
+        """A SessionRecording for a new session, or None when disabled."""
+        if not self.enabled:
+            return None
+        await self.start()
+        directory = os.path.join(
+            self.path, datetime.utcnow().strftime("%Y-%m-%d"), session_id
+        )
+        recording = SessionRecording(
+            session_id, directory, self.buffer_bytes, self.segment_seconds, self
+        )
+        self.sessions.add(recording)
+        self.count("sessions")
+        return recording
+
+    async def close(self, recording: SessionRecording) -> dict:
+        """Writes what is left of a session; returns its summary."""
+        self.sessions.discard(recording)
+        if recording.job is not None:
+            await asyncio.wrap_future(recording.job)
+        frames = recording.take()
+        self._collect(recording)
+        return await asyncio.get_running_loop().run_in_executor(
+            self.executor, self._finish, recording, frames
+        )
+
+    def count(self, name: str, value: int = 1) -> None:
+        with self.lock:
+            self.counters[name] += value
+
+    def stats(self) -> dict:
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            "enabled": self.enabled,
+            "active": len(self.sessions),
+            "buffered_bytes": sum(recording.buffered for recording in self.sessions),
+            **counters,
+            "avg_write_ms": round(
+                self.total_write_ms / counters["writes"] if counters["writes"] else 0.0,
+                2,
+            ),
+        }
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            for recording in list(self.sessions):
+                self._dispatch(recording)
+
+    def _dispatch(self, recording: SessionRecording) -> None:
+        # One write at a time per session keeps its files in order; frames
+        # keep buffering meanwhile
+        if not recording.frames or (
+            recording.job is not None and not recording.job.done()
+        ):
+            return
+        self._collect(recording)
+        recording.job = self.executor.submit(self._write, recording, recording.take())
+
+    def _collect(self, recording: SessionRecording) -> None:
+        """Moves the loop-side counts of a session to the process counters."""
+        with self.lock:
+            self.counters["frames"] += recording.teed - recording.counted_teed
+            self.counters["dropped"] += recording.dropped - recording.counted_dropped
+        recording.counted_teed = recording.teed
+        recording.counted_dropped = recording.dropped
+
+    def _write(self, recording: SessionRecording, frames: list) -> None:
+        start = time.perf_counter()
+        try:
+            written = recording.write(frames)
+        except Exception as e:
+            # A full or failing disk loses this batch, not the session
+            logger.error(
+                f"Error writing recording: {e}",
+                extra={"session_id": recording.session_id},
+            )
+            self.count("write_errors")
+            return
+        with self.lock:
+            self.counters["bytes_written"] += written
+            self.counters["writes"] += 1
+            self.total_write_ms += (time.perf_counter() - start) * 1000
+
+    def _finish(self, recording: SessionRecording, frames: list) -> dict:
+        self._write(recording, frames)
+        try:
+            return recording.finish()
+        except Exception as e:
+            logger.error(
+                f"Error closing recording: {e}",
+                extra={"session_id": recording.session_id},
+            )
+            self.count("write_errors")
+            return recording.summary()
+
+
+recorder = Recorder()
+
+
+async def save_recording(db, interview_state: dict) -> None:
+    """
+    Finishes the session's recording and stores where it is on the
+    interview; errors are only logged.
+    """
+    recording = interview_state.get("recording")
+    if recording is None:
+        return
+    try:
+        summary = await recorder.close(recording)
+        logger.info(
+            "Recording summary",
+            extra={
+                "session_id": interview_state.get("session_id"),
+                "segments": summary["segments"],
+                "frames": summary["frames"],
+                "dropped": summary["dropped"],
+            },
+        )
+        if not summary["segments"]:
+            return
+        interview_id = await find_interview_id(db, interview_state)
+        if interview_id is None:
+            logger.warning(
+                "No interview to store the recording on",
+                extra={"session_id": interview_state.get("session_id")},
+            )
+            return
+        await db.interviews.update_one(
+            {"_id": interview_id}, {"$set": {"recording": summary}}
+        )
+    except Exception as e:
+        logger.error(f"Error saving recording: {e}")
@@ -0,0 +1,184 @@
+"""
+In-process cache of rendered responses for read endpoints whose data rarely
+changes (job vacancies, candidates, questions of a job vacancy, meet data).
+
+Entries are keyed by endpoint and parameters and store the encoded body with
+its ETag, so a hit costs neither a Mongo query nor a JSON encode, and a
+request whose If-None-Match matches gets an empty 304. The cache is an LRU
+bounded by RESPONSE_CACHE_MAX_ENTRIES and RESPONSE_CACHE_MAX_BYTES; entries
+expire after RESPONSE_CACHE_TTL seconds.
+
+Every entry carries tags such as "job_vacancy:<id>"; write handlers call
+invalidate() with the tags they touch. The other workers learn about it
+through cache_versions and drop their whole cache, at most
+CACHE_SYNC_INTERVAL seconds later.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+
+from fastapi import Request, Response
+
+import codec
+from cache_versions import SharedVersion
+
+
+class ResponseCache:
+    """
+    LRU + TTL cache of encoded response bodies.
+    invalidate() bumps a generation counter, so a build that raced with a
+    write is returned to its caller but never stored.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.environ.get("RESPONSE_CACHE_TTL", 60))
+        self.max_entries = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", 1000))
+        self.max_bytes = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", 16 * 2**20))
+        self.enabled = os.environ.get("RESPONSE_CACHE", "1") != "0"
+        self.entries = OrderedDict()
+        self.tags = {}
+        self.building = {}
+        self.generation = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.shared = SharedVersion("response_cache")
+
+    async def respond(self, request: Request, key: tuple, tags, build) -> Response:
+        """
+        Cached response for key. build() is awaited on a miss and returns the
+        content to encode; exceptions (e.g. a 404) propagate and are not cached.
+        tags is a list, or a function of the content for tags only known
+        after the build.
+        """
+        if self.enabled and await self.shared.changed():
+            self.clear()
+        entry = self._get(key) if self.enabled else None
+        if entry is None:
+            self.misses += 1
+            entry = await self._build(key, tags, build)
+        else:
+            self.hits += 1
+
+        headers = {"ETag": entry["etag"], "Cache-Control": "private, no-cache"}
+        if etag_matches(request.headers.get("if-none-match"), entry["etag"]):
+            self.not_modified += 1
+            return Response(status_code=304, headers=headers)
+        return Response(entry["body"], media_type="application/json", headers=headers)
+
+    async def invalidate(self, *tags) -> None:
+        """Drops every entry carrying any of the tags, on every worker."""
+        self.generation += 1
+        self.building.clear()
+        for tag in tags:
+            for key in self.tags.pop(str(tag), ()):
+                if self._drop(key):
+                    self.invalidations += 1
+        await self.shared.bump()
+
+    def clear(self) -> None:
+        self.generation += 1
+        self.building.clear()
+        self.entries.clear()
+        self.tags.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            **self.shared.stats(),
+        }
+
+    def _get(self, key: tuple):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry["expires_at"] <= time.monotonic():
+            self._drop(key)
+            self.expirations += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry
+
+    async def _build(self, key: tuple, tags, build) -> dict:
+        # Concurrent misses for the same key share one build
+        task = self.building.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._render(key, tags, build))
+            self.building[key] = task
+
+            def forget(_):
+                if self.building.get(key) is task:
+                    del self.building[key]
+
+            task.add_done_callback(forget)
+        return await asyncio.shield(task)
+
+    async def _render(self, key: tuple, tags, build) -> dict:
+        generation = self.generation
+        content = await build()
+        if callable(tags):
+            tags = tags(content)
+        body = codec.dumps_bytes(content)
+        entry = {
+            "body": body,
+            "etag": '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"',
+            "tags": [str(tag) for tag in tags],
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        if self.enabled and self.generation == generation:
+            self._store(key, entry)
+        return entry
+
+    def _store(self, key: tuple, entry: dict) -> None:
+        if len(entry["body"]) > self.max_bytes:
+            return
+        self._drop(key)
+        self.entries[key] = entry
+        self.bytes += len(entry["body"])
+        for tag in entry["tags"]:
+            self.tags.setdefault(tag, set()).add(key)
+
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+            self.evictions += 1
+
+    def _drop(self, key: tuple) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.bytes -= len(entry["body"])
+        for tag in entry["tags"]:
+            keys = self.tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.tags[tag]
+        return True
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for GET)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (value.strip() for value in if_none_match.split(","))
+    return any(value.removeprefix("W/") == etag for value in candidates)
+
+
+response_cache = ResponseCache()
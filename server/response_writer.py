@@ -0,0 +1,315 @@
+"""
+Write-behind queue for the answers saved through the save_response tool.
+
+The proxy acknowledges the tool call to Gemini right away and only enqueues
+the upsert; a background task flushes the queue to interview_responses with
+bulk_write, in batches triggered by size or time. Failed batches are retried
+with backoff and, if Mongo stays unavailable, appended to a JSONL spill file
+that is replayed with the next flush. stop() drains everything that is still
+queued.
+
+A worker replaying the spill file first renames it to a claim of its own
+(<spill path>.<pid>.<random>) and only removes the claim once the answers in it
+are written or spilled again; claims left by a worker that died are picked
+up when the writer starts.
+"""
+
+import asyncio
+import glob
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+
+from bson import json_util
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+
+from database import get_db
+
+
+class ResponseWriter:
+    """
+    Batches interview_responses upserts in the background.
+    """
+
+    def __init__(self):
+        self.batch_size = int(os.environ.get("RESPONSE_WRITER_BATCH_SIZE", 100))
+        self.flush_interval = float(
+            os.environ.get("RESPONSE_WRITER_FLUSH_INTERVAL", 0.5)
+        )
+        self.max_retries = int(os.environ.get("RESPONSE_WRITER_MAX_RETRIES", 3))
+        self.put_timeout = float(os.environ.get("RESPONSE_WRITER_PUT_TIMEOUT", 0.05))
+        self.spill_path = os.environ.get(
+            "RESPONSE_WRITER_SPILL_PATH", "data/response_spill.jsonl"
+        )
+        self.queue = asyncio.Queue(
+            maxsize=int(os.environ.get("RESPONSE_WRITER_MAX_QUEUE", 10000))
+        )
+        self.flush_task = None
+        # Batch taken off the queue but not yet confirmed by Mongo
+        self.in_flight = []
+        self.spill_lock = asyncio.Lock()
+        # Claimed spill files whose answers are not written yet
+        self.claimed = []
+        self.orphans_checked = False
+
+        self.enqueued = 0
+        self.written = 0
+        self.spilled = 0
+        self.failed_flushes = 0
+        self.lost = 0
+        self.skipped_spill_lines = 0
+        self.flushes = 0
+        self.last_flush_latency_ms = 0.0
+        self.total_flush_latency_ms = 0.0
+
+    async def start(self) -> None:
+        """Starts the background flush task."""
+        if self.flush_task is None or self.flush_task.done():
+            self.flush_task = asyncio.create_task(self._flush_loop())
+
+    async def stop(self) -> None:
+        """Stops the flush task and writes everything still queued."""
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+            try:
+                await self.flush_task
+            except asyncio.CancelledError:
+                pass
+            self.flush_task = None
+
+        # Upserts are idempotent, so an interrupted batch is simply rewritten
+        batch, self.in_flight = self.in_flight, []
+        while not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+            if len(batch) >= self.batch_size:
+                await self._flush(batch)
+                batch = []
+        await self._flush(batch)
+
+    async def enqueue(
+        self, interview_id, tag, response, candidate_id=None, job_vacancy_id=None
+    ) -> None:
+        """
+        Queues the upsert of one answer.
+        Waits up to put_timeout when the queue is full, then spills the
+        answer to disk instead of holding up the conversation.
+        """
+        ids = {
+            "interview_id": ObjectId(interview_id) if interview_id else None,
+            "candidate_id": ObjectId(candidate_id) if candidate_id else None,
+            "job_vacancy_id": ObjectId(job_vacancy_id) if job_vacancy_id else None,
+            "tag": tag,
+        }
+        entry = {
+            "filter": ids,
+            "set": {**ids, "response": response, "answered_at": datetime.utcnow()},
+        }
+        self.enqueued += 1
+
+        await self.start()
+        try:
+            async with asyncio.timeout(self.put_timeout):
+                await self.queue.put(entry)
+        except TimeoutError:
+            logging.warning("Response queue is full, spilling answer to disk")
+            await self._spill([entry])
+
+    def stats(self) -> dict:
+        """Queue depth and flush counters."""
+        return {
+            "queue_depth": self.queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "spilled": self.spilled,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "lost": self.lost,
+            "skipped_spill_lines": self.skipped_spill_lines,
+            "last_flush_latency_ms": round(self.last_flush_latency_ms, 2),
+            "avg_flush_latency_ms": round(
+                self.total_flush_latency_ms / self.flushes if self.flushes else 0.0, 2
+            ),
+            "spill_pending": bool(self.claimed) or os.path.exists(self.spill_path),
+        }
+
+    async def _flush_loop(self) -> None:
+        while True:
+            batch = self.in_flight = [await self.queue.get()]
+            try:
+                async with asyncio.timeout(self.flush_interval):
+                    while len(batch) < self.batch_size:
+                        batch.append(await self.queue.get())
+            except TimeoutError:
+                pass
+            try:
+                await self._flush(batch)
+            except Exception as e:
+                # E.g. the spill file cannot be written either; the writer
+                # goes on with the next batch
+                self.failed_flushes += 1
+                self.lost += len(batch)
+                logging.error(f"Error flushing {len(batch)} responses, dropped: {e}")
+            self.in_flight = []
+
+    async def _flush(self, batch: list) -> None:
+        """
+        Writes a batch together with any spilled answers, keeping only the
+        newest answer of each question.
+        """
+        # Spilled entries join the batch in place, so they stay tracked in
+        # in_flight if the flush gets interrupted
+        batch[:0] = await self._take_spill()
+        if not batch:
+            return
+
+        # Newest by answered_at, not by position: a spilled answer can be
+        # newer than one that was still queued. With a single op per
+        # document an unordered bulk write is safe.
+        latest = {}
+        for entry in batch:
+            key = tuple(entry["filter"].values())
+            current = latest.get(key)
+            if (
+                current is None
+                or entry["set"]["answered_at"] >= current["set"]["answered_at"]
+            ):
+                latest[key] = entry
+        operations = [
+            UpdateOne(entry["filter"], {"$set": entry["set"]}, upsert=True)
+            for entry in latest.values()
+        ]
+
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                await get_db().interview_responses.bulk_write(operations, ordered=False)
+            except Exception as e:
+                logging.error(
+                    f"Error flushing {len(operations)} responses "
+                    f"(attempt {attempt + 1}): {e}"
+                )
+                if attempt < self.max_retries:
+                    await asyncio.sleep(min(0.2 * 2**attempt, 5))
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.flushes += 1
+            self.written += len(operations)
+            self.last_flush_latency_ms = elapsed_ms
+            self.total_flush_latency_ms += elapsed_ms
+            await self._release_spill()
+            return
+
+        self.failed_flushes += 1
+        await self._spill(list(latest.values()))
+        await self._release_spill()
+
+    async def _spill(self, entries: list) -> None:
+        """Appends entries to the spill file and fsyncs it."""
+        lines = "".join(json_util.dumps(entry) + "\n" for entry in entries)
+
+        def write():
+            directory = os.path.dirname(self.spill_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.spill_path, "a", encoding="utf-8") as f:
+                f.write(lines)
+                f.flush()
+                os.fsync(f.fileno())
+
+        async with self.spill_lock:
+            await asyncio.to_thread(write)
+        self.spilled += len(entries)
+
+    async def _take_spill(self) -> list:
+        """
+        Answers of the spill file and of the claims not written yet. The
+        claimed files stay on disk until _release_spill().
+        """
+        if (
+            self.orphans_checked
+            and not self.claimed
+            and not os.path.exists(self.spill_path)
+        ):
+            return []
+
+        def read():
+            if not self.orphans_checked:
+                self.orphans_checked = True
+                for path in glob.glob(f"{glob.escape(self.spill_path)}.*"):
+                    if orphaned(path[len(self.spill_path) + 1 :]):
+                        self._claim(path)
+            # Several workers can share the spill file: the rename makes
+            # sure only one of them replays it
+            self._claim(self.spill_path)
+
+            entries = []
+            for path in self.claimed:
+                if not os.path.exists(path):
+                    continue
+                with open(path, encoding="utf-8") as f:
+                    for line in f:
+                        if not line.strip():
+                            continue
+                        try:
+                            entries.append(json_util.loads(line))
+                        except ValueError:
+                            # A line torn by a crash while it was appended
+                            self.skipped_spill_lines += 1
+                            logging.warning(f"Skipping unreadable line in {path}")
+            return entries
+
+        async with self.spill_lock:
+            return await asyncio.to_thread(read)
+
+    def _claim(self, path: str) -> None:
+        claim = f"{self.spill_path}.{os.getpid()}.{uuid.uuid4().hex[:12]}"
+        try:
+            os.replace(path, claim)
+        except FileNotFoundError:
+            # Taken by another worker
+            return
+        self.claimed.append(claim)
+
+    async def _release_spill(self) -> None:
+        """Removes the claims once their answers are written or spilled again."""
+        if not self.claimed:
+            return
+        claimed, self.claimed = self.claimed, []
+
+        def remove():
+            for path in claimed:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        async with self.spill_lock:
+            await asyncio.to_thread(remove)
+
+
+def orphaned(suffix: str) -> bool:
+    """
+    Whether a claimed spill file, by the "<pid>[.<random>]" after the spill
+    path, was left by a process that is gone. Checked before this process
+    claims anything, so a claim with its own pid is from an earlier one.
+    """
+    try:
+        pid = int(suffix.split(".")[0])
+    except ValueError:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return True
+    except OSError:
+        pass
+    return False
+
+
+response_writer = ResponseWriter()
@@ -2,24 +2,79 @@
 
 import asyncio
 import os
+import uuid
+from contextlib import asynccontextmanager
 import uvicorn
 import logging
 from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from dotenv import load_dotenv
-from pymongo import MongoClient
 from bson.objectid import ObjectId
 from bson.errors import InvalidId
 from datetime import datetime
 
 
-from proxy import handle_client, active_client_connections, cleanup_connections
+import audio_frames
+from audio_coalescer import totals as coalescer_totals
+from bulk import (
+    CandidateIn,
+    InterviewQuestionIn,
+    bulk_result,
+    insert_items,
+    read_items,
+    validate_items,
+)
+from codec import CodecJSONResponse
+from dashboard import job_vacancy_dashboard
+from downstream_audio import totals as downstream_totals
+from exports import build_filter, parse_date, stream_export
+from pagination import paginate
+from recorder import recorder
+from frame_queue import totals as frame_queue_totals
+from database import close_client, get_db
+from proxy import handle_client, active_client_connections
+from response_cache import response_cache
 from gemini_client import GeminiClient
+from indexes import check_query_plans, ensure_indexes
+from liveness import liveness_monitor
+import metrics
+from logging_config import configure_logging
+from response_writer import response_writer
+from session_registry import session_registry
+from setup_cache import setup_cache
+from vad import totals as vad_totals
+from turn_latency import turn_latency_percentiles
 
 load_dotenv()
+configure_logging()
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Application startup and shutdown.
+    """
+    await ensure_indexes()
+    if os.environ.get("INDEX_EXPLAIN_ON_STARTUP") == "1":
+        await check_query_plans()
+    await response_writer.start()
+    await session_registry.start()
+    await liveness_monitor.start()
+    await recorder.start()
+    gemini_client.wake_pool()
+    yield
+    await liveness_monitor.stop()
+    await gemini_client.cleanup_all_connections()
+    await session_registry.stop()
+    await recorder.stop()
+    await response_writer.stop()
+    await close_client()
 
-app = FastAPI()
+
+app = FastAPI(lifespan=lifespan, default_response_class=CodecJSONResponse)
 
 
 # Exception handlers
@@ -55,9 +110,35 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metrics.RequestMetricsMiddleware)
 gemini_client = GeminiClient()
-mongo_client = MongoClient(os.environ.get("MONGODB_URI"))
-mongo_client_db = mongo_client.hr_conversational_ai
+
+# Existing stats, exported as gauges on /metrics
+metrics.registry.add_collector("response_writer", response_writer.stats)
+metrics.registry.add_collector("gemini_pool", gemini_client.pool_stats)
+metrics.registry.add_collector("frame_queues", lambda: frame_queue_totals)
+metrics.registry.add_collector("liveness", liveness_monitor.stats)
+metrics.registry.add_collector("vad", lambda: vad_totals)
+metrics.registry.add_collector("coalescer", lambda: coalescer_totals)
+metrics.registry.add_collector("downstream_audio", lambda: downstream_totals)
+metrics.registry.add_collector("recorder", recorder.stats)
+metrics.registry.add_collector("response_cache", response_cache.stats)
+metrics.registry.add_collector(
+    "setup_cache",
+    lambda: {
+        "hits": setup_cache.hits,
+        "misses": setup_cache.misses,
+        **setup_cache.shared.stats(),
+    },
+)
+metrics.registry.add_collector(
+    "sessions",
+    lambda: {
+        "active": len(session_registry.sessions),
+        "admitted": session_registry.admitted,
+        "rejected": session_registry.rejected,
+    },
+)
 
 
 @app.get("/health_check")
@@ -65,20 +146,45 @@ async def health_check():
     """
     Health check endpoint.
     """
-    return {"status": "ok"}
+    return {
+        "status": "ok",
+        "response_writer": response_writer.stats(),
+        "gemini_pool": gemini_client.pool_stats(),
+        "frame_queues": frame_queue_totals,
+        "vad": vad_totals,
+        "coalescer": coalescer_totals,
+        "downstream_audio": downstream_totals,
+        "recorder": recorder.stats(),
+        "sessions": await session_registry.stats(),
+        "liveness": liveness_monitor.stats(),
+        "response_cache": response_cache.stats(),
+    }
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Prometheus metrics of this worker.
+    """
+    return Response(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/interview_questions")
-async def get_interview_questions():
+async def get_interview_questions(
+    cursor: str = None, limit: int = None, fields: str = None
+):
     """
-    Get all interview questions.
+    Get interview questions, one page at a time.
     """
-    questions = list(mongo_client_db.interview_questions.find({}))
+    db = get_db()
 
-    for question in questions:
-        question["_id"] = str(question["_id"])
+    questions, next_cursor = await paginate(
+        db.interview_questions, {}, cursor=cursor, limit=limit, fields=fields
+    )
 
-    return {"interview_questions": questions}
+    return CodecJSONResponse(
+        {"interview_questions": questions, "next_cursor": next_cursor}
+    )
 
 
 @app.post("/interview_questions")
@@ -86,6 +192,7 @@ async def create_interview_question(request: Request):
     """
     Create a new interview question.
     """
+    db = get_db()
     try:
         data = await request.json()
 
@@ -93,32 +200,73 @@ async def create_interview_question(request: Request):
         if not data.get("question"):
             raise HTTPException(status_code=400, detail="Question text is required")
 
+        # Foreign keys are always stored as ObjectId
+        job_vacancy_id = data.get("job_vacancy_id")
+        if job_vacancy_id is not None:
+            if not ObjectId.is_valid(job_vacancy_id):
+                raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
+            job_vacancy_id = ObjectId(job_vacancy_id)
+
         # Create question document
         question_doc = {
             "question": data["question"],
             "category": data.get("category", "personal"),
             "difficulty": data.get("difficulty", "easy"),
             "tag": data.get("tag", ""),
-            "job_vacancy_id": data.get("job_vacancy_id"),
+            "job_vacancy_id": job_vacancy_id,
             "created_at": datetime.utcnow(),
             "active": data.get("active", True),
         }
 
-        result = mongo_client_db.interview_questions.insert_one(question_doc)
+        result = await db.interview_questions.insert_one(question_doc)
         question_doc["_id"] = str(result.inserted_id)
+        await setup_cache.invalidate(question_doc["job_vacancy_id"])
+        await response_cache.invalidate(f"job_vacancy:{question_doc['job_vacancy_id']}")
 
-        return {"interview_question": question_doc}
+        return CodecJSONResponse({"interview_question": question_doc})
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error creating interview question: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.post("/interview_questions/bulk")
+async def create_interview_questions_bulk(request: Request, ordered: bool = False):
+    """
+    Create many interview questions from a JSON array or NDJSON body.
+    """
+    db = get_db()
+    items = await read_items(request)
+    questions, errors = validate_items(items, InterviewQuestionIn, ordered)
+
+    now = datetime.utcnow()
+    documents = []
+    for index, question in questions:
+        question_doc = question.model_dump()
+        if question_doc["job_vacancy_id"] is not None:
+            question_doc["job_vacancy_id"] = ObjectId(question_doc["job_vacancy_id"])
+        question_doc["created_at"] = now
+        documents.append((index, question_doc))
+
+    result = await insert_items(db.interview_questions, documents, ordered)
+
+    for job_vacancy_id in {document["job_vacancy_id"] for _, document in documents}:
+        await setup_cache.invalidate(job_vacancy_id)
+        await response_cache.invalidate(f"job_vacancy:{job_vacancy_id}")
+
+    return CodecJSONResponse(
+        bulk_result(result["inserted"], errors + result["errors"], len(items))
+    )
+
+
 @app.put("/interview_questions/{question_id}")
 async def update_interview_question(question_id: str, request: Request):
     """
     Update an interview question.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(question_id):
             raise HTTPException(status_code=400, detail="Invalid question ID")
@@ -143,13 +291,18 @@ async def update_interview_question(question_id: str, request: Request):
 
         update_data["updated_at"] = datetime.utcnow()
 
-        result = mongo_client_db.interview_questions.update_one(
-            {"_id": ObjectId(question_id)}, {"$set": update_data}
+        question = await db.interview_questions.find_one_and_update(
+            {"_id": ObjectId(question_id)},
+            {"$set": update_data},
+            projection={"job_vacancy_id": 1},
         )
 
-        if result.matched_count == 0:
+        if question is None:
             raise HTTPException(status_code=404, detail="Question not found")
 
+        await setup_cache.invalidate(question.get("job_vacancy_id"))
+        await response_cache.invalidate(f"job_vacancy:{question.get('job_vacancy_id')}")
+
         return {"message": "Question updated successfully"}
 
     except HTTPException:
@@ -164,17 +317,21 @@ async def delete_interview_question(question_id: str):
     """
     Delete an interview question.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(question_id):
             raise HTTPException(status_code=400, detail="Invalid question ID")
 
-        result = mongo_client_db.interview_questions.delete_one(
-            {"_id": ObjectId(question_id)}
+        question = await db.interview_questions.find_one_and_delete(
+            {"_id": ObjectId(question_id)}, projection={"job_vacancy_id": 1}
         )
 
-        if result.deleted_count == 0:
+        if question is None:
             raise HTTPException(status_code=404, detail="Question not found")
 
+        await setup_cache.invalidate(question.get("job_vacancy_id"))
+        await response_cache.invalidate(f"job_vacancy:{question.get('job_vacancy_id')}")
+
         return {"message": "Question deleted successfully"}
 
     except HTTPException:
@@ -185,25 +342,28 @@ async def delete_interview_question(question_id: str):
 
 
 @app.get("/interview_questions/job_vacancy/{job_vacancy_id}")
-async def get_interview_questions_by_job_vacancy(job_vacancy_id: str):
+async def get_interview_questions_by_job_vacancy(job_vacancy_id: str, request: Request):
     """
     Get interview questions for a specific job vacancy.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(job_vacancy_id):
             raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
 
-        questions = list(
-            mongo_client_db.interview_questions.find(
-                {"job_vacancy_id": job_vacancy_id, "active": True}
-            )
+        async def build():
+            questions = await db.interview_questions.find(
+                {"job_vacancy_id": ObjectId(job_vacancy_id), "active": True}
+            ).to_list(None)
+            return {"interview_questions": questions}
+
+        return await response_cache.respond(
+            request,
+            ("interview_questions_by_job_vacancy", job_vacancy_id),
+            [f"job_vacancy:{job_vacancy_id}"],
+            build,
         )
 
-        for question in questions:
-            question["_id"] = str(question["_id"])
-
-        return {"interview_questions": questions}
-
     except HTTPException:
         raise
     except Exception as e:
@@ -216,6 +376,7 @@ async def create_interview(request: Request):
     """
     Create a new interview session.
     """
+    db = get_db()
     try:
         data = await request.json()
 
@@ -224,6 +385,10 @@ async def create_interview(request: Request):
             raise HTTPException(status_code=400, detail="Candidate ID is required")
         if not data.get("job_vacancy_id"):
             raise HTTPException(status_code=400, detail="Job vacancy ID is required")
+        if not ObjectId.is_valid(data["candidate_id"]):
+            raise HTTPException(status_code=400, detail="Invalid candidate ID")
+        if not ObjectId.is_valid(data["job_vacancy_id"]):
+            raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
 
         # Create interview document
         interview_doc = {
@@ -235,11 +400,13 @@ async def create_interview(request: Request):
             "questions_asked": [],
         }
 
-        result = mongo_client_db.interviews.insert_one(interview_doc)
+        result = await db.interviews.insert_one(interview_doc)
         interview_doc["_id"] = str(result.inserted_id)
 
-        return {"interview": interview_doc}
+        return CodecJSONResponse({"interview": interview_doc})
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error creating interview: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -250,6 +417,7 @@ async def update_interview_responses(interview_id: str, request: Request):
     """
     Update interview responses.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(interview_id):
             raise HTTPException(status_code=400, detail="Invalid interview ID")
@@ -267,7 +435,7 @@ async def update_interview_responses(interview_id: str, request: Request):
             if data["status"] == "completed":
                 update_data["completed_at"] = datetime.utcnow()
 
-        result = mongo_client_db.interviews.update_one(
+        result = await db.interviews.update_one(
             {"_id": ObjectId(interview_id)}, {"$set": update_data}
         )
 
@@ -288,20 +456,17 @@ async def get_interview(interview_id: str):
     """
     Get a specific interview by ID.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(interview_id):
             raise HTTPException(status_code=400, detail="Invalid interview ID")
 
-        interview = mongo_client_db.interviews.find_one({"_id": ObjectId(interview_id)})
+        interview = await db.interviews.find_one({"_id": ObjectId(interview_id)})
 
         if not interview:
             raise HTTPException(status_code=404, detail="Interview not found")
 
-        interview["_id"] = str(interview["_id"])
-        interview["candidate_id"] = str(interview["candidate_id"])
-        interview["job_vacancy_id"] = str(interview["job_vacancy_id"])
-
-        return {"interview": interview}
+        return CodecJSONResponse({"interview": interview})
 
     except HTTPException:
         raise
@@ -315,20 +480,16 @@ async def get_interviews_by_candidate(candidate_id: str):
     """
     Get all interviews for a specific candidate.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(candidate_id):
             raise HTTPException(status_code=400, detail="Invalid candidate ID")
 
-        interviews = list(
-            mongo_client_db.interviews.find({"candidate_id": ObjectId(candidate_id)})
-        )
-
-        for interview in interviews:
-            interview["_id"] = str(interview["_id"])
-            interview["candidate_id"] = str(interview["candidate_id"])
-            interview["job_vacancy_id"] = str(interview["job_vacancy_id"])
+        interviews = await db.interviews.find(
+            {"candidate_id": ObjectId(candidate_id)}
+        ).to_list(None)
 
-        return {"interviews": interviews}
+        return CodecJSONResponse({"interviews": interviews})
 
     except HTTPException:
         raise
@@ -338,26 +499,46 @@ async def get_interviews_by_candidate(candidate_id: str):
 
 
 @app.get("/interview_questions_asked")
-async def get_interview_questions_asked():
-    """
-    Get all questions asked during interviews.
-    """
+async def get_interview_questions_asked(
+    cursor: str = None,
+    limit: int = None,
+    fields: str = None,
+    candidate_id: str = None,
+    interview_id: str = None,
+):
+    """
+    Get questions asked during interviews, newest first, one page at a time,
+    optionally only those of a candidate or of an interview.
+    """
+    db = get_db()
     try:
-        questions = list(
-            mongo_client_db.interview_questions_asked.find({}).sort("asked_at", -1)
+        query = {}
+        for name, value in [
+            ("candidate_id", candidate_id),
+            ("interview_id", interview_id),
+        ]:
+            if value is None:
+                continue
+            if not ObjectId.is_valid(value):
+                raise HTTPException(status_code=400, detail=f"Invalid {name}")
+            query[name] = ObjectId(value)
+
+        questions, next_cursor = await paginate(
+            db.interview_questions_asked,
+            query,
+            "asked_at",
+            -1,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
         )
 
-        for question in questions:
-            question["_id"] = str(question["_id"])
-            if question.get("interview_id"):
-                question["interview_id"] = str(question["interview_id"])
-            if question.get("candidate_id"):
-                question["candidate_id"] = str(question["candidate_id"])
-            if question.get("job_vacancy_id"):
-                question["job_vacancy_id"] = str(question["job_vacancy_id"])
-
-        return {"interview_questions_asked": questions}
+        return CodecJSONResponse(
+            {"interview_questions_asked": questions, "next_cursor": next_cursor}
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error getting interview questions asked: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -368,26 +549,20 @@ async def get_interview_questions_asked_by_interview(interview_id: str):
     """
     Get questions asked during a specific interview.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(interview_id):
             raise HTTPException(status_code=400, detail="Invalid interview ID")
 
-        questions = list(
-            mongo_client_db.interview_questions_asked.find(
+        questions = (
+            await db.interview_questions_asked.find(
                 {"interview_id": ObjectId(interview_id)}
-            ).sort("question_number", 1)
+            )
+            .sort("question_number", 1)
+            .to_list(None)
         )
 
-        for question in questions:
-            question["_id"] = str(question["_id"])
-            if question.get("interview_id"):
-                question["interview_id"] = str(question["interview_id"])
-            if question.get("candidate_id"):
-                question["candidate_id"] = str(question["candidate_id"])
-            if question.get("job_vacancy_id"):
-                question["job_vacancy_id"] = str(question["job_vacancy_id"])
-
-        return {"interview_questions_asked": questions}
+        return CodecJSONResponse({"interview_questions_asked": questions})
 
     except HTTPException:
         raise
@@ -401,26 +576,20 @@ async def get_interview_questions_asked_by_candidate(candidate_id: str):
     """
     Get questions asked during interviews for a specific candidate.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(candidate_id):
             raise HTTPException(status_code=400, detail="Invalid candidate ID")
 
-        questions = list(
-            mongo_client_db.interview_questions_asked.find(
+        questions = (
+            await db.interview_questions_asked.find(
                 {"candidate_id": ObjectId(candidate_id)}
-            ).sort("asked_at", -1)
+            )
+            .sort("asked_at", -1)
+            .to_list(None)
         )
 
-        for question in questions:
-            question["_id"] = str(question["_id"])
-            if question.get("interview_id"):
-                question["interview_id"] = str(question["interview_id"])
-            if question.get("candidate_id"):
-                question["candidate_id"] = str(question["candidate_id"])
-            if question.get("job_vacancy_id"):
-                question["job_vacancy_id"] = str(question["job_vacancy_id"])
-
-        return {"interview_questions_asked": questions}
+        return CodecJSONResponse({"interview_questions_asked": questions})
 
     except HTTPException:
         raise
@@ -430,26 +599,30 @@ async def get_interview_questions_asked_by_candidate(candidate_id: str):
 
 
 @app.get("/interview_responses")
-async def get_interview_responses():
+async def get_interview_responses(
+    cursor: str = None, limit: int = None, fields: str = None
+):
     """
-    Get all interview responses.
+    Get interview responses, newest first, one page at a time.
     """
+    db = get_db()
     try:
-        responses = list(
-            mongo_client_db.interview_responses.find({}).sort("answered_at", -1)
+        responses, next_cursor = await paginate(
+            db.interview_responses,
+            {},
+            "answered_at",
+            -1,
+            cursor=cursor,
+            limit=limit,
+            fields=fields,
         )
 
-        for response in responses:
-            response["_id"] = str(response["_id"])
-            if response.get("interview_id"):
-                response["interview_id"] = str(response["interview_id"])
-            if response.get("candidate_id"):
-                response["candidate_id"] = str(response["candidate_id"])
-            if response.get("job_vacancy_id"):
-                response["job_vacancy_id"] = str(response["job_vacancy_id"])
-
-        return {"interview_responses": responses}
+        return CodecJSONResponse(
+            {"interview_responses": responses, "next_cursor": next_cursor}
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Error getting interview responses: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -460,26 +633,18 @@ async def get_interview_responses_by_interview(interview_id: str):
     """
     Get responses for a specific interview.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(interview_id):
             raise HTTPException(status_code=400, detail="Invalid interview ID")
 
-        responses = list(
-            mongo_client_db.interview_responses.find(
-                {"interview_id": ObjectId(interview_id)}
-            ).sort("answered_at", 1)
+        responses = (
+            await db.interview_responses.find({"interview_id": ObjectId(interview_id)})
+            .sort("answered_at", 1)
+            .to_list(None)
         )
 
-        for response in responses:
-            response["_id"] = str(response["_id"])
-            if response.get("interview_id"):
-                response["interview_id"] = str(response["interview_id"])
-            if response.get("candidate_id"):
-                response["candidate_id"] = str(response["candidate_id"])
-            if response.get("job_vacancy_id"):
-                response["job_vacancy_id"] = str(response["job_vacancy_id"])
-
-        return {"interview_responses": responses}
+        return CodecJSONResponse({"interview_responses": responses})
 
     except HTTPException:
         raise
@@ -493,26 +658,18 @@ async def get_interview_responses_by_candidate(candidate_id: str):
     """
     Get responses for a specific candidate.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(candidate_id):
             raise HTTPException(status_code=400, detail="Invalid candidate ID")
 
-        responses = list(
-            mongo_client_db.interview_responses.find(
-                {"candidate_id": ObjectId(candidate_id)}
-            ).sort("answered_at", -1)
+        responses = (
+            await db.interview_responses.find({"candidate_id": ObjectId(candidate_id)})
+            .sort("answered_at", -1)
+            .to_list(None)
         )
 
-        for response in responses:
-            response["_id"] = str(response["_id"])
-            if response.get("interview_id"):
-                response["interview_id"] = str(response["interview_id"])
-            if response.get("candidate_id"):
-                response["candidate_id"] = str(response["candidate_id"])
-            if response.get("job_vacancy_id"):
-                response["job_vacancy_id"] = str(response["job_vacancy_id"])
-
-        return {"interview_responses": responses}
+        return CodecJSONResponse({"interview_responses": responses})
 
     except HTTPException:
         raise
@@ -521,87 +678,213 @@ async def get_interview_responses_by_candidate(candidate_id: str):
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/exports/interview_responses")
+async def export_interview_responses(
+    format: str = "ndjson",
+    job_vacancy_id: str = None,
+    candidate_id: str = None,
+    since: str = None,
+    until: str = None,
+):
+    """
+    Stream interview responses as NDJSON or CSV, filtered by job vacancy,
+    candidate and answered_at range (ISO dates).
+    """
+    db = get_db()
+
+    query = build_filter("answered_at", job_vacancy_id, candidate_id, since, until)
+    return stream_export(db.interview_responses, query, format, "answered_at")
+
+
+@app.get("/exports/interviews")
+async def export_interviews(
+    format: str = "ndjson",
+    job_vacancy_id: str = None,
+    candidate_id: str = None,
+    since: str = None,
+    until: str = None,
+):
+    """
+    Stream interviews as NDJSON or CSV, filtered by job vacancy, candidate
+    and started_at range (ISO dates).
+    """
+    db = get_db()
+
+    query = build_filter("started_at", job_vacancy_id, candidate_id, since, until)
+    return stream_export(db.interviews, query, format, "started_at")
+
+
 @app.post("/job_vacancies")
 async def create_job_vacancy(job_vacancy: dict):
     """
     Create a new job vacancy.
     """
-    mongo_client_db.job_vacancies.insert_one(job_vacancy)
+    db = get_db()
+
+    await db.job_vacancies.insert_one(job_vacancy)
     return {"status": "success", "message": "Job vacancy created successfully"}
 
 
 @app.get("/job_vacancies")
-async def get_job_vacancies():
+async def get_job_vacancies(cursor: str = None, limit: int = None, fields: str = None):
     """
-    Get all job vacancies.
+    Get job vacancies, one page at a time.
     """
-    job_vacancies = list(mongo_client_db.job_vacancies.find({}))
+    db = get_db()
 
-    for job in job_vacancies:
-        job["_id"] = str(job["_id"])
+    job_vacancies, next_cursor = await paginate(
+        db.job_vacancies, {}, cursor=cursor, limit=limit, fields=fields
+    )
 
-    return {"job_vacancies": job_vacancies}
+    return CodecJSONResponse(
+        {"job_vacancies": job_vacancies, "next_cursor": next_cursor}
+    )
 
 
 @app.get("/job_vacancies/{job_id}")
-def get_job_vacancy(job_id: str):
+async def get_job_vacancy(job_id: str, request: Request):
     """
     Get a specific job vacancy by ID.
     """
-    job_vacancy = mongo_client_db.job_vacancies.find_one({"_id": ObjectId(job_id)})
+    db = get_db()
 
-    if not job_vacancy:
-        raise HTTPException(status_code=404, detail="Job vacancy not found")
+    async def build():
+        job_vacancy = await db.job_vacancies.find_one({"_id": ObjectId(job_id)})
+
+        if not job_vacancy:
+            raise HTTPException(status_code=404, detail="Job vacancy not found")
 
-    job_vacancy["_id"] = str(job_vacancy["_id"])
-    return {"job_vacancy": job_vacancy}
+        return {"job_vacancy": job_vacancy}
+
+    return await response_cache.respond(
+        request, ("job_vacancy", job_id), [f"job_vacancy:{job_id}"], build
+    )
 
 
 @app.post("/job_vacancies/{job_id}/candidates")
-def create_candidate_for_job(job_id: str, candidate: dict):
+async def create_candidate_for_job(job_id: str, candidate: dict):
     """
     Create a candidate for a specific job vacancy.
     """
+    db = get_db()
+
     candidate["job_vacancy_id"] = ObjectId(job_id)
-    mongo_client_db.candidates.insert_one(candidate)
+    await db.candidates.insert_one(candidate)
     return {"status": "success", "message": "Candidate created successfully"}
 
 
+@app.post("/job_vacancies/{job_id}/candidates/bulk")
+async def create_candidates_for_job_bulk(
+    job_id: str, request: Request, ordered: bool = False
+):
+    """
+    Create many candidates for a job vacancy from a JSON array or NDJSON body.
+    """
+    db = get_db()
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
+
+    items = await read_items(request)
+    candidates, errors = validate_items(items, CandidateIn, ordered)
+
+    documents = [
+        (index, {**candidate.model_dump(), "job_vacancy_id": ObjectId(job_id)})
+        for index, candidate in candidates
+    ]
+    result = await insert_items(db.candidates, documents, ordered)
+
+    return CodecJSONResponse(
+        bulk_result(result["inserted"], errors + result["errors"], len(items))
+    )
+
+
 @app.get("/job_vacancies/{job_id}/candidates")
-def get_candidates_for_job(job_id: str):
+async def get_candidates_for_job(
+    job_id: str, cursor: str = None, limit: int = None, fields: str = None
+):
     """
-    Get all candidates for a specific job vacancy.
+    Get the candidates for a specific job vacancy, one page at a time.
     """
-    candidates = list(
-        mongo_client_db.candidates.find({"job_vacancy_id": ObjectId(job_id)})
+    db = get_db()
+
+    candidates, next_cursor = await paginate(
+        db.candidates,
+        {"job_vacancy_id": ObjectId(job_id)},
+        cursor=cursor,
+        limit=limit,
+        fields=fields,
     )
 
-    for candidate in candidates:
-        candidate["_id"] = str(candidate["_id"])
-        candidate["job_vacancy_id"] = str(candidate["job_vacancy_id"])
+    return CodecJSONResponse({"candidates": candidates, "next_cursor": next_cursor})
+
+
+@app.get("/job_vacancies/{job_id}/dashboard")
+async def get_job_vacancy_dashboard(job_id: str, cursor: str = None, limit: int = None):
+    """
+    Get a job vacancy with a page of its candidates, each with interview
+    status and response counts, in a single round trip.
+    """
+    db = get_db()
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
+
+    dashboard = await job_vacancy_dashboard(db, ObjectId(job_id), cursor, limit)
 
-    return {"candidates": candidates}
+    if not dashboard["job_vacancy"]:
+        raise HTTPException(status_code=404, detail="Job vacancy not found")
+
+    return CodecJSONResponse(dashboard)
+
+
+@app.get("/job_vacancies/{job_id}/turn_latency")
+async def get_job_vacancy_turn_latency(
+    job_id: str, since: str = None, until: str = None, limit: int = 1000
+):
+    """
+    Turn latency percentiles (ms) per segment over the latest interviews of
+    a job vacancy, optionally restricted to interviews started in a range.
+    """
+    db = get_db()
+
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job vacancy ID")
+
+    started_at = {}
+    if since:
+        started_at["$gte"] = parse_date(since, "since")
+    if until:
+        started_at["$lt"] = parse_date(until, "until")
+    query = {"started_at": started_at} if started_at else {}
+
+    latency = await turn_latency_percentiles(
+        db, ObjectId(job_id), query, max(1, min(limit, 10000))
+    )
+    return CodecJSONResponse(latency)
 
 
 @app.get("/candidates/{candidate_id}")
-async def get_candidate(candidate_id: str):
+async def get_candidate(candidate_id: str, request: Request):
     """
     Get a specific candidate by ID.
     """
+    db = get_db()
     try:
         if not ObjectId.is_valid(candidate_id):
             raise HTTPException(status_code=400, detail="Invalid candidate ID")
 
-        candidate = mongo_client_db.candidates.find_one({"_id": ObjectId(candidate_id)})
+        async def build():
+            candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
 
-        if not candidate:
-            raise HTTPException(status_code=404, detail="Candidate not found")
+            if not candidate:
+                raise HTTPException(status_code=404, detail="Candidate not found")
 
-        candidate["_id"] = str(candidate["_id"])
-        if candidate.get("job_vacancy_id"):
-            candidate["job_vacancy_id"] = str(candidate["job_vacancy_id"])
+            return {"candidate": candidate}
 
-        return {"candidate": candidate}
+        return await response_cache.respond(
+            request, ("candidate", candidate_id), [f"candidate:{candidate_id}"], build
+        )
 
     except HTTPException:
         raise
@@ -611,86 +894,64 @@ async def get_candidate(candidate_id: str):
 
 
 @app.get("/candidates/{candidate_id}/meet")
-async def get_meet_data(candidate_id: str):
+async def get_meet_data(candidate_id: str, request: Request):
     """
     Get candidate and job vacancy data for the meet page.
     """
+    db = get_db()
     try:
-        print(f"🔍 get_meet_data - candidate_id: {candidate_id}")
-
         if not ObjectId.is_valid(candidate_id):
             raise HTTPException(status_code=400, detail="Invalid candidate ID")
 
-        # Get candidate data
-        candidate = mongo_client_db.candidates.find_one({"_id": ObjectId(candidate_id)})
-
-        if not candidate:
-            raise HTTPException(status_code=404, detail="Candidate not found")
-
-        candidate["_id"] = str(candidate["_id"])
-        print(f"🔍 get_meet_data - candidate found: {candidate}")
-
-        # Get job vacancy data if candidate has job_vacancy_id
-        job_vacancy = None
-        if candidate.get("job_vacancy_id"):
-            candidate["job_vacancy_id"] = str(candidate["job_vacancy_id"])
-            print(f"🔍 get_meet_data - job_vacancy_id: {candidate['job_vacancy_id']}")
-
-            job_vacancy = mongo_client_db.job_vacancies.find_one(
-                {"_id": ObjectId(candidate["job_vacancy_id"])}
-            )
-
-            if job_vacancy:
-                job_vacancy["_id"] = str(job_vacancy["_id"])
-                print(f"🔍 get_meet_data - job_vacancy found: {job_vacancy}")
-            else:
-                print(
-                    f"🔍 get_meet_data - job_vacancy not found for ID: {candidate['job_vacancy_id']}"
+        async def build():
+            # Get candidate data
+            candidate = await db.candidates.find_one({"_id": ObjectId(candidate_id)})
+
+            if not candidate:
+                raise HTTPException(status_code=404, detail="Candidate not found")
+
+            # Job vacancy and its questions in a single round trip; the foreign
+            # key is always an ObjectId (see migrate_object_ids.py)
+            job_vacancy = None
+            interview_questions = []
+            if candidate.get("job_vacancy_id"):
+                job_vacancy_id = ObjectId(candidate["job_vacancy_id"])
+                job_vacancy, interview_questions = await asyncio.gather(
+                    db.job_vacancies.find_one({"_id": job_vacancy_id}),
+                    db.interview_questions.find(
+                        {"job_vacancy_id": job_vacancy_id, "active": True}
+                    ).to_list(None),
                 )
-        else:
-            print(f"🔍 get_meet_data - candidate has no job_vacancy_id")
-
-        # Get interview questions for this job vacancy
-        interview_questions = []
-        if candidate.get("job_vacancy_id"):
-            # Try to find questions with string comparison first
-            questions = list(
-                mongo_client_db.interview_questions.find(
-                    {"job_vacancy_id": candidate["job_vacancy_id"], "active": True}
+            else:
+                logger.warning(
+                    "Candidate has no job_vacancy_id",
+                    extra={"candidate_id": candidate_id},
                 )
+
+            logger.debug(
+                "Meet data loaded",
+                extra={
+                    "candidate_id": candidate_id,
+                    "job_vacancy": job_vacancy is not None,
+                    "questions": len(interview_questions),
+                },
             )
 
-            # If no questions found, try with ObjectId
-            if not questions:
-                try:
-                    questions = list(
-                        mongo_client_db.interview_questions.find(
-                            {
-                                "job_vacancy_id": ObjectId(candidate["job_vacancy_id"]),
-                                "active": True,
-                            }
-                        )
-                    )
-                    print(f"Found {len(questions)} questions using ObjectId conversion")
-                except Exception as e:
-                    print(f"Error converting to ObjectId: {e}")
-                    questions = []
-
-            for question in questions:
-                question["_id"] = str(question["_id"])
-                question["job_vacancy_id"] = str(question["job_vacancy_id"])
-
-            interview_questions = questions
-
-        print(
-            f"🔍 get_meet_data - returning data: candidate={candidate is not None}, job_vacancy={job_vacancy is not None}, questions={len(interview_questions)}"
-        )
+            return {
+                "candidate": candidate,
+                "job_vacancy": job_vacancy,
+                "interview_questions": interview_questions,
+            }
 
-        return {
-            "candidate": candidate,
-            "job_vacancy": job_vacancy,
-            "interview_questions": interview_questions,
-        }
+        def tags(meet_data):
+            return [
+                f"candidate:{candidate_id}",
+                f"job_vacancy:{meet_data['candidate'].get('job_vacancy_id')}",
+            ]
+
+        return await response_cache.respond(
+            request, ("meet", candidate_id), tags, build
+        )
 
     except HTTPException:
         raise
@@ -703,33 +964,46 @@ async def get_meet_data(candidate_id: str):
 async def websocket_endpoint(websocket: WebSocket):
     """
     WebSocket endpoint for handling client connections.
+    Clients asking for the pcm16.v1 subprotocol exchange audio as binary
+    frames (see audio_frames); the others keep the JSON messages.
     """
-    await websocket.accept()
+    subprotocol = audio_frames.negotiate(websocket.scope.get("subprotocols"))
+    await websocket.accept(subprotocol=subprotocol)
+
+    session_id = uuid.uuid4().hex
+    if not await session_registry.admit(session_id):
+        logger.warning("Session limit reached, rejecting connection")
+        await websocket.close(code=1013, reason="Server at capacity")
+        return
+
     active_client_connections.add(websocket)
     try:
-        await handle_client(websocket, gemini_client)
+        await handle_client(
+            websocket, gemini_client, session_id, binary=subprotocol is not None
+        )
     except WebSocketDisconnect:
-        print("Client disconnected")
+        logger.info("Client disconnected", extra={"session_id": session_id})
     finally:
         if websocket in active_client_connections:
             active_client_connections.remove(websocket)
+        await session_registry.release(session_id)
 
 
 async def main() -> None:
     """
     Starts the FastAPI server using uvicorn.
     """
-    print("DEBUG: server.py - Starting server...")
+    logger.info("Starting server")
 
     # Get the port from the environment variable, defaulting to 3001
     port = int(os.environ.get("PORT", 3001))
     host = "0.0.0.0"
 
-    # Start the cleanup task as a background task
-    asyncio.create_task(cleanup_connections(gemini_client))
-
     # Create and run the uvicorn server
-    config = uvicorn.Config(app, host=host, port=port, log_level="info")
+    # log_config=None keeps uvicorn on the queue handler of logging_config
+    config = uvicorn.Config(
+        app, host=host, port=port, log_level="info", log_config=None
+    )
     server = uvicorn.Server(config)
     await server.serve()
 
@@ -738,9 +1012,6 @@ if __name__ == "__main__":
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
-        print("\nServer stopped by user.")
+        logger.info("Server stopped by user")
     except Exception as e:
-        print(f"Server error: {e}")
-        import traceback
-
-        print(f"Full traceback: {traceback.format_exc()}")
+        logger.exception(f"Server error: {e}")
@@ -0,0 +1,228 @@
+"""
+Registry of the interview sessions open on every worker.
+
+Each /ws connection is admitted through the registry before it is proxied to
+Gemini and released when it ends. The "memory" backend only knows about the
+sessions of its own process, which is all a single uvicorn worker needs.
+The "mongo" backend keeps one document per session in the active_sessions
+collection, so that several workers or containers share the same session
+counts and admission limits:
+
+- every worker refreshes the lease (expires_at) of its own sessions every
+  SESSION_HEARTBEAT_INTERVAL seconds
+- sessions of a worker that died stop counting once their lease expires and
+  are removed by a TTL index
+- admission inserts the session first and checks the global count after,
+  backing out when the limit was exceeded, so concurrent workers can never
+  overshoot SESSION_MAX_GLOBAL
+
+The backend is chosen with SESSION_REGISTRY ("memory" or "mongo").
+SESSION_MAX_PER_WORKER and SESSION_MAX_GLOBAL limit the sessions (0 means
+no limit).
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+
+from database import get_db
+
+
+class MemorySessionRegistry:
+    """
+    Keeps the sessions of this process only.
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self.max_per_worker = int(os.environ.get("SESSION_MAX_PER_WORKER", 0))
+        self.max_global = int(os.environ.get("SESSION_MAX_GLOBAL", 0))
+        # session_id -> session info
+        self.sessions = {}
+        self.admitted = 0
+        self.rejected = 0
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        self.sessions.clear()
+
+    async def admit(self, session_id: str, **info) -> bool:
+        """
+        Registers a new session. Returns False when a limit is reached.
+        """
+        if self.max_per_worker and len(self.sessions) >= self.max_per_worker:
+            self.rejected += 1
+            return False
+        if self.max_global and len(self.sessions) >= self.max_global:
+            self.rejected += 1
+            return False
+        self.sessions[session_id] = {
+            **info,
+            "admitted_at": datetime.utcnow(),
+        }
+        self.admitted += 1
+        return True
+
+    async def update(self, session_id: str, **info) -> None:
+        """Records details learned during the session, e.g. the candidate."""
+        if session_id in self.sessions:
+            self.sessions[session_id].update(info)
+
+    async def release(self, session_id: str) -> None:
+        self.sessions.pop(session_id, None)
+
+    async def global_counts(self) -> dict:
+        """Open sessions per worker."""
+        return {self.worker_id: len(self.sessions)}
+
+    async def stats(self) -> dict:
+        workers = await self.global_counts()
+        return {
+            "backend": self.backend,
+            "worker_id": self.worker_id,
+            "worker_sessions": len(self.sessions),
+            "global_sessions": sum(workers.values()),
+            "workers": workers,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "max_per_worker": self.max_per_worker,
+            "max_global": self.max_global,
+        }
+
+
+class MongoSessionRegistry(MemorySessionRegistry):
+    """
+    Shares the sessions of every worker through the active_sessions
+    collection.
+    """
+
+    backend = "mongo"
+
+    def __init__(self):
+        super().__init__()
+        self.ttl = float(os.environ.get("SESSION_TTL", 30))
+        self.heartbeat_interval = float(
+            os.environ.get("SESSION_HEARTBEAT_INTERVAL", 10)
+        )
+        self.heartbeat_task = None
+
+    def lease(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.ttl)
+
+    def live(self) -> dict:
+        return {"expires_at": {"$gt": datetime.utcnow()}}
+
+    async def start(self) -> None:
+        # Leftovers of a previous process that had the same worker id
+        # (the TTL index on expires_at is declared in indexes.py)
+        try:
+            await get_db().active_sessions.delete_many({"worker_id": self.worker_id})
+        except Exception as e:
+            logging.error(f"Error clearing sessions of {self.worker_id}: {e}")
+        if self.heartbeat_task is None or self.heartbeat_task.done():
+            self.heartbeat_task = asyncio.create_task(self._heartbeat_loop())
+
+    async def stop(self) -> None:
+        if self.heartbeat_task is not None:
+            self.heartbeat_task.cancel()
+            try:
+                await self.heartbeat_task
+            except asyncio.CancelledError:
+                pass
+            self.heartbeat_task = None
+        try:
+            await get_db().active_sessions.delete_many({"worker_id": self.worker_id})
+        except Exception as e:
+            logging.error(f"Error releasing sessions of {self.worker_id}: {e}")
+        await super().stop()
+
+    async def admit(self, session_id: str, **info) -> bool:
+        if not await super().admit(session_id, **info):
+            return False
+
+        db = get_db()
+        try:
+            await db.active_sessions.insert_one(
+                {
+                    "_id": session_id,
+                    "worker_id": self.worker_id,
+                    "admitted_at": self.sessions[session_id]["admitted_at"],
+                    "expires_at": self.lease(),
+                    **info,
+                }
+            )
+            if self.max_global:
+                count = await db.active_sessions.count_documents(self.live())
+                if count > self.max_global:
+                    await db.active_sessions.delete_one({"_id": session_id})
+                    self.sessions.pop(session_id, None)
+                    self.admitted -= 1
+                    self.rejected += 1
+                    return False
+        except Exception as e:
+            # Without Mongo the session goes on, limited only by this worker
+            logging.error(f"Error registering session {session_id}: {e}")
+        return True
+
+    async def update(self, session_id: str, **info) -> None:
+        await super().update(session_id, **info)
+        try:
+            await get_db().active_sessions.update_one(
+                {"_id": session_id}, {"$set": info}
+            )
+        except Exception as e:
+            logging.error(f"Error updating session {session_id}: {e}")
+
+    async def release(self, session_id: str) -> None:
+        await super().release(session_id)
+        try:
+            await get_db().active_sessions.delete_one({"_id": session_id})
+        except Exception as e:
+            logging.error(f"Error releasing session {session_id}: {e}")
+
+    async def global_counts(self) -> dict:
+        try:
+            groups = await (
+                await get_db().active_sessions.aggregate(
+                    [
+                        {"$match": self.live()},
+                        {"$group": {"_id": "$worker_id", "sessions": {"$sum": 1}}},
+                    ]
+                )
+            ).to_list(None)
+        except Exception as e:
+            logging.error(f"Error counting sessions: {e}")
+            return await super().global_counts()
+        return {group["_id"]: group["sessions"] for group in groups}
+
+    async def _heartbeat_loop(self) -> None:
+        """Renews the lease of this worker's sessions."""
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            if not self.sessions:
+                continue
+            try:
+                await get_db().active_sessions.update_many(
+                    {"worker_id": self.worker_id},
+                    {"$set": {"expires_at": self.lease()}},
+                )
+            except Exception as e:
+                logging.error(f"Error renewing session leases: {e}")
+
+
+def create_registry():
+    backend = os.environ.get("SESSION_REGISTRY", "memory")
+    if backend == "mongo":
+        return MongoSessionRegistry()
+    if backend != "memory":
+        raise ValueError(f"Unknown session registry: {backend}")
+    return MemorySessionRegistry()
+
+
+session_registry = create_registry()
@@ -0,0 +1,201 @@
+"""
+Cache of the Gemini setup message sent when an interview starts.
+
+The system prompt and the setup payload only depend on the active questions
+of a job vacancy, so they are built once per job vacancy, serialized to the
+final JSON text and reused by every interview until the questions change.
+The interview_questions endpoints call invalidate() on every write, which
+the other workers learn about through cache_versions at most
+CACHE_SYNC_INTERVAL seconds later; entries also expire after SETUP_CACHE_TTL
+seconds.
+"""
+
+import asyncio
+import os
+import time
+
+from bson.objectid import ObjectId
+
+import codec
+from cache_versions import SharedVersion
+from database import get_db
+
+# Rules appended to every system prompt, kept verbatim
+INTERVIEW_RULES = """
+                        REGRAS DE AÇÃO (TURNO A TURNO):
+                        Você deve seguir estas regras a cada interação.
+
+                        1.  **PARA INICIAR A CONVERSA:**
+                            - Se a conversa está apenas começando, faça uma BREVE saudação (ex: "Olá! Sou seu assistente para esta pré-entrevista. Vamos começar?") e então faça a **Pergunta 1** da lista.
+
+                        2.  **AO RECEBER UMA RESPOSTA DO CANDIDATO:**
+                            - Sua ÚNICA ação neste momento é sintetizar a resposta que você ouviu e chamar a ferramenta `save_response(tag, response)`.
+                            - **IMPORTANTE:** Não diga "Obrigado", "Certo", nem faça a próxima pergunta ainda. Apenas e somente chame a ferramenta.
+
+                        3.  **APÓS CHAMAR A FERRAMENTA `save_response`:**
+                            - Sua ÚNICA ação é fazer a **PRÓXIMA pergunta** da lista.
+                            - Continue este ciclo (Regra 2 -> Regra 3) para todas as perguntas.
+
+                        4.  **PARA FINALIZAR A CONVERSA:**
+                            - Após você chamar `save_response` para a **ÚLTIMA** pergunta da lista, em vez de procurar uma nova pergunta, suas ações são agradecer ao candidato, encerrar a conversa de forma profissional.
+
+                        5.  **PARA ENCERRAR A CONEXÂO:**
+                            - Chame a tool `end_interview()` para encerrar a conexão do websocket.
+                        """
+
+
+def build_system_prompt(questions: list) -> str:
+    """
+    Builds the interview system prompt from the active questions.
+    """
+    context = "Você é um assistente de voz para pré-entrevistas de emprego. Você é gentil, educado e fala português do Brasil de forma clara e objetiva.\n\n"
+    context += "MISSÃO: Sua tarefa é fazer uma pré-entrevista com o candidato, fazendo TODAS as perguntas da lista abaixo, UMA DE CADA VEZ, seguindo as regras de ação rigorosamente.\n\n"
+    context += "PERGUNTAS OBRIGATÓRIAS (na ordem exata):\n"
+
+    question_tags = {q["question"]: q.get("tag", "") for q in questions}
+    for i, question in enumerate((q["question"] for q in questions), 1):
+        tag = question_tags.get(question, f"pergunta_{i}")
+        context += f"{i}. {question} (tag: {tag})\n"
+
+    context += "\nFERRAMENTAS DISPONÍVEIS:\n"
+    context += "- save_response(tag: str, response: str): Use esta ferramenta para salvar o resumo da resposta de um candidato. O argumento 'tag' deve ser o identificador da pergunta que foi respondida, e 'response' deve ser a resposta do usuário.\n"
+    context += (
+        "- end_interview(): Use esta ferramenta para encerrar a conexão do websocket.\n"
+    )
+    context += INTERVIEW_RULES
+    return context
+
+
+def build_gemini_setup(context: str) -> dict:
+    """
+    Builds the setup message sent to Gemini for a given system prompt.
+    """
+    return {
+        "setup": {
+            "model": "models/gemini-2.5-flash-preview-native-audio-dialog",
+            "generation_config": {
+                "response_modalities": ["audio"],
+                "speech_config": {
+                    "voice_config": {
+                        "prebuilt_voice_config": {
+                            "voice_name": "Aoede",
+                        },
+                    },
+                },
+            },
+            "system_instruction": {"parts": [{"text": context}]},
+            "tools": [
+                {
+                    "function_declarations": [
+                        {
+                            "name": "save_response",
+                            "description": "Salva a resposta do candidato.",
+                            "parameters": {
+                                "type": "object",
+                                "properties": {
+                                    "tag": {
+                                        "type": "string",
+                                        "description": "A tag da pergunta.",
+                                    },
+                                    "response": {
+                                        "type": "string",
+                                        "description": "A resposta do candidato.",
+                                    },
+                                },
+                                "required": ["tag", "response"],
+                            },
+                        },
+                        {
+                            "name": "end_interview",
+                            "description": "Encerra a entrevista, finalizando a conexão do websocket.",
+                        },
+                    ]
+                }
+            ],
+        },
+    }
+
+
+class SetupCache:
+    """
+    Serialized Gemini setup messages keyed by job vacancy.
+    Each job vacancy has a version that invalidate() bumps, so a build that
+    raced with a question update is never stored.
+    """
+
+    def __init__(self):
+        self.ttl = float(os.environ.get("SETUP_CACHE_TTL", 300))
+        self.entries = {}
+        self.versions = {}
+        self.building = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = SharedVersion("setup_cache")
+
+    async def get(self, job_vacancy_id) -> dict:
+        """
+        Returns {"payload": str, "total_questions": int} for a job vacancy.
+        Raises if the job vacancy has no active questions.
+        """
+        if await self.shared.changed():
+            self.clear()
+        key = str(job_vacancy_id)
+        entry = self.entries.get(key)
+        if entry and entry["expires_at"] > time.monotonic():
+            self.hits += 1
+            return entry
+
+        self.misses += 1
+        # Concurrent interview starts for the same job share one build
+        build = self.building.get(key)
+        if build is None:
+            build = asyncio.ensure_future(self._build(key, job_vacancy_id))
+            self.building[key] = build
+
+            def forget(_):
+                if self.building.get(key) is build:
+                    del self.building[key]
+
+            build.add_done_callback(forget)
+        return await asyncio.shield(build)
+
+    async def invalidate(self, job_vacancy_id) -> None:
+        """
+        Drops the cached setup of a job vacancy after its questions change,
+        on every worker.
+        """
+        key = str(job_vacancy_id)
+        self.versions[key] = self.versions.get(key, 0) + 1
+        self.entries.pop(key, None)
+        self.building.pop(key, None)
+        await self.shared.bump()
+
+    def clear(self) -> None:
+        for key in set(self.entries) | set(self.building):
+            self.versions[key] = self.versions.get(key, 0) + 1
+        self.entries.clear()
+        self.building.clear()
+
+    async def _build(self, key: str, job_vacancy_id) -> dict:
+        version = self.versions.get(key, 0)
+        questions = (
+            await get_db()
+            .interview_questions.find(
+                {"job_vacancy_id": ObjectId(job_vacancy_id), "active": True}
+            )
+            .to_list(None)
+        )
+        if not questions:
+            raise Exception("Nenhuma pergunta de entrevista encontrada.")
+
+        entry = {
+            "payload": codec.dumps(build_gemini_setup(build_system_prompt(questions))),
+            "total_questions": len(questions),
+            "expires_at": time.monotonic() + self.ttl,
+        }
+        if self.versions.get(key, 0) == version:
+            self.entries[key] = entry
+        return entry
+
+
+setup_cache = SetupCache()
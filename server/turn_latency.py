@@ -0,0 +1,203 @@
+"""
+Turn latency of an interview: the gap the candidate hears between finishing
+an answer and the next question.
+
+proxy_task stamps the moments of every answer turn on the session's
+TurnTimeline: the last client audio frame (the last speech chunk when the
+vad stage is on), the arrival of the save_response tool call, the time taken
+by save_response_in_db, the tool response being sent back to Gemini and the
+first audio frame of Gemini's reply after it. Each turn is split into
+segments, so that model time (speech to tool call, tool response to audio)
+can be told apart from our own time (save, tool response):
+
+    speech_to_tool_call  last client audio -> toolCall received
+    save                 save_response_in_db
+    tool_response        toolCall received -> tool response sent
+    response_to_audio    tool response sent -> first reply audio frame
+    total                last client audio -> first reply audio frame
+
+When the session ends the turns are stored, in milliseconds, under
+"latency" on the interviews document; turn_latency_percentiles() aggregates
+them per job vacancy.
+"""
+
+import logging
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import DESCENDING
+
+SEGMENTS = (
+    "total",
+    "speech_to_tool_call",
+    "save",
+    "tool_response",
+    "response_to_audio",
+)
+PERCENTILES = (50, 90, 95, 99)
+
+
+def milliseconds(start, end):
+    if start is None or end is None:
+        return None
+    return round((end - start) * 1000, 1)
+
+
+class TurnTimeline:
+    """Timestamps (time.perf_counter) of the answer turns of one session."""
+
+    __slots__ = (
+        "last_client_audio",
+        "speech_end",
+        "tool_call_at",
+        "save_seconds",
+        "tool_response_at",
+        "turns",
+    )
+
+    def __init__(self):
+        self.last_client_audio = None
+        self.speech_end = None
+        self.tool_call_at = None
+        self.save_seconds = None
+        self.tool_response_at = None
+        # One list of milliseconds per turn, in SEGMENTS order
+        self.turns = []
+
+    def client_audio(self, now: float) -> None:
+        self.last_client_audio = now
+
+    def tool_call(self, now: float) -> None:
+        self.speech_end = self.last_client_audio
+        self.tool_call_at = now
+
+    def saved(self, seconds: float) -> None:
+        self.save_seconds = seconds
+
+    def tool_response_sent(self, now: float) -> None:
+        self.tool_response_at = now
+
+    def server_audio(self, now: float) -> None:
+        """Closes the pending turn on the first reply audio frame."""
+        if self.tool_response_at is None:
+            return
+        self.turns.append(
+            [
+                milliseconds(self.speech_end, now),
+                milliseconds(self.speech_end, self.tool_call_at),
+                (
+                    round(self.save_seconds * 1000, 1)
+                    if self.save_seconds is not None
+                    else None
+                ),
+                milliseconds(self.tool_call_at, self.tool_response_at),
+                milliseconds(self.tool_response_at, now),
+            ]
+        )
+        self.speech_end = self.tool_call_at = None
+        self.save_seconds = self.tool_response_at = None
+
+    def summary(self) -> dict:
+        """Compact form stored on the interviews document."""
+        return {
+            "segments": list(SEGMENTS),
+            "turns_ms": self.turns,
+            "summary_ms": segment_percentiles(self.turns),
+            "recorded_at": datetime.utcnow(),
+        }
+
+
+def percentile(ordered: list, pct: float) -> float:
+    """Nearest-rank percentile of a sorted list."""
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def segment_percentiles(turns: list) -> dict:
+    summary = {}
+    for position, segment in enumerate(SEGMENTS):
+        values = sorted(
+            turn[position]
+            for turn in turns
+            if len(turn) > position and turn[position] is not None
+        )
+        if not values:
+            continue
+        summary[segment] = {
+            **{f"p{pct}": percentile(values, pct) for pct in PERCENTILES},
+            "max": values[-1],
+            "count": len(values),
+        }
+    return summary
+
+
+async def find_interview_id(db, interview_state: dict):
+    """
+    The interview of the session: the id sent in the setup message or, for
+    clients that do not send it, the latest interview of the candidate for
+    the job vacancy.
+    """
+    if interview_state.get("interview_id"):
+        return ObjectId(interview_state["interview_id"])
+    candidate_id = interview_state.get("candidate_id")
+    job_vacancy_id = interview_state.get("job_vacancy_id")
+    if not candidate_id or not job_vacancy_id:
+        return None
+    interview = await db.interviews.find_one(
+        {
+            "candidate_id": ObjectId(candidate_id),
+            "job_vacancy_id": ObjectId(job_vacancy_id),
+        },
+        projection={"_id": 1},
+        sort=[("started_at", DESCENDING)],
+    )
+    return interview["_id"] if interview else None
+
+
+async def save_turn_latency(db, interview_state: dict) -> None:
+    """Stores the session's turns on its interview; errors are only logged."""
+    timeline = interview_state.get("timeline")
+    if timeline is None or not timeline.turns:
+        return
+    try:
+        interview_id = await find_interview_id(db, interview_state)
+        if interview_id is None:
+            logging.warning(
+                "No interview to store the turn latency on",
+                extra={"session_id": interview_state.get("session_id")},
+            )
+            return
+        await db.interviews.update_one(
+            {"_id": interview_id}, {"$set": {"latency": timeline.summary()}}
+        )
+    except Exception as e:
+        logging.error(f"Error saving turn latency: {e}")
+
+
+async def turn_latency_percentiles(
+    db, job_vacancy_id: ObjectId, query: dict, limit: int
+) -> dict:
+    """
+    Percentiles of every segment over the turns of the latest `limit`
+    interviews of a job vacancy that have a latency timeline.
+    """
+    interviews = (
+        await db.interviews.find(
+            {"job_vacancy_id": job_vacancy_id, "latency": {"$exists": True}, **query},
+            projection={"latency.turns_ms": 1},
+        )
+        .sort("started_at", DESCENDING)
+        .limit(limit)
+        .to_list(None)
+    )
+    turns = [
+        turn
+        for interview in interviews
+        for turn in interview["latency"].get("turns_ms", [])
+    ]
+    return {
+        "job_vacancy_id": job_vacancy_id,
+        "interviews": len(interviews),
+        "turns": len(turns),
+        "segments_ms": segment_percentiles(turns),
+    }
@@ -0,0 +1,219 @@
+"""
+Voice activity detection on the candidate's audio (Client->Server).
+
+The browser streams the microphone continuously, so most of what reaches
+the proxy while the candidate listens to a question is silence. Each audio
+chunk is split into short windows and classified with NumPy in one pass:
+a window is speech when its energy is well above the tracked noise floor,
+or a little above it with a high zero-crossing rate (fricatives such as
+"s" and "f" are quiet but noisy). A chunk with at least VAD_MIN_WINDOWS
+speech windows is speech.
+
+Silence is not simply cut. Gemini detects the end of a turn on the silence
+that follows speech, and needs the onset of speech intact:
+
+- hangover: after the last speech chunk, VAD_HANGOVER_MS more audio is
+  forwarded as trailing padding, so Gemini still hears the pause that
+  closes the turn
+- pre-roll: suppressed chunks are kept until they are VAD_PREROLL_MS old,
+  and sent ahead of the chunk where speech starts
+- thinning: VAD_KEEP_EVERY=N still forwards one in N silent chunks (0 drops
+  all of them)
+
+VAD=0 turns the stage off. Per-session counts are logged when the session
+ends and added to the process totals exported on /metrics.
+"""
+
+import collections
+import math
+import os
+
+import numpy as np
+
+ENABLED = os.environ.get("VAD", "1") != "0"
+
+# Counters over every session of the process
+totals = {
+    "sessions": 0,
+    "frames": 0,
+    "forwarded": 0,
+    "suppressed": 0,
+    "speech": 0,
+}
+
+FULL_SCALE = 32768.0**2
+
+
+def frame_windows(pcm: bytes, window: int) -> np.ndarray:
+    """
+    PCM16 chunk as a (windows, window) float array; a trailing partial
+    window is dropped unless it is all there is.
+    """
+    samples = np.frombuffer(pcm, dtype="<i2")
+    count = len(samples) // window
+    if count == 0:
+        count, window = 1, max(1, len(samples))
+        samples = np.resize(samples, window) if len(samples) else np.zeros(1, "<i2")
+    return samples[: count * window].reshape(count, window).astype(np.float32)
+
+
+def window_energy(windows: np.ndarray) -> np.ndarray:
+    """Mean square of every window."""
+    return np.einsum("ij,ij->i", windows, windows) / windows.shape[1]
+
+
+def zero_crossing_rate(windows: np.ndarray) -> np.ndarray:
+    signs = np.signbit(windows)
+    return (signs[:, 1:] != signs[:, :-1]).sum(axis=1) / windows.shape[1]
+
+
+def to_decibels(energy: float) -> float:
+    return 10 * math.log10(energy / FULL_SCALE + 1e-10)
+
+
+def to_energy(decibels: float) -> float:
+    return FULL_SCALE * 10 ** (decibels / 10)
+
+
+class VoiceActivityDetector:
+    """
+    Per-session detector; process() returns the chunks to forward.
+    Chunks are opaque to the detector, only their PCM is analysed.
+    """
+
+    def __init__(
+        self,
+        threshold_db: float = None,
+        margin_db: float = None,
+        zcr: float = None,
+        window_ms: int = None,
+        min_windows: int = None,
+        hangover_ms: int = None,
+        preroll_ms: int = None,
+        keep_every: int = None,
+    ):
+        env = os.environ.get
+        # Absolute level under which nothing counts as speech
+        self.threshold_db = (
+            threshold_db
+            if threshold_db is not None
+            else float(env("VAD_THRESHOLD_DB", -50))
+        )
+        self.margin_db = (
+            margin_db if margin_db is not None else float(env("VAD_MARGIN_DB", 12))
+        )
+        self.zcr = zcr if zcr is not None else float(env("VAD_ZCR", 0.3))
+        self.window_ms = window_ms or int(env("VAD_WINDOW_MS", 16))
+        self.min_windows = min_windows or int(env("VAD_MIN_WINDOWS", 2))
+        self.hangover = (
+            hangover_ms
+            if hangover_ms is not None
+            else int(env("VAD_HANGOVER_MS", 1000))
+        ) / 1000
+        self.preroll = (
+            preroll_ms if preroll_ms is not None else int(env("VAD_PREROLL_MS", 300))
+        ) / 1000
+        self.keep_every = (
+            keep_every if keep_every is not None else int(env("VAD_KEEP_EVERY", 0))
+        )
+
+        # Noise floor follows the quietest window down at once and rises
+        # slowly, so a louder room is learnt without tracking speech
+        self.noise_floor = self.threshold_db - self.margin_db
+        self.floor_rise_db = 0.5
+
+        self.speech = False
+        self.hangover_left = 0.0
+        self.silent_run = 0
+        # (chunk, seconds) suppressed but still young enough for the pre-roll
+        self.pending = collections.deque()
+        self.pending_seconds = 0.0
+
+        self.frames = 0
+        self.forwarded = 0
+        self.speech_frames = 0
+        totals["sessions"] += 1
+
+    def classify(self, pcm: bytes, rate: int) -> bool:
+        windows = frame_windows(pcm, max(1, rate * self.window_ms // 1000))
+        energy = window_energy(windows)
+        # Thresholds are compared in energy, only scalars go through log10
+        level = max(self.threshold_db, self.noise_floor + self.margin_db)
+        loud = energy >= to_energy(level)
+        needed = min(self.min_windows, len(energy))
+        speech = int(np.count_nonzero(loud))
+        if speech < needed:
+            # The zero-crossing rate only decides the borderline windows
+            borderline = ~loud & (energy >= to_energy(level - self.margin_db / 2))
+            if borderline.any():
+                speech += int(
+                    np.count_nonzero(
+                        zero_crossing_rate(windows[borderline]) >= self.zcr
+                    )
+                )
+        self.noise_floor = min(
+            to_decibels(float(energy.min())), self.noise_floor + self.floor_rise_db
+        )
+        return speech >= needed
+
+    def process(self, pcm: bytes, rate: int, chunk) -> list:
+        """Classifies a chunk; returns what to forward, in order."""
+        seconds = len(pcm) / 2 / rate
+        self.frames += 1
+        totals["frames"] += 1
+        self.speech = self.classify(pcm, rate)
+
+        if self.speech:
+            self.speech_frames += 1
+            totals["speech"] += 1
+            self.hangover_left = self.hangover
+            self.silent_run = 0
+            forwarded = [pending for pending, _ in self.pending] + [chunk]
+            self.pending.clear()
+            self.pending_seconds = 0.0
+            return self._forward(forwarded)
+
+        # Trailing padding: the pause Gemini needs to close the turn
+        if self.hangover_left > 0:
+            self.hangover_left -= seconds
+            return self._forward([chunk])
+
+        self.silent_run += 1
+        if self.keep_every and self.silent_run % self.keep_every == 0:
+            # Older held chunks would now arrive out of order; this one is
+            # the most recent silence anyway
+            self.close()
+            return self._forward([chunk])
+
+        self.pending.append((chunk, seconds))
+        self.pending_seconds += seconds
+        while self.pending and self.pending_seconds - self.pending[0][1] >= (
+            self.preroll
+        ):
+            _, old_seconds = self.pending.popleft()
+            self.pending_seconds -= old_seconds
+            totals["suppressed"] += 1
+        return []
+
+    def _forward(self, chunks: list) -> list:
+        self.forwarded += len(chunks)
+        totals["forwarded"] += len(chunks)
+        return chunks
+
+    def summary(self) -> dict:
+        suppressed = self.frames - self.forwarded
+        return {
+            "frames": self.frames,
+            "forwarded": self.forwarded,
+            "suppressed": suppressed,
+            "speech_frames": self.speech_frames,
+            "suppressed_ratio": (
+                round(suppressed / self.frames, 3) if self.frames else 0.0
+            ),
+        }
+
+    def close(self) -> None:
+        """Counts the chunks still held for the pre-roll as suppressed."""
+        totals["suppressed"] += len(self.pending)
+        self.pending.clear()
+        self.pending_seconds = 0.0
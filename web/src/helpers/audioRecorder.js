@@ -1,21 +1,11 @@
 import { EventEmitter } from "eventemitter3"
-import { audioContext } from "./utils.js"
+import { arrayBufferToBase64, audioContext } from "./utils.js"
 import {
   createWorketFromSrc,
   registeredWorklets,
 } from "./audioworkletRegistry.js"
 import AudioProcessingWorklet from "./worklets/audioProcessing.js"
 
-function arrayBufferToBase64(buffer) {
-  var binary = ""
-  var bytes = new Uint8Array(buffer)
-  var len = bytes.byteLength
-  for (var i = 0; i < len; i++) {
-    binary += String.fromCharCode(bytes[i])
-  }
-  return window.btoa(binary)
-}
-
 export class AudioRecorder extends EventEmitter {
   constructor() {
     super()
@@ -63,9 +53,12 @@ export class AudioRecorder extends EventEmitter {
         const arrayBuffer = ev.data.data.int16arrayBuffer
 
         if (arrayBuffer) {
-          const arrayBufferString = arrayBufferToBase64(arrayBuffer)
           console.log("🎤 Audio captured - size:", arrayBuffer.byteLength, "bytes")
-          this.emit("data", arrayBufferString)
+          // Raw PCM; base64 is only built for "data" listeners
+          this.emit("pcm", arrayBuffer)
+          if (this.listenerCount("data") > 0) {
+            this.emit("data", arrayBufferToBase64(arrayBuffer))
+          }
         }
       }
       this.source.connect(this.recordingWorklet)
@@ -1,3 +1,42 @@
+import {
+  arrayBufferToBase64,
+  base64ToArrayBuffer,
+  mulawToPCM16,
+} from "./utils.js"
+
+// Binary audio transport negotiated with the proxy (server/audio_frames.py):
+// a 4 byte header (version, kind, sample rate) followed by raw PCM16
+const PCM_SUBPROTOCOL = "pcm16.v1"
+const FRAME_VERSION = 1
+const FRAME_KIND_PCM16 = 1
+const FRAME_KIND_MULAW = 2
+const FRAME_HEADER_SIZE = 4
+const INPUT_SAMPLE_RATE = 16000
+const OUTPUT_SAMPLE_RATE = 24000
+
+// Compact audio asked of the proxy on slow networks
+// (server/downstream_audio.py); null keeps Gemini's 24 kHz PCM16
+function preferredAudioOutput() {
+  const connection = navigator.connection
+  if (!connection) return null
+  if (
+    connection.saveData ||
+    ["slow-2g", "2g"].includes(connection.effectiveType)
+  ) {
+    return { encoding: "mulaw", sample_rate: 8000 }
+  }
+  if (connection.effectiveType === "3g" || connection.type === "cellular") {
+    return { encoding: "mulaw", sample_rate: 16000 }
+  }
+  return null
+}
+
+// Sample rate of an "audio/pcm;rate=N" style mime type
+function mimeSampleRate(mimeType) {
+  const match = /rate=(\d+)/.exec(mimeType || "")
+  return match ? Number(match[1]) : OUTPUT_SAMPLE_RATE
+}
+
 class GeminiLiveAPI {
   constructor(endpoint) {
     this.endpoint = endpoint
@@ -10,10 +49,13 @@ class GeminiLiveAPI {
     this.onClose = () => {}
     this.onToolCall = () => {}
     this.isSetupSent = false
+    this.binaryAudio = false
+    this.audioOutput = null
   }
 
   connect() {
-    this.ws = new WebSocket(this.endpoint)
+    this.ws = new WebSocket(this.endpoint, [PCM_SUBPROTOCOL])
+    this.ws.binaryType = "arraybuffer"
     this.setupWebSocket()
   }
 
@@ -32,13 +74,22 @@ class GeminiLiveAPI {
   setupWebSocket() {
     if (!this.ws) return
     this.ws.onopen = () => {
-      console.log("WebSocket connection is opening...")
+      // An older proxy accepts without the subprotocol: stay on JSON audio
+      this.binaryAudio = this.ws.protocol === PCM_SUBPROTOCOL
+      console.log("WebSocket connection is opening...", {
+        binaryAudio: this.binaryAudio,
+      })
       // Backend will handle setup configuration
       this.sendSetupRequest()
     }
 
     this.ws.onmessage = async (event) => {
       try {
+        if (event.data instanceof ArrayBuffer) {
+          this.handleAudioFrame(event.data)
+          return
+        }
+
         let wsResponse
         if (event.data instanceof Blob) {
           const responseText = await event.data.text()
@@ -62,6 +113,12 @@ class GeminiLiveAPI {
           return
         }
 
+        if (wsResponse.audioOutput) {
+          console.log("Audio output negotiated:", wsResponse.audioOutput)
+          this.audioOutput = wsResponse.audioOutput
+          return
+        }
+
         if (wsResponse.setupComplete) {
           this.onSetupComplete()
           this.sendInitialMessage()
@@ -74,13 +131,21 @@ class GeminiLiveAPI {
           }
 
           if (wsResponse.serverContent.modelTurn?.parts?.[0]?.inlineData) {
-            const audioData =
-              wsResponse.serverContent.modelTurn.parts[0].inlineData.data
+            const inlineData =
+              wsResponse.serverContent.modelTurn.parts[0].inlineData
+            const audioData = inlineData.data
             console.log(
               "🎵 Audio data received from Gemini - base64 length:",
               audioData.length
             )
-            this.onAudioData(audioData)
+            if (inlineData.mimeType?.startsWith("audio/pcmu")) {
+              this.onAudioData(
+                mulawToPCM16(base64ToArrayBuffer(audioData)),
+                mimeSampleRate(inlineData.mimeType)
+              )
+            } else {
+              this.onAudioData(audioData, mimeSampleRate(inlineData.mimeType))
+            }
 
             if (!wsResponse.serverContent.turnComplete) {
               this.sendContinueSignal()
@@ -108,6 +173,25 @@ class GeminiLiveAPI {
     }
   }
 
+  handleAudioFrame(frame) {
+    const header = new DataView(frame, 0, FRAME_HEADER_SIZE)
+    const kind = header.getUint8(1)
+    if (
+      header.getUint8(0) !== FRAME_VERSION ||
+      (kind !== FRAME_KIND_PCM16 && kind !== FRAME_KIND_MULAW)
+    ) {
+      console.error("Unsupported audio frame header")
+      return
+    }
+    const payload = frame.slice(FRAME_HEADER_SIZE)
+    // Binary frames only carry audio; turn signals always come as JSON
+    this.onAudioData(
+      kind === FRAME_KIND_MULAW ? mulawToPCM16(payload) : payload,
+      header.getUint16(2, true)
+    )
+    this.sendContinueSignal()
+  }
+
   sendMessage(message) {
     if (this.ws.readyState === WebSocket.OPEN) {
       this.ws.send(JSON.stringify(message))
@@ -139,6 +223,11 @@ class GeminiLiveAPI {
       console.log("⚠️ No job candidate ID provided for setup")
     }
 
+    const audioOutput = preferredAudioOutput()
+    if (audioOutput) {
+      setupMessage.setup.audio_output = audioOutput
+    }
+
     if (this.ws.readyState === WebSocket.OPEN) {
       console.log("📤 Sending setup request to backend:", setupMessage)
       this.ws.send(JSON.stringify(setupMessage))
@@ -151,21 +240,30 @@ class GeminiLiveAPI {
     }
   }
 
-  sendAudioChunk(base64Audio) {
+  sendAudioChunk(pcm) {
+    if (this.binaryAudio) {
+      if (this.ws.readyState !== WebSocket.OPEN) return
+      const frame = new Uint8Array(FRAME_HEADER_SIZE + pcm.byteLength)
+      const header = new DataView(frame.buffer)
+      header.setUint8(0, FRAME_VERSION)
+      header.setUint8(1, FRAME_KIND_PCM16)
+      header.setUint16(2, INPUT_SAMPLE_RATE, true)
+      frame.set(new Uint8Array(pcm), FRAME_HEADER_SIZE)
+      this.ws.send(frame.buffer)
+      return
+    }
+
     const message = {
       realtime_input: {
         media_chunks: [
           {
             mime_type: "audio/pcm",
-            data: base64Audio,
+            data: arrayBufferToBase64(pcm),
           },
         ],
       },
     }
-    console.log(
-      "📡 WebSocket sending audio chunk - data length:",
-      base64Audio.length
-    )
+    console.log("📡 WebSocket sending audio chunk - bytes:", pcm.byteLength)
     this.sendMessage(message)
   }
 
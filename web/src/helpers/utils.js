@@ -1,3 +1,13 @@
+export function arrayBufferToBase64(buffer) {
+  var binary = ""
+  var bytes = new Uint8Array(buffer)
+  var len = bytes.byteLength
+  for (var i = 0; i < len; i++) {
+    binary += String.fromCharCode(bytes[i])
+  }
+  return window.btoa(binary)
+}
+
 export function base64ToArrayBuffer(base64) {
   var binaryString = atob(base64)
   var bytes = new Uint8Array(binaryString.length)
@@ -7,6 +17,27 @@ export function base64ToArrayBuffer(base64) {
   return bytes.buffer
 }
 
+// G.711 mu-law byte -> PCM16 sample, for compact audio from the proxy
+const MULAW_TO_PCM16 = (() => {
+  const table = new Int16Array(256)
+  for (let i = 0; i < 256; i++) {
+    const code = ~i & 0xff
+    const exponent = (code >> 4) & 0x07
+    const magnitude = (((code & 0x0f) << 3) + 0x84) << exponent
+    table[i] = code & 0x80 ? 0x84 - magnitude : magnitude - 0x84
+  }
+  return table
+})()
+
+export function mulawToPCM16(buffer) {
+  var bytes = new Uint8Array(buffer)
+  var samples = new Int16Array(bytes.length)
+  for (let i = 0; i < bytes.length; i++) {
+    samples[i] = MULAW_TO_PCM16[bytes[i]]
+  }
+  return samples.buffer
+}
+
 const map = new Map()
 
 export const audioContext = (() => {
@@ -40,12 +40,15 @@ const GeminiLiveApiProvider = ({ children, jobVacancyId = null, jobCandidateId =
     client.sendSetupRequest = (id) => {
       originalSendSetupRequest.call(client, jobVacancyId || id, jobCandidateId || null)
     }
-    client.onAudioData = (base64Audio) => {
-      console.log("🔊 Processing audio from Gemini - base64 length:", base64Audio.length)
+    client.onAudioData = (audio, sampleRate = 24000) => {
       try {
-        const arrayBuffer = base64ToArrayBuffer(base64Audio)
+        // ArrayBuffer with the binary transport, base64 with the JSON one
+        const arrayBuffer =
+          audio instanceof ArrayBuffer ? audio : base64ToArrayBuffer(audio)
         console.log("🔄 Converted to ArrayBuffer - size:", arrayBuffer.byteLength, "bytes")
         if (audioStreamerRef.current) {
+          // 16 or 8 kHz when the proxy sends compact audio
+          audioStreamerRef.current.sampleRate = sampleRate
           audioStreamerRef.current.addPCM16(new Uint8Array(arrayBuffer))
           console.log("✅ Audio sent to AudioStreamer")
         } else {
@@ -1,8 +1,13 @@
 import api from "@/services/api"
 
-const list = async () => {
+// Filtered by candidate or interview on the server, one page at a time
+const list = async ({ cursor, candidateId, interviewId } = {}) => {
+  const params = {}
+  if (cursor) params.cursor = cursor
+  if (candidateId) params.candidate_id = candidateId
+  if (interviewId) params.interview_id = interviewId
   try {
-    return await api.get("/interview_questions_asked")
+    return await api.get("/interview_questions_asked", { params })
   } catch (error) {
     console.error("Error fetching interview questions asked:", error)
     throw error
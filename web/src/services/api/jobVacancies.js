@@ -1,8 +1,10 @@
 import api from "@/services/api"
 
-const list = async () => {
+const list = async ({ cursor } = {}) => {
   try {
-    return await api.get("/job_vacancies")
+    return await api.get("/job_vacancies", {
+      params: cursor ? { cursor } : {},
+    })
   } catch (error) {
     console.error("Error fetching job vacancies:", error)
     throw error
@@ -18,6 +20,17 @@ const show = async ({ id }) => {
   }
 }
 
+const dashboard = async ({ id, cursor }) => {
+  try {
+    return await api.get(`/job_vacancies/${id}/dashboard`, {
+      params: cursor ? { cursor } : {},
+    })
+  } catch (error) {
+    console.error(`Error fetching dashboard of job vacancy ${id}:`, error)
+    throw error
+  }
+}
+
 const create = async (data) => {
   try {
     return await api.post("/job_vacancies", data)
@@ -30,5 +43,6 @@ const create = async (data) => {
 export default {
   list,
   show,
+  dashboard,
   create,
 }
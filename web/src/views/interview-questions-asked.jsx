@@ -1,4 +1,4 @@
-import { useState } from "react"
+import { useEffect, useState } from "react"
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card"
 import { ScrollArea } from "@/components/ui/scroll-area"
 import { Badge } from "@/components/ui/badge"
@@ -14,24 +14,44 @@ const InterviewQuestionsAsked = () => {
   const [filter, setFilter] = useState("all") // all, candidate, interview
   const [filterValue, setFilterValue] = useState("")
 
-  const { data: questionsData, refetch } = useFetch(
+  const [morePages, setMorePages] = useState([])
+
+  // Filtered on the server, so that it covers every page and not only the
+  // ones already loaded; applied once the value is a whole id
+  const filterId = /^[0-9a-f]{24}$/i.test(filterValue.trim())
+    ? filterValue.trim()
+    : null
+  const filterParams = {
+    candidateId: filter === "candidate" ? filterId : null,
+    interviewId: filter === "interview" ? filterId : null,
+  }
+
+  const { data: questionsData, refesh } = useFetch(
     interviewQuestionsAskedApi.list,
-    {},
-    []
+    filterParams,
+    [filterParams.candidateId, filterParams.interviewId]
   )
 
-  const questions = questionsData?.interview_questions_asked || []
+  // A new first page (filter changed or "Atualizar") starts the list over
+  useEffect(() => {
+    setMorePages([])
+  }, [questionsData])
 
-  const filteredQuestions = questions.filter(question => {
-    if (filter === "all") return true
-    if (filter === "candidate" && filterValue) {
-      return question.candidate_id === filterValue
-    }
-    if (filter === "interview" && filterValue) {
-      return question.interview_id === filterValue
-    }
-    return true
-  })
+  const questions = [
+    ...(questionsData?.interview_questions_asked || []),
+    ...morePages.flatMap((page) => page.interview_questions_asked),
+  ]
+  const nextCursor = morePages.length
+    ? morePages[morePages.length - 1].next_cursor
+    : questionsData?.next_cursor
+
+  const loadMoreQuestions = async () => {
+    const response = await interviewQuestionsAskedApi.list({
+      ...filterParams,
+      cursor: nextCursor,
+    })
+    setMorePages([...morePages, response.data])
+  }
 
   const getStatusColor = (status) => {
     switch (status) {
@@ -88,7 +108,7 @@ const InterviewQuestionsAsked = () => {
                 />
               </div>
             )}
-            <Button onClick={refetch}>Atualizar</Button>
+            <Button onClick={refesh}>Atualizar</Button>
           </div>
         </CardContent>
       </Card>
@@ -97,18 +117,18 @@ const InterviewQuestionsAsked = () => {
       <Card className="w-full max-w-4xl mx-auto">
         <CardHeader>
           <CardTitle>
-            Perguntas ({filteredQuestions.length} de {questions.length})
+            Perguntas ({questions.length}{nextCursor ? "+" : ""})
           </CardTitle>
         </CardHeader>
         <CardContent>
           <ScrollArea className="h-[600px]">
-            {filteredQuestions.length === 0 ? (
+            {questions.length === 0 ? (
               <p className="text-gray-500 text-center py-8">
                 Nenhuma pergunta encontrada.
               </p>
             ) : (
               <div className="space-y-4">
-                {filteredQuestions.map((question) => (
+                {questions.map((question) => (
                   <div key={question._id} className="border rounded-lg p-4 space-y-2">
                     <div className="flex justify-between items-start">
                       <div className="flex-1">
@@ -140,6 +160,13 @@ const InterviewQuestionsAsked = () => {
               </div>
             )}
           </ScrollArea>
+          {nextCursor && (
+            <div className="flex justify-center mt-4">
+              <Button variant="outline" onClick={loadMoreQuestions}>
+                Carregar mais perguntas
+              </Button>
+            </div>
+          )}
         </CardContent>
       </Card>
     </div>
@@ -15,16 +15,27 @@ import {
 
 import useFetch from "@/hooks/useFetch"
 import jobVacanciesApi from "@/services/api/jobVacancies"
-import { useMemo } from "react"
+import { useState } from "react"
 
 const JobVacancyList = () => {
   let navigate = useNavigate()
 
   const { data } = useFetch(jobVacanciesApi.list, {})
+  const [morePages, setMorePages] = useState([])
 
-  const jobVacancies = useMemo(() => {
-    return data?.job_vacancies || []
-  }, [data])
+  // The API returns one page at a time; next_cursor points to the next one
+  const jobVacancies = [
+    ...(data?.job_vacancies || []),
+    ...morePages.flatMap((page) => page.job_vacancies),
+  ]
+  const nextCursor = morePages.length
+    ? morePages[morePages.length - 1].next_cursor
+    : data?.next_cursor
+
+  const loadMoreJobVacancies = async () => {
+    const response = await jobVacanciesApi.list({ cursor: nextCursor })
+    setMorePages([...morePages, response.data])
+  }
 
   console.log("Job Vacancies:", data)
 
@@ -66,6 +77,13 @@ const JobVacancyList = () => {
             ))}
           </TableBody>
         </Table>
+        {nextCursor && (
+          <div className="flex justify-center mt-4">
+            <Button variant="outline" onClick={loadMoreJobVacancies}>
+              Carregar mais vagas
+            </Button>
+          </div>
+        )}
       </div>
       {/* Job vacancies list will be rendered here */}
     </div>
@@ -1,3 +1,4 @@
+import { useState } from "react"
 import { useParams } from "react-router"
 
 import { PageHeader } from "@/components/page-header"
@@ -20,25 +21,40 @@ import { InterviewQuestionsDialog } from "@/components/job-vacancy-show/intervie
 import useFetch from "@/hooks/useFetch"
 
 import jobVacanciesApi from "@/services/api/jobVacancies"
-import candidatesApi from "@/services/api/candidates"
 
 const JobVacancyShow = () => {
   const { jobVacancyId } = useParams()
 
   // let navigate = useNavigate()
 
-  const { data: jobVacancyData } = useFetch(jobVacanciesApi.show, {
-    id: jobVacancyId,
-  })
-  const { data: candidatesData, refesh: refreshCandidates } = useFetch(
-    candidatesApi.list,
-    {
-      jobVacancyId: jobVacancyId,
-    }
+  // Vaga, candidatos, status da entrevista e respostas em uma única chamada
+  const { data: dashboardData, refesh: refreshDashboard } = useFetch(
+    jobVacanciesApi.dashboard,
+    { id: jobVacancyId }
   )
+  const [morePages, setMorePages] = useState([])
 
-  const jobVacancy = jobVacancyData?.job_vacancy || {}
-  const candidates = candidatesData?.candidates || []
+  const jobVacancy = dashboardData?.job_vacancy || {}
+  const candidates = [
+    ...(dashboardData?.candidates || []),
+    ...morePages.flatMap((page) => page.candidates),
+  ]
+  const nextCursor = morePages.length
+    ? morePages[morePages.length - 1].next_cursor
+    : dashboardData?.next_cursor
+
+  const loadMoreCandidates = async () => {
+    const response = await jobVacanciesApi.dashboard({
+      id: jobVacancyId,
+      cursor: nextCursor,
+    })
+    setMorePages([...morePages, response.data])
+  }
+
+  const refreshCandidates = () => {
+    setMorePages([])
+    refreshDashboard()
+  }
 
   return (
     <div className="container mx-auto p-4">
@@ -98,6 +114,8 @@ const JobVacancyShow = () => {
                   <TableHead>Nome</TableHead>
                   <TableHead>Email</TableHead>
                   <TableHead>Status</TableHead>
+                  <TableHead>Entrevista</TableHead>
+                  <TableHead>Respostas</TableHead>
                   <TableHead>Data de Candidatura</TableHead>
                   <TableHead className="text-right">Ações</TableHead>
                 </TableRow>
@@ -125,6 +143,10 @@ const JobVacancyShow = () => {
                         "-"
                       )}
                     </TableCell>
+                    <TableCell className="capitalize">
+                      {candidate.interview?.status || "-"}
+                    </TableCell>
+                    <TableCell>{candidate.responses_count ?? 0}</TableCell>
                     <TableCell>{candidate.applicationDate || "-"}</TableCell>
                     <TableCell className="text-right">
                       <ActionCandidateDialog candidate={candidate} />
@@ -133,6 +155,13 @@ const JobVacancyShow = () => {
                 ))}
               </TableBody>
             </Table>
+            {nextCursor && (
+              <div className="flex justify-center mt-4">
+                <Button variant="outline" onClick={loadMoreCandidates}>
+                  Carregar mais candidatos
+                </Button>
+              </div>
+            )}
           </div>
         </div>
       </div>
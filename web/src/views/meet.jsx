@@ -118,13 +118,10 @@ const MeetContent = ({ meetData }) => {
   )
 
   useEffect(() => {
-    const onData = (base64) => {
-      console.log(
-        "📤 Sending audio chunk to Gemini - base64 length:",
-        base64.length
-      )
+    const onData = (pcm) => {
+      console.log("📤 Sending audio chunk to Gemini - bytes:", pcm.byteLength)
       if (client && typeof client.sendAudioChunk === "function") {
-        client.sendAudioChunk(base64)
+        client.sendAudioChunk(pcm)
       } else {
         console.error("❌ Client or sendAudioChunk not available")
       }
@@ -134,7 +131,7 @@ const MeetContent = ({ meetData }) => {
       if (connected && !muted && audioRecorder) {
         try {
           addLog("Requesting microphone permission...")
-          audioRecorder.on("data", onData)
+          audioRecorder.on("pcm", onData)
           await audioRecorder.start()
           addLog("Microphone recording started")
         } catch (error) {
@@ -142,7 +139,7 @@ const MeetContent = ({ meetData }) => {
           addLog(`Error starting microphone: ${error.message}`)
         }
       } else {
-        audioRecorder.off("data", onData)
+        audioRecorder.off("pcm", onData)
         audioRecorder.stop()
         if (muted) {
           addLog("Microphone muted")
@@ -155,7 +152,7 @@ const MeetContent = ({ meetData }) => {
     handleAudioRecording()
 
     return () => {
-      audioRecorder.off("data", onData)
+      audioRecorder.off("pcm", onData)
     }
   }, [connected, client, muted, audioRecorder, addLog])
 